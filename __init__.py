@@ -1,7 +1,10 @@
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 from logging.handlers import RotatingFileHandler
 from os import path
 import logging
 import os
+import queue
 
 
 class LogDir(object):
@@ -63,6 +66,9 @@ class NullPluginLogger(object):
     def __init__(self, name):
         pass
 
+    def isEnabledFor(self, level):
+        return False
+
     def debug(self, message, *args, **kwargs):
         pass
 
@@ -82,72 +88,179 @@ class NullPluginLogger(object):
         pass
 
 
-class PluginLogger(object):
+class _LevelAwareQueueListener(QueueListener):
     '''
-    Logs events.
+    Dispatches queued records only to handlers whose level lets them through.
+
+    QueueListener ignores handler levels in the Python version shipped with
+    Sublime Text 3.
     '''
 
-    log_dir = LogDir.find()
+    def handle(self, record):
+        record = self.prepare(record)
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
 
-    def __init__(self, name):
-        self.logger = logging.getLogger(name)
-        default_level = logging.ERROR
-        user_level = self._get_log_level_from_file()
-        self.logger.setLevel(user_level if user_level is not None else default_level)
 
+class LogSink(object):
+    '''
+    Handler chain shared by all plugin loggers in the process.
+
+    Loggers only put records in a queue; a background thread writes them to
+    the console and the log file, so that logging doesn't block the UI thread.
+    '''
+
+    # Rotate the log file after this many bytes.
+    max_bytes = 1 << 20
+    backup_count = 2
+
+    _handler = None
+    _listener = None
+    # Loggers the handler has been added to.
+    _loggers = []
+
+    @staticmethod
+    def attach(logger, file_name):
+        '''
+        Ensures @logger sends its records to the shared sink.
+        '''
+        if LogSink._handler is None:
+            LogSink._start(file_name)
+
+        # Drop handlers left over by a previous version of this module, for
+        # example, after the plugin has been reloaded.
+        for handler in list(logger.handlers):
+            if getattr(handler, 'is_vintageous_sink', False):
+                if handler is LogSink._handler:
+                    return
+                logger.removeHandler(handler)
+        logger.addHandler(LogSink._handler)
+        LogSink._loggers.append(logger)
+
+    @staticmethod
+    def _start(file_name):
         f = logging.Formatter('%(asctime)s %(levelname)-5s %(name)s %(message)s')
 
         consoleHandler = logging.StreamHandler()
         consoleHandler.setLevel(logging.WARNING)
         consoleHandler.setFormatter(f)
-        self.logger.addHandler(consoleHandler)
+        handlers = [consoleHandler]
 
-        file_name = self._file_name()
         if file_name:
-            fileHandler = RotatingFileHandler(file_name, maxBytes=1<<10)
+            fileHandler = RotatingFileHandler(file_name,
+                                              maxBytes=LogSink.max_bytes,
+                                              backupCount=LogSink.backup_count)
             fileHandler.setFormatter(f)
-            self.logger.addHandler(fileHandler)
+            handlers.append(fileHandler)
         else:
             print("Vintageous: cannot find log file path: %s" % file_name)
 
+        records = queue.Queue()
+        LogSink._handler = QueueHandler(records)
+        LogSink._handler.is_vintageous_sink = True
+        LogSink._listener = _LevelAwareQueueListener(records, *handlers)
+        LogSink._listener.start()
+
+    @staticmethod
+    def stop():
+        '''
+        Detaches the sink from the loggers, writes out pending records and
+        stops the background thread.
+        '''
+        if LogSink._listener is None:
+            return
+        # Otherwise, records would pile up in a queue nobody reads.
+        for logger in LogSink._loggers:
+            logger.removeHandler(LogSink._handler)
+        del LogSink._loggers[:]
+        LogSink._listener.stop()
+        for handler in LogSink._listener.handlers:
+            handler.close()
+        LogSink._listener = None
+        LogSink._handler = None
+
+
+class PluginLogger(object):
+    '''
+    Logs events.
+    '''
+
+    log_dir = LogDir.find()
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+        default_level = logging.ERROR
+        user_level = self._get_log_level_from_file()
+        self.logger.setLevel(user_level if user_level is not None else default_level)
+
+        # Records logged by our modules propagate up to the package's logger,
+        # so only that one needs the sink.
+        package = __name__.split('.')[0]
+        if name == package or name.startswith(package + '.'):
+            LogSink.attach(logging.getLogger(package), self._file_name())
+        else:
+            LogSink.attach(self.logger, self._file_name())
+
     def warn_aboug_logging_level(self):
         if self.logger.level <= logging.DEBUG:
             package = __name__.split('.')[0]
             self.warning("debug level set to DEBUG; check or delete %s", self._get_path_to_log())
 
     def _get_path_to_log(self):
+        if not self.log_dir:
+            return
         package = __name__.split('.')[0]
         p = path.join(self.log_dir, package)
         return p
 
     def _get_log_level_from_file(self):
         p = self._get_path_to_log()
-        if path.exists(p):
+        if p and path.exists(p):
             with open(p, 'rt') as f:
                 text = f.read().strip().upper()
                 return getattr(logging, text, None)
 
     def _file_name(self):
+        if not self.log_dir:
+            return
         p = __name__.split('.')[0]
         return os.path.join(self.log_dir, '{}.log'.format(p))
 
+    def isEnabledFor(self, level):
+        '''
+        Returns `True` if records of @level would be logged. Use it to skip
+        expensive work done only for logging.
+        '''
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level, message, args, kwargs):
+        # Messages are built only if they are going to be logged. @message
+        # can be a %-style format string (with @args) or a callable that
+        # returns the message.
+        if not self.logger.isEnabledFor(level):
+            return
+        if callable(message):
+            message = message()
+        self.logger.log(level, message, *args, **kwargs)
+
     def debug(self, message, *args, **kwargs):
-        self.logger.debug(message, *args, **kwargs)
+        self._log(logging.DEBUG, message, args, kwargs)
 
     def info(self, message, *args, **kwargs):
-        self.logger.info(message, *args, **kwargs)
+        self._log(logging.INFO, message, args, kwargs)
 
     def warn(self, message, *args, **kwargs):
-        self.logger.warning(message, *args, **kwargs)
+        self._log(logging.WARNING, message, args, kwargs)
 
     def warning(self, message, *args, **kwargs):
-        self.logger.warning(message, *args, **kwargs)
+        self._log(logging.WARNING, message, args, kwargs)
 
     def error(self, message, *args, **kwargs):
-        self.logger.error(message, *args, **kwargs)
+        self._log(logging.ERROR, message, args, kwargs)
 
     def critical(self, message, *args, **kwargs):
-        self.logger.critical(message, *args, **kwargs)
+        self._log(logging.CRITICAL, message, args, kwargs)
 
 
 PluginLogger(__name__).warn_aboug_logging_level()
@@ -0,0 +1,204 @@
+"""
+Measures keystroke latency on synthetic buffers.
+
+Replays key streams the way Sublime Text feeds them to Vintageous (keys go
+to `press_key`, text typed in insert mode goes to `insert`, ex command lines
+go to `vi_colon_input`; or, with --notation, whole streams go to
+`process_notation`) and reports, for every operation, the median time it
+takes and the number of Sublime Text API calls it makes.
+
+Runs outside Sublime Text, on top of the in-memory API in tests/headless:
+
+    python bench/bench_keys.py
+    python bench/bench_keys.py --lines 1000 100000 1000000 --kind code
+    python bench/bench_keys.py --only dd w --repeat 20
+
+Timings depend on the fake API and are only comparable between runs on the
+same machine; API call counts are comparable anywhere.
+"""
+
+from collections import namedtuple
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+
+ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'tests', 'headless'))
+
+import runner
+
+
+# name: label in the report.
+# setup: keys that put the caret in place; not measured.
+# keys: keys measured; if it starts with ':', an ex command line.
+# edits: whether the keys change the buffer, which is then restored after
+#        each repetition.
+Operation = namedtuple('Operation', 'name setup keys edits')
+
+OPERATIONS = (
+    Operation('w', 'gg', '5w', False),
+    Operation('b', 'G', '5b', False),
+    Operation('e', 'gg', '5e', False),
+    Operation('}', 'gg', '3}', False),
+    Operation('{', 'G', '3{', False),
+    Operation('%', 'gg/(<CR>', '%', False),
+    Operation('dd', 'gg', '3dd', True),
+    Operation('/pattern', 'gg', '/needle<CR>', False),
+    Operation('n', 'gg/needle<CR>', 'n', False),
+    Operation('*', 'gg/needle<CR>', '*', False),
+    Operation('.', 'ggdd', '.', True),
+    Operation('@q', 'ggqqA;<Esc>jq', '@q', True),
+    Operation(':%s', 'gg', ':%s/needle/pin/g', True),
+    Operation(':g', 'gg', ':g/needle/print', False),
+    Operation('visual block', 'gg', '<C-v>3jIxx<Esc>', True),
+)
+
+WORDS = ('alpha', 'beta', 'gamma', 'delta', 'value', 'result', 'state',
+         'view', 'region', 'count', 'index', 'mode', 'needle', 'buffer')
+
+
+def make_code(lines, rng):
+    """
+    Returns @lines lines of Python-like code.
+    """
+    out = []
+    while len(out) < lines:
+        name = rng.choice(WORDS)
+        out.append('def {0}_{1}(self, {2}, {3}=None):'.format(
+            name, len(out), rng.choice(WORDS), rng.choice(WORDS)))
+        for i in range(rng.randint(2, 8)):
+            out.append('    {0} = self.{1}({2}[{3}], {4})'.format(
+                rng.choice(WORDS), rng.choice(WORDS), rng.choice(WORDS), i,
+                rng.choice(WORDS)))
+        out.append('    return {0}'.format(rng.choice(WORDS)))
+        out.append('')
+    return '\n'.join(out[:lines]) + '\n'
+
+
+def make_prose(lines, rng):
+    """
+    Returns @lines lines of paragraphs of text.
+    """
+    out = []
+    while len(out) < lines:
+        for i in range(rng.randint(3, 10)):
+            words = [rng.choice(WORDS) for x in range(rng.randint(8, 14))]
+            out.append(' '.join(words).capitalize() + '.')
+        out.append('')
+    return '\n'.join(out[:lines]) + '\n'
+
+
+MAKERS = {'code': make_code, 'prose': make_prose}
+
+
+class Replayer(object):
+    def __init__(self, window, view, notation=False):
+        from Vintageous.state import State
+        from Vintageous.vi.keys import KeySequenceTokenizer
+        from Vintageous.vi.utils import modes
+        from Vintageous.vi.utils import translate_char
+
+        self.window = window
+        self.view = view
+        self.notation = notation
+        self.state = State(view)
+        self.tokenize = KeySequenceTokenizer
+        self.typing_modes = (modes.INSERT, modes.REPLACE)
+        self.translate_char = translate_char
+
+    def replay(self, keys):
+        if keys.startswith(':'):
+            self.window.run_command('vi_colon_input', {'cmd_line': keys})
+            return
+
+        if self.notation:
+            self.window.run_command('process_notation', {'keys': keys})
+            return
+
+        for key in self.tokenize(keys).iter_tokenize():
+            if (self.state.mode in self.typing_modes and
+                    key.lower() != '<esc>'):
+                self.window.run_command('insert', {
+                    'characters': self.translate_char(key)})
+            else:
+                self.window.run_command('press_key', {'key': key})
+
+
+def reset(view, replayer, text, setup):
+    view.run_command('__vi_tests_write_buffer', {'text': text})
+    view.sel().clear()
+    view.sel().add(0)
+    replayer.replay(setup)
+
+
+def measure(window, text, operation, repeat, notation=False):
+    from Vintageous.vi import api_calls
+
+    view = window.new_file()
+    view.set_scratch(True)
+    try:
+        replayer = Replayer(window, view, notation)
+        reset(view, replayer, text, operation.setup)
+
+        timings = []
+        calls = []
+        for i in range(repeat):
+            with api_calls.recording() as counter:
+                start = time.perf_counter()
+                replayer.replay(operation.keys)
+                timings.append(time.perf_counter() - start)
+            calls.append(counter.total)
+            if operation.edits:
+                reset(view, replayer, text, operation.setup)
+        return statistics.median(timings), statistics.median(calls)
+    finally:
+        view.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Measures keystroke latency on synthetic buffers.')
+    parser.add_argument('--lines', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--kind', choices=sorted(MAKERS), nargs='+',
+                        default=sorted(MAKERS))
+    parser.add_argument('--only', nargs='+', metavar='OPERATION',
+                        help='only run these operations')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--notation', action='store_true',
+                        help='replay keys through process_notation instead '
+                             'of one press_key per key')
+    args = parser.parse_args(argv)
+
+    runner.install()
+    import sublime
+    window = sublime.active_window()
+
+    operations = [op for op in OPERATIONS
+                  if not args.only or op.name in args.only]
+
+    header = '{0:<6} {1:>9}  {2:<14} {3:>12} {4:>12}'.format(
+        'buffer', 'lines', 'operation', 'median (ms)', 'API calls')
+    print(header)
+    print('-' * len(header))
+    for kind in args.kind:
+        for lines in args.lines:
+            text = MAKERS[kind](lines, random.Random(args.seed))
+            for op in operations:
+                seconds, calls = measure(window, text, op, args.repeat,
+                                         args.notation)
+                print('{0:<6} {1:>9}  {2:<14} {3:>12.3f} {4:>12.0f}'.format(
+                    kind, lines, op.name, seconds * 1000, calls))
+                sys.stdout.flush()
+
+    from Vintageous import LogSink
+    LogSink.stop()
+
+
+if __name__ == '__main__':
+    main()
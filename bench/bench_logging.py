@@ -0,0 +1,88 @@
+"""
+Measures what logging costs per keystroke when info/debug records are off.
+
+Compares building log messages eagerly with str.format() (what hot paths
+like PressKey.run used to do) against PluginLogger's lazy API.
+
+Runs outside Sublime Text:
+
+    python bench/bench_logging.py
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import timeit
+
+
+ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Log calls on the path of a single key press through PressKey, Mappings,
+# seq_to_command and State.eval, roughly.
+CALLS_PER_KEY = 25
+
+
+def load_package():
+    spec = importlib.util.spec_from_file_location(
+        'Vintageous', os.path.join(ROOT, '__init__.py'),
+        submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['Vintageous'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeState(object):
+    """
+    Stands in for State, whose properties read settings from the view.
+    """
+    @property
+    def sequence(self):
+        return '3d2w'
+
+    @property
+    def partial_sequence(self):
+        return 'w'
+
+
+def eager(logger, state):
+    for i in range(CALLS_PER_KEY):
+        logger.info("[PressKey] sequence {0} partial {1}".format(
+            state.sequence, state.partial_sequence))
+
+
+def lazy(logger, state):
+    for i in range(CALLS_PER_KEY):
+        logger.info(lambda: "[PressKey] sequence {0} partial {1}".format(
+            state.sequence, state.partial_sequence))
+
+
+def lazy_args(logger, state):
+    key = 'w'
+    for i in range(CALLS_PER_KEY):
+        logger.info('[PressKey] pressed: %s', key)
+
+
+def main(number=20000):
+    package = load_package()
+    logger = package.PluginLogger('Vintageous.bench')
+    logger.logger.setLevel(logging.ERROR)
+    state = FakeState()
+
+    print('{0} log calls per key, info level disabled'.format(CALLS_PER_KEY))
+    results = {}
+    for f in (eager, lazy, lazy_args):
+        t = min(timeit.repeat(lambda: f(logger, state), number=number,
+                              repeat=3))
+        results[f.__name__] = t / number * 1e6
+        print('{0:>10}: {1:8.2f} us/key'.format(f.__name__,
+                                               results[f.__name__]))
+    saved = results['eager'] - results['lazy']
+    print('saving with lazy messages: {0:.2f} us/key ({1:.0%})'.format(
+        saved, saved / results['eager']))
+    package.LogSink.stop()
+
+
+if __name__ == '__main__':
+    main()
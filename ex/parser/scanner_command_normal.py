@@ -0,0 +1,47 @@
+from Vintageous.ex.ex_error import ERR_INVALID_ARGUMENT
+from Vintageous.ex.ex_error import VimError
+
+from .state import EOF
+from .tokens import TokenEof
+from .tokens_base import TOKEN_COMMAND_NORMAL
+from .tokens_base import TokenOfCommand
+from Vintageous import ex
+
+
+@ex.command('normal', 'norm')
+class TokenCommandNormal(TokenOfCommand):
+    def __init__(self, params, *args, **kwargs):
+        super().__init__(params,
+                         TOKEN_COMMAND_NORMAL,
+                         'normal', *args, **kwargs)
+        self.addressable = True
+        self.cooperates_with_global = True
+        self.target_command = 'ex_normal'
+
+    def __str__(self):
+        return '{0}{1} {2}'.format(self.content, '!' if self.forced else '',
+                                   self.keys)
+
+    @property
+    def keys(self):
+        return self.params['keys']
+
+
+def scan_command_normal(state):
+    params = {
+        'keys': None,
+    }
+
+    c = state.consume()
+    bang = c == '!'
+    if not bang and c != EOF:
+        state.backup()
+
+    state.skip(' ')
+    state.ignore()
+
+    m = state.expect_match(r'(?P<keys>.+)$',
+        on_error=lambda: VimError(ERR_INVALID_ARGUMENT))
+    params.update(m.groupdict())
+
+    return None, [TokenCommandNormal(params, forced=bang), TokenEof()]
@@ -0,0 +1,51 @@
+from Vintageous.ex.ex_error import ERR_INVALID_ARGUMENT
+from Vintageous.ex.ex_error import VimError
+
+from .state import EOF
+from .tokens import TokenEof
+from .tokens_base import TOKEN_COMMAND_PROFILE
+from .tokens_base import TokenOfCommand
+from Vintageous import ex
+
+
+@ex.command('profile', 'prof')
+class TokenCommandProfile(TokenOfCommand):
+    def __init__(self, params, *args, **kwargs):
+        super().__init__(params,
+                         TOKEN_COMMAND_PROFILE,
+                         'profile', *args, **kwargs)
+        self.target_command = 'ex_profile'
+
+    @property
+    def action(self):
+        return self.params['action']
+
+    @property
+    def file_name(self):
+        return self.params['file_name']
+
+
+def scan_command_profile(state):
+    params = {
+        'action': None,
+        'file_name': None,
+    }
+
+    state.skip(' ')
+    state.ignore()
+
+    m = state.expect_match(r'(?P<action>start|stop)(?=\s|$)',
+        on_error=lambda: VimError(ERR_INVALID_ARGUMENT))
+    params.update(m.groupdict())
+
+    state.skip(' ')
+    state.ignore()
+
+    if params['action'] == 'start' and state.consume() != EOF:
+        state.backup()
+        m = state.match(r'(?P<file_name>.+?)\s*$')
+        params.update(m.groupdict())
+
+    state.expect(EOF, on_error=lambda: VimError(ERR_INVALID_ARGUMENT))
+
+    return None, [TokenCommandProfile(params), TokenEof()]
@@ -22,12 +22,14 @@ from .scanner_command_map import scan_command_map
 from .scanner_command_move import scan_command_move
 from .scanner_command_new import scan_command_new
 from .scanner_command_nmap import scan_command_nmap
+from .scanner_command_normal import scan_command_normal
 from .scanner_command_nunmap import scan_command_nunmap
 from .scanner_command_omap import scan_command_omap
 from .scanner_command_only import scan_command_only
 from .scanner_command_ounmap import scan_command_ounmap
 from .scanner_command_print import scan_command_print
 from .scanner_command_print_working_dir import scan_command_print_working_dir
+from .scanner_command_profile import scan_command_profile
 from .scanner_command_quit_all_command import scan_command_quit_all_command
 from .scanner_command_quit_command import scan_command_quit_command
 from .scanner_command_read_shell_out import scan_command_read_shell_out
@@ -81,12 +83,14 @@ patterns[r'm(?:ove)?(?=[^a]|$)'] = scan_command_move
 patterns[r'map'] = scan_command_map
 patterns[r'new'] = scan_command_new
 patterns[r'nm(?:ap)?'] = scan_command_nmap
+patterns[r'norm(?:al)?(?=[!\s]|$)'] = scan_command_normal
 patterns[r'nun(?:map)?'] = scan_command_nunmap
 patterns[r'om(?:ap)?'] = scan_command_omap
 patterns[r'on(?:ly)?(?=!$|$)'] = scan_command_only
 patterns[r'ounm(?:ap)?'] = scan_command_ounmap
 patterns[r'p(?:rint)?$'] = scan_command_print
 patterns[r'pwd?$'] = scan_command_print_working_dir
+patterns[r'prof(?:ile)?(?=\s|$)'] = scan_command_profile
 patterns[r'q(?!a)(?:uit)?'] = scan_command_quit_command
 patterns[r'qa(?:ll)?'] = scan_command_quit_all_command
 patterns[r'r(?!eg)(?:ead)?'] = scan_command_read_shell_out
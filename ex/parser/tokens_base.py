@@ -74,6 +74,8 @@ TOKEN_COMMAND_SET_LOCAL = 53
 TOKEN_COMMAND_SET = 54
 TOKEN_COMMAND_LET = 55
 TOKEN_COMMAND_WRITE_AND_QUIT_ALL = 56
+TOKEN_COMMAND_PROFILE = 57
+TOKEN_COMMAND_NORMAL = 58
 
 
 class Token(object):
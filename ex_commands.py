@@ -29,6 +29,7 @@ from Vintageous.ex.plat.windows import get_oem_cp
 from Vintageous.ex.plat.windows import get_startup_info
 from Vintageous.state import State
 from Vintageous.vi import abbrev
+from Vintageous.vi import profiler
 from Vintageous.vi import utils
 from Vintageous.vi.constants import MODE_NORMAL
 from Vintageous.vi.constants import MODE_VISUAL
@@ -41,6 +42,7 @@ from Vintageous.vi.settings import set_local
 from Vintageous.vi.sublime import has_dirty_buffers
 from Vintageous.vi.utils import adding_regions
 from Vintageous.vi.utils import first_sel
+from Vintageous.vi.utils import gluing_undo_groups
 from Vintageous.vi.utils import modes
 from Vintageous.vi.utils import R
 from Vintageous.vi.utils import resolve_insertion_point_at_b
@@ -1772,3 +1774,100 @@ class ExWriteAndQuitAll(ViWindowCommandBase):
 
         self.window.run_command('close_all')
         self.window.run_command('exit')
+
+
+class ExProfile(ViWindowCommandBase):
+    '''
+    Command: :prof[ile] start [{file}]
+             :prof[ile] stop
+
+    Vintageous-specific. Captures a cProfile of key processing and ex
+    commands between start and stop. Stats are written to {file} (relative
+    to the plugin log dir) or to a time-stamped `.prof` file.
+    '''
+
+    def run(self, command_line=''):
+        assert command_line, 'expected non-empty command line'
+
+        parsed = parse_command_line(command_line)
+
+        try:
+            if parsed.command.action == 'start':
+                path = profiler.start(parsed.command.file_name)
+                show_status('profiling to {0}'.format(path))
+            else:
+                path = profiler.stop()
+                show_status('profile written to {0}'.format(path))
+        except (ValueError, OSError) as e:
+            show_message(str(e), displays=Display.ALL)
+
+
+class ExNormal(ViWindowCommandBase):
+    '''
+    Command: :[range]norm[al][!] {commands}
+
+    http://vimdoc.sourceforge.net/htmldoc/various.html#:normal
+
+    Runs {commands} in normal mode once for every line in [range], or in the
+    current line, with the caret at the start of the line. Lines are tracked
+    with regions, so edits don't shift the lines still to be processed, and
+    deleted lines are skipped. All edits are grouped into one undo step.
+    '''
+
+    def run(self, command_line='', global_lines=None):
+        assert command_line, 'expected non-empty command line'
+
+        parsed = parse_command_line(command_line)
+
+        if global_lines:
+            lines = [R(a, b) for (a, b) in global_lines]
+        else:
+            r = parsed.line_range.resolve(self._view)
+            if r == R(-1, -1):
+                r = self._view.full_line(0)
+            first = row_at(self._view, r.begin())
+            last = row_at(self._view, max(r.begin(), r.end() - 1))
+            lines = [self._view.full_line(self._view.text_point(row, 0))
+                     for row in range(first, last + 1)]
+
+        # One region per line: Sublime Text adjusts it as the buffer changes
+        # and empties it if the line is deleted. Only the last line can be
+        # empty to begin with; that one is gone once it no longer starts a
+        # line.
+        keys = ['vi_ex_normal_{0}'.format(i) for i in range(len(lines))]
+        for key, line in zip(keys, lines):
+            self._view.add_regions(key, [line], '', '', sublime.HIDDEN)
+
+        state = self.state
+        try:
+            with gluing_undo_groups(self._view, state):
+                for key, line in zip(keys, lines):
+                    anchors = self._view.get_regions(key)
+                    self._view.erase_regions(key)
+                    if not self.is_line(anchors, was_empty=line.empty()):
+                        # The line has been deleted.
+                        continue
+                    self._view.sel().clear()
+                    self._view.sel().add(R(anchors[0].a))
+                    state.enter_normal_mode()
+                    state.reset_command_data()
+                    self.window.run_command('process_notation', {
+                        'keys': parsed.command.keys,
+                        'check_user_mappings': not parsed.command.forced})
+                    # An incomplete command is aborted, like if <Esc> were
+                    # pressed.
+                    if state.mode != modes.NORMAL:
+                        self.window.run_command('_enter_normal_mode',
+                                                {'mode': state.mode})
+                    state.glue_until_normal_mode = False
+                    state.reset_command_data()
+        finally:
+            for key in keys:
+                self._view.erase_regions(key)
+
+    def is_line(self, anchors, was_empty):
+        if not anchors:
+            return False
+        if not was_empty:
+            return not anchors[0].empty()
+        return self._view.line(anchors[0].a).a == anchors[0].a
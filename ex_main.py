@@ -16,6 +16,7 @@ from Vintageous.ex.ex_error import VimError
 from Vintageous.ex.parser.parser import parse_command_line
 from Vintageous.ex.parser.scanner_command_goto import TokenCommandGoto
 from Vintageous.state import State
+from Vintageous.vi import profiler
 from Vintageous.vi.settings import iter_settings
 from Vintageous.vi.sublime import show_ipanel
 from Vintageous.vi.utils import mark_as_widget
@@ -111,7 +112,8 @@ class ViColonInput(sublime_plugin.WindowCommand):
             if not parsed_new.command:
                 parsed_new.command = TokenCommandGoto()
 
-            self.window.run_command(parsed_new.command.target_command, {'command_line': cmd_line[1:]})
+            with profiler.profiling():
+                self.window.run_command(parsed_new.command.target_command, {'command_line': cmd_line[1:]})
             return
         except VimError as ve:
             # only new code emits VimErrors, so handle it.
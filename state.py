@@ -1,12 +1,19 @@
 from collections import Counter
+import copy
 
 import sublime
 
+from Vintageous import LogSink
 from Vintageous import PluginLogger
 from Vintageous import NullPluginLogger
+from Vintageous.vi import api_calls
 from Vintageous.vi import cmd_base
 from Vintageous.vi import cmd_defs
+from Vintageous.vi import latency
+from Vintageous.vi import repeat
+from Vintageous.vi import search
 from Vintageous.vi import settings
+from Vintageous.vi import status
 from Vintageous.vi import utils
 from Vintageous.vi.contexts import KeyContext
 from Vintageous.vi.dot_file import DotFile
@@ -45,7 +52,7 @@ def _init_vintageous(view, new_session=False):
     if not is_view(view):
         # Abort if we got a widget, panel...
         _logger.info(
-            '[_init_vintageous] ignoring view: {0}'.format(
+            lambda: '[_init_vintageous] ignoring view: {0}'.format(
                 view.name() or view.file_name() or '<???>'))
         try:
             # XXX: All this seems to be necessary here.
@@ -145,6 +152,8 @@ def plugin_unloaded():
         _logger.warn(
             'could not access sublime.active_window().active_view().settings '
             ' while unloading')
+    finally:
+        LogSink.stop()
 
 
 class State(object):
@@ -170,6 +179,38 @@ class State(object):
     context = KeyContext()
     variables = Variables()
     macro_steps = []
+    # Live command definitions indexed by view.id(), then by slot name
+    # ('action' or 'motion'). Each entry is a (serialized, instance) pair.
+    _live_commands = {}
+    # Long-lived State instances indexed by view.id().
+    _instances = {}
+
+    @staticmethod
+    def for_view(view):
+        """
+        Returns the long-lived `State` for @view, creating it if needed.
+
+        Prefer this over instantiating `State` in code that runs very often,
+        like keymap context queries.
+        """
+        try:
+            return State._instances[view.id()]
+        except KeyError:
+            state = State(view)
+            State._instances[view.id()] = state
+            return state
+
+    @staticmethod
+    def release(view):
+        """
+        Drops any per-view data held in memory for @view.
+        """
+        State._live_commands.pop(view.id(), None)
+        State._instances.pop(view.id(), None)
+        repeat.release(view)
+        search.release(view)
+        status.release(view)
+        KeyContext.release(view)
 
     def __init__(self, view):
         self.view = view
@@ -180,7 +221,7 @@ class State(object):
         self.settings = SettingsManager(self.view)
 
         _logger.debug(
-            '[State] Is .view an ST/Vintageous widget? {0}/{1}'.format(
+            lambda: '[State] Is .view an ST/Vintageous widget? {0}/{1}'.format(
                 bool(self.settings.view['is_widget']),
                 bool(self.settings.view['is_vintageous_widget']))
             )
@@ -371,34 +412,72 @@ class State(object):
     @mode.setter
     def mode(self, value):
         self.settings.vi['mode'] = value
+        # The change may not reach the view settings until later.
+        KeyContext.invalidate(self.view)
+
+    def _get_command(self, slot):
+        """
+        Returns the live command definition stored in @slot.
+
+        Command definitions are persisted in serialized form, but we keep the
+        deserialized instance around and only rebuild it when the serialized
+        data is no longer the same object we last saw.
+        """
+        serialized = self.settings.vi[slot] or None
+        if not serialized:
+            return None
+
+        live = State._live_commands.setdefault(self.view.id(), {})
+        try:
+            seen, instance = live[slot]
+            if seen is serialized:
+                return instance
+        except KeyError:
+            pass
+
+        instance = self._command_from_json(serialized)
+        live[slot] = (serialized, instance)
+        return instance
+
+    @staticmethod
+    def _command_from_json(serialized):
+        cls = getattr(cmd_defs, serialized['name'], None)
+        if cls is None:
+            cls = user_plugins.classes.get(serialized['name'], None)
+        if cls is None:
+            raise ValueError('unknown command: %s' % serialized)
+        return cls.from_json(serialized['data'])
+
+    def _set_command(self, slot, value):
+        serialized = value.serialize() if value else None
+        self.settings.vi[slot] = serialized
+        live = State._live_commands.setdefault(self.view.id(), {})
+        if value:
+            seen, cached = live.get(slot, (None, None))
+            # Keep a copy of our own. Callers may pass shared definitions,
+            # like those in vi/keys.py, and collecting input changes the
+            # command.
+            if value is not cached:
+                value = copy.copy(value)
+            live[slot] = (serialized, value)
+        else:
+            live.pop(slot, None)
 
     @property
     def action(self):
-        action = self.settings.vi['action'] or None
-        if action:
-            cls = getattr(cmd_defs, action['name'], None)
-            if cls is None:
-                cls = user_plugins.classes.get(action['name'], None)
-            if cls is None:
-                ValueError('unknown action: %s' % action)
-            return cls.from_json(action['data'])
+        return self._get_command('action')
 
     @action.setter
     def action(self, value):
-        serialized = value.serialize() if value else None
-        self.settings.vi['action'] = serialized
+        self._set_command('action', value)
 
     @property
     def motion(self):
-        motion = self.settings.vi['motion'] or None
-        if motion:
-            cls = getattr(cmd_defs, motion['name'])
-            return cls.from_json(motion['data'])
+        return self._get_command('motion')
 
     @motion.setter
     def motion(self, value):
-        serialized = value.serialize() if value else None
-        self.settings.vi['motion'] = serialized
+        self._set_command('motion', value)
 
     @property
     def motion_count(self):
@@ -433,7 +512,7 @@ class State(object):
     def repeat_data(self, value):
         assert isinstance(value, tuple) or isinstance(value, list), 'bad call'
         assert len(value) == 4, 'bad call'
-        self.logger.info("setting repeat data {0}".format(value))
+        self.logger.info('setting repeat data %s', value)
         self.settings.vi['repeat_data'] = value
 
     @property
@@ -494,7 +573,7 @@ class State(object):
     @register.setter
     def register(self, value):
         assert len(str(value)) == 1, '`value` must be a character'
-        self.logger.info('opening register {0}'.format(value))
+        self.logger.info('opening register %s', value)
         self.settings.vi['register'] = value
         self.must_capture_register_name = False
 
@@ -579,17 +658,18 @@ class State(object):
         self.must_capture_register_name = False
 
     def reset_status(self):
-        self.view.erase_status('vim-seq')
+        status.erase_status(self.view, 'vim-seq')
         if self.mode == modes.NORMAL:
-            self.view.erase_status('vim-mode')
+            status.erase_status(self.view, 'vim-mode')
 
     def display_status(self):
-        msg = "{0} {1}"
         mode_name = modes.to_friendly_name(self.mode)
         if mode_name:
             mode_name = '-- {0} --'.format(mode_name) if mode_name else ''
-            self.view.set_status('vim-mode', mode_name)
-        self.view.set_status('vim-seq', self.sequence)
+            status.set_status(self.view, 'vim-mode', mode_name)
+        # Any register and count typed so far are part of the sequence, so
+        # they are shown here too.
+        status.set_status(self.view, 'vim-seq', self.sequence)
 
     def must_scroll_into_view(self):
         return ((self.motion and self.motion.scroll_into_view) or
@@ -686,7 +766,7 @@ class State(object):
     def process_user_input2(self, key):
         assert self.must_collect_input, "call only if input is required"
 
-        _logger.info('[State] processing input {0}'.format(key))
+        _logger.info('[State] processing input %s', key)
 
         if self.motion and self.motion.accept_input:
             motion = self.motion
@@ -699,6 +779,33 @@ class State(object):
         self.action = action
         return val
 
+    def command_data(self):
+        """
+        Returns the data `eval()` builds a command from, in the form
+        `restore_command_data()` takes.
+        """
+        return (self.mode,
+                self.settings.vi['action'] or None,
+                self.settings.vi['motion'] or None,
+                self.action_count,
+                self.motion_count,
+                self.register,
+                self.sequence)
+
+    def restore_command_data(self, data):
+        """
+        Sets the command data to @data, as returned by `command_data()`.
+        """
+        (mode, action, motion, action_count, motion_count, register,
+         sequence) = data
+        self.mode = mode
+        self.action = action and self._command_from_json(action)
+        self.motion = motion and self._command_from_json(motion)
+        self.action_count = action_count
+        self.motion_count = motion_count
+        self.register = register
+        self.sequence = sequence
+
     def set_command(self, command):
         """
         Sets the current command to @command.
@@ -735,7 +842,7 @@ class State(object):
                 return
 
         else:
-            self.logger.info("[State] command: {0}".format(command))
+            self.logger.info('[State] command: %s', command)
             raise ValueError('unexpected command type')
 
     def in_any_visual_mode(self):
@@ -794,11 +901,11 @@ class State(object):
     def start_recording(self):
         self.is_recording = True
         State.macro_steps = []
-        self.view.set_status('vim-recorder', 'Recording...')
+        status.set_status(self.view, 'vim-recorder', 'Recording...')
 
     def stop_recording(self):
         self.is_recording = False
-        self.view.erase_status('vim-recorder')
+        status.erase_status(self.view, 'vim-recorder')
 
     def add_macro_step(self, cmd_name, args):
         if self.is_recording:
@@ -837,9 +944,15 @@ class State(object):
         """
         Run data as a command if possible.
         """
+        with latency.timing('State.eval'):
+            self._eval()
+
+    def _eval(self):
         if not self.runnable():
             return
 
+        repeat.record(repeat.COMMAND, self.command_data())
+
         if self.action and self.motion:
             action_cmd = self.action.translate(self)
             motion_cmd = self.motion.translate(self)
@@ -861,7 +974,7 @@ class State(object):
             # we don't need to worry about grouping edits to the buffer.
             args['motion'] = motion_cmd
             self.logger.info(
-                '[Stage] motion in motion+action: {0}'.format(motion_cmd))
+                '[Stage] motion in motion+action: %s', motion_cmd)
 
             if self.glue_until_normal_mode and not self.processing_notation:
                 # We need to tell Sublime Text now that it should group
@@ -871,7 +984,9 @@ class State(object):
 
             self.add_macro_step(action_cmd['action'], args)
 
-            sublime.active_window().run_command(action_cmd['action'], args)
+            with latency.timing(action_cmd['action']), \
+                 api_calls.counting(action_cmd['action']):
+                sublime.active_window().run_command(action_cmd['action'], args)
             if not self.non_interactive:
                 if self.action.repeatable:
                     self.repeat_data = ('vi', str(self.sequence),
@@ -882,19 +997,21 @@ class State(object):
         if self.motion:
             motion_cmd = self.motion.translate(self)
             self.logger.info(
-                '[State] lone motion cmd: {0}'.format(motion_cmd))
+                '[State] lone motion cmd: %s', motion_cmd)
 
             self.add_macro_step(motion_cmd['motion'],
                                 motion_cmd['motion_args'])
 
             # We know that all motions are subclasses of ViTextCommandBase,
             # so it's safe to call them from the current view.
-            self.view.run_command(motion_cmd['motion'],
-                                  motion_cmd['motion_args'])
+            with latency.timing(motion_cmd['motion']), \
+                 api_calls.counting(motion_cmd['motion']):
+                self.view.run_command(motion_cmd['motion'],
+                                      motion_cmd['motion_args'])
 
         if self.action:
             action_cmd = self.action.translate(self)
-            self.logger.info('[Stage] lone action cmd '.format(action_cmd))
+            self.logger.info('[Stage] lone action cmd %s', action_cmd)
             if self.mode == modes.NORMAL:
                 self.logger.info(
                     '[State] switching to internal normal mode')
@@ -923,8 +1040,10 @@ class State(object):
             self.add_macro_step(action_cmd['action'],
                                 action_cmd['action_args'])
 
-            sublime.active_window().run_command(action_cmd['action'],
-                                                action_cmd['action_args'])
+            with latency.timing(action_cmd['action']), \
+                 api_calls.counting(action_cmd['action']):
+                sublime.active_window().run_command(action_cmd['action'],
+                                                    action_cmd['action_args'])
 
             if not (self.processing_notation and self.glue_until_normal_mode):
                 if action.repeatable:
@@ -932,8 +1051,8 @@ class State(object):
                                         visual_repeat_data)
 
         self.logger.info(
-            'running command: action: {0} motion: {1}'.format(self.action,
-                                                              self.motion))
+            lambda: 'running command: action: {0} motion: {1}'.format(
+                self.action, self.motion))
 
         if self.mode == modes.INTERNAL_NORMAL:
             self.enter_normal_mode()
@@ -152,6 +152,22 @@ class ViCmdTest (object):
 
         runner.assertEqual(list(view.sel()), after_sels, self.message)
 
+
+def iter_tests_in_file(spec_path):
+    '''
+    Yields the `ViCmdTest`s declared in the spec file at @spec_path.
+    '''
+    spec_path = os.path.abspath(spec_path)
+    content = None
+    with open(spec_path, 'rt') as f:
+        content = f.read()
+    tests = content.split(TEST_DELIM)
+    for i, test in enumerate(tests):
+        if not test:
+            continue
+        yield ViCmdTest.from_text(test, spec_path, i)
+
+
 class ViCmdTester (unittest.TestCase):
     '''
     Runs tests based in cmd-test spec files (cmd-test).
@@ -181,15 +197,7 @@ class ViCmdTester (unittest.TestCase):
     def iter_tests(self):
         specs = self.get_motion_tests() + self.get_action_tests()
         for spec_path in specs:
-            spec_path = os.path.abspath(spec_path)
-            content = None
-            with open(spec_path, 'rt') as f:
-                content = f.read()
-            tests = content.split(TEST_DELIM)
-            for i, test in enumerate(tests):
-                if not test:
-                    continue
-                yield ViCmdTest.from_text(test, spec_path, i)
+            yield from iter_tests_in_file(spec_path)
 
     def append(self, text):
         self.view.run_command('append', {'characters': text})
@@ -1,3 +1,4 @@
+from Vintageous.vi.search import REVERSE_SEARCH_CHUNK_SIZE
 from Vintageous.vi.utils import modes
 
 from Vintageous.tests import add_sel
@@ -73,3 +74,13 @@ class Test_vi_question_mark_InNormalMode(ViewTest):
 
         self.view.run_command('_vi_question_mark_impl', {'mode': modes.NORMAL, 'search_string': 'abc'})
         self.assertEqual(self.R(20, 20), first_sel(self.view))
+
+    def testSearchBufferStart(self):
+        # The last chunk of text searched backwards starts at the second "foo",
+        # where Python would match \A.
+        self.write('foo\nfoo' + 'x' * REVERSE_SEARCH_CHUNK_SIZE + '\nend')
+        self.clear_sel()
+        self.add_sel(self.R(self.view.size() - 1, self.view.size() - 1))
+
+        self.view.run_command('_vi_question_mark_impl', {'mode': modes.NORMAL, 'search_string': r'\Afoo'})
+        self.assertEqual(self.R(0, 0), first_sel(self.view))
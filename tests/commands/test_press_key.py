@@ -0,0 +1,144 @@
+"""
+Tests for PressKey.
+"""
+
+import unittest
+
+import sublime
+
+from Vintageous.vi.mappings import Mappings
+from Vintageous.vi.utils import modes
+
+from Vintageous.tests import first_sel
+from Vintageous.tests import ViewTest
+
+
+class Test_MappingTimeout(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+        self.mappings = Mappings(self.state)
+        self.mappings.add(modes.NORMAL, 'lzz', 'dd')
+        self.write('abc\nxyz')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+    def tearDown(self):
+        self.mappings.remove(modes.NORMAL, 'lzz')
+        self.view.settings().erase('vintageous_timeout')
+        self.view.settings().erase('vintageous_timeoutlen')
+        super().tearDown()
+
+    def press(self, keys):
+        for key in keys:
+            self.view.window().run_command('press_key', {'key': key})
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testWaitsForRestOfMapping(self):
+        self.press('l')
+        sublime.advance_time(999)
+
+        self.assertEqual('l', self.state.sequence)
+        self.assertEqual(self.R(0, 0), first_sel(self.view))
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testRunsPendingKeysOnTimeout(self):
+        self.press('l')
+        sublime.advance_time(1000)
+
+        self.assertEqual('', self.state.sequence)
+        self.assertEqual(self.R(1, 1), first_sel(self.view))
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testKeepsCountOnTimeout(self):
+        self.press('2l')
+        sublime.advance_time(1000)
+
+        self.assertEqual(self.R(2, 2), first_sel(self.view))
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testRunsMappingCompletedInTime(self):
+        self.press('lz')
+        sublime.advance_time(500)
+        self.press('z')
+        sublime.advance_time(1000)
+
+        self.assertEqual('xyz', self.get_all_text())
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testCanChangeTimeoutLength(self):
+        self.view.settings().set('vintageous_timeoutlen', 100)
+
+        self.press('l')
+        sublime.advance_time(100)
+
+        self.assertEqual(self.R(1, 1), first_sel(self.view))
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testCanDisableTimeout(self):
+        self.view.settings().set('vintageous_timeout', False)
+
+        self.press('l')
+        sublime.advance_time(5000)
+
+        self.assertEqual('l', self.state.sequence)
+        self.assertEqual(self.R(0, 0), first_sel(self.view))
+
+    def testRunsOtherKeysPressedAfterPendingKeys(self):
+        self.press('lj')
+
+        self.assertEqual('', self.state.sequence)
+        self.assertEqual(self.R(5, 5), first_sel(self.view))
+
+
+class Test_AmbiguousMapping(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+        self.mappings = Mappings(self.state)
+        self.mappings.add(modes.NORMAL, ',a', 'l')
+        self.mappings.add(modes.NORMAL, ',abc', 'dd')
+        self.mappings.add(modes.NORMAL, 'b', 'x')
+        self.write('abc\nxyz')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+    def tearDown(self):
+        self.mappings.remove(modes.NORMAL, ',a')
+        self.mappings.remove(modes.NORMAL, ',abc')
+        self.mappings.remove(modes.NORMAL, 'b')
+        super().tearDown()
+
+    def press(self, keys):
+        for key in keys:
+            self.view.window().run_command('press_key', {'key': key})
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testWaitsForLongerMapping(self):
+        self.press(',a')
+        sublime.advance_time(999)
+
+        self.assertEqual(',a', self.state.sequence)
+        self.assertEqual(self.R(0, 0), first_sel(self.view))
+
+    def testRunsLongerMapping(self):
+        self.press(',abc')
+
+        self.assertEqual('xyz', self.get_all_text())
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testRunsLongestMappingThenRemapsRestOnTimeout(self):
+        self.press(',ab')
+        sublime.advance_time(1000)
+
+        self.assertEqual('ac\nxyz', self.get_all_text())
+        self.assertEqual('', self.state.sequence)
+
+    def testRunsLongestMappingWhenLongerOneCantMatch(self):
+        self.press(',ab')
+        self.press('h')
+
+        self.assertEqual('ac\nxyz', self.get_all_text())
+        self.assertEqual(self.R(0, 0), first_sel(self.view))
@@ -0,0 +1,93 @@
+"""
+Tests for ProcessNotation.
+"""
+
+from Vintageous.vi.utils import modes
+
+from Vintageous.tests import first_sel
+from Vintageous.tests import ViewTest
+
+
+class Test_ProcessNotation(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+
+    def run_keys(self, keys):
+        self.view.window().run_command('process_notation', {'keys': keys})
+
+    def testCanRunMotions(self):
+        self.write('abc def\nxyz')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_keys('wj')
+
+        self.assertEqual(self.R((1, 2), (1, 2)), first_sel(self.view))
+
+    def testCanInsertText(self):
+        self.write('abc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_keys('ifoo<lt>bar<Esc>')
+
+        self.assertEqual('foo<barabc', self.get_all_text())
+        self.assertEqual(modes.NORMAL, self.state.mode)
+
+    def testCanRunCommandsAfterInsertingText(self):
+        self.write('abc\nxyz')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_keys('Ax<Esc>jA<space>y<Esc>')
+
+        self.assertEqual('abcx\nxyz y', self.get_all_text())
+        self.assertEqual(modes.NORMAL, self.state.mode)
+
+    def testLeavesInsertModeOpen(self):
+        self.write('abc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_keys('ccxy')
+
+        self.assertEqual('xy', self.get_all_text())
+        self.assertEqual(modes.INSERT, self.state.mode)
+
+    def testRepeatsTextTypedAfterCount(self):
+        self.write('abc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_keys('3ifoo<Esc>')
+
+        self.assertEqual('foofoofooabc', self.get_all_text())
+        self.assertEqual(modes.NORMAL, self.state.mode)
+        self.assertEqual('1', self.state.normal_insert_count)
+
+
+class Test_enter_normal_mode(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+
+    def type(self, keys, text):
+        for key in keys:
+            self.view.window().run_command('press_key', {'key': key})
+        for c in text:
+            self.view.window().run_command('insert', {'characters': c})
+        self.view.window().run_command('press_key', {'key': '<esc>'})
+
+    def testRepeatsTextTypedAfterCount(self):
+        self.write('abc\nabc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+        self.add_sel(self.R((1, 0), (1, 0)))
+
+        self.type('4i', 'xy')
+
+        self.assertEqual('xyxyxyxyabc\nxyxyxyxyabc', self.get_all_text())
+        self.assertEqual(modes.NORMAL, self.state.mode)
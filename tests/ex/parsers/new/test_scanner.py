@@ -1,6 +1,9 @@
 import unittest
 
+from Vintageous.ex.ex_error import VimError
 from Vintageous.ex.parser.scanner import Scanner
+from Vintageous.ex.parser.scanner_command_normal import TokenCommandNormal
+from Vintageous.ex.parser.scanner_command_profile import TokenCommandProfile
 from Vintageous.ex.parser.scanner_command_substitute import TokenCommandSubstitute
 from Vintageous.ex.parser.scanner_command_write import TokenCommandWrite
 from Vintageous.ex.parser.state import EOF
@@ -134,6 +137,49 @@ class ScannerCommandNameTests(unittest.TestCase):
         self.assertEqual([TokenPercent(), TokenCommandSubstitute(params), TokenEof()], tokens)
 
 
+class ScannerProfileCommand_Tests(unittest.TestCase):
+    def testCanScanStart(self):
+        scanner = Scanner('profile start')
+        tokens = list(scanner.scan())
+        params = {'action': 'start', 'file_name': None}
+        self.assertEqual([TokenCommandProfile(params), TokenEof()], tokens)
+
+    def testCanScanStartWithFileName(self):
+        scanner = Scanner('prof start foo.prof')
+        tokens = list(scanner.scan())
+        params = {'action': 'start', 'file_name': 'foo.prof'}
+        self.assertEqual([TokenCommandProfile(params), TokenEof()], tokens)
+
+    def testCanScanStop(self):
+        scanner = Scanner('profile stop')
+        tokens = list(scanner.scan())
+        params = {'action': 'stop', 'file_name': None}
+        self.assertEqual([TokenCommandProfile(params), TokenEof()], tokens)
+
+    def testScanFailsIfActionIsUnknown(self):
+        scanner = Scanner('profile pause')
+        self.assertRaises(VimError, lambda: list(scanner.scan()))
+
+
+class ScannerNormalCommand_Tests(unittest.TestCase):
+    def testCanScanKeys(self):
+        scanner = Scanner('normal A;<Esc>')
+        tokens = list(scanner.scan())
+        params = {'keys': 'A;<Esc>'}
+        self.assertEqual([TokenCommandNormal(params), TokenEof()], tokens)
+
+    def testCanScanAbbreviationWithBang(self):
+        scanner = Scanner('norm! dd')
+        tokens = list(scanner.scan())
+        params = {'keys': 'dd'}
+        self.assertEqual([TokenCommandNormal(params, forced=True), TokenEof()], tokens)
+        self.assertEqual('normal! dd', str(tokens[0]))
+
+    def testScanFailsWithoutKeys(self):
+        scanner = Scanner('normal')
+        self.assertRaises(VimError, lambda: list(scanner.scan()))
+
+
 class ScannerMarksScanner_Tests(unittest.TestCase):
     def testCanInstantiate(self):
         scanner = Scanner("'a")
@@ -0,0 +1,69 @@
+from Vintageous.vi.utils import modes
+
+from Vintageous.tests import ViewTest
+
+
+class Test_ex_normal(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+
+    def run_ex(self, command_line):
+        self.view.window().run_command('ex_normal', {'command_line': command_line})
+
+    def testRunsKeysOnCurrentLine(self):
+        self.write('abc\nabc\nabc')
+        self.clear_sel()
+        self.add_sel(self.R((1, 2), (1, 2)))
+
+        self.run_ex('normal Ax')
+
+        self.assertEqual('abc\nabcx\nabc', self.get_all_text())
+        self.assertEqual(modes.NORMAL, self.state.mode)
+
+    def testRunsKeysOnEveryLineInRange(self):
+        self.write('abc\nabc\nabc\nabc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_ex('2,$normal ix<Esc>')
+
+        self.assertEqual('abc\nxabc\nxabc\nxabc', self.get_all_text())
+
+    def testTracksLinesAcrossDeletions(self):
+        self.write('a\nb\nc\nd\ne\nf')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_ex('%normal jdd')
+
+        self.assertEqual('a\nc\ne', self.get_all_text())
+
+    def testRunsKeysOnEmptyLastLine(self):
+        self.write('abc\n')
+        self.clear_sel()
+        self.add_sel(self.R(4, 4))
+
+        self.run_ex('normal ix')
+
+        self.assertEqual('abc\nx', self.get_all_text())
+
+    def testCanRunOnGlobalLines(self):
+        self.write('a1\nb2\na3\nb4\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.view.window().run_command('ex_global', {'command_line': 'g/a/normal A;'})
+
+        self.assertEqual('a1;\nb2\na3;\nb4\n', self.get_all_text())
+
+    def testUndoesAllLinesAtOnce(self):
+        self.write('abc\nabc\nabc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.run_ex('%normal Ax')
+        self.view.run_command('undo')
+
+        self.assertEqual('abc\nabc\nabc', self.get_all_text())
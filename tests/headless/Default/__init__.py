@@ -0,0 +1,3 @@
+"""
+Stand-in for the parts of Sublime Text's Default package Vintageous uses.
+"""
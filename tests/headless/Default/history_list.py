@@ -0,0 +1,24 @@
+"""
+Stand-in for Default/history_list.py.
+"""
+
+
+class JumpHistory(object):
+    def __init__(self):
+        self.history_list = []
+        self.current_item = -1
+
+    def push_selection(self, view):
+        self.history_list.append((view.id(), [(r.a, r.b) for r in view.sel()]))
+        self.current_item = -1
+
+
+_histories = {}
+
+
+def get_jump_history(window_id):
+    try:
+        return _histories[window_id]
+    except KeyError:
+        history = _histories[window_id] = JumpHistory()
+        return history
@@ -0,0 +1,399 @@
+"""
+Runs Vintageous and its tests under plain CPython, without Sublime Text.
+
+The `sublime` and `sublime_plugin` modules in this directory stand in for
+Sublime Text's own. `install()` puts them in place, imports the package as
+`Vintageous` and loads its plugins like Sublime Text's plugin host would.
+
+Usage:
+
+    python tests/headless/runner.py [-p PATTERN] [-v] [-j JOBS] [--junit-xml PATH]
+
+With -j or --junit-xml, test modules and .cmd-test/.motion-test files are
+sharded across a pool of worker processes, each running its own copy of the
+fake API, and every command test is reported as a test case of its own.
+
+Benchmarks and other scripts can call `install()` themselves:
+
+    sys.path.insert(0, os.path.join(ROOT, 'tests', 'headless'))
+    import runner
+    runner.install()
+"""
+
+from collections import namedtuple
+from xml.etree import ElementTree
+import argparse
+import atexit
+import fnmatch
+import glob
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+import unittest
+
+
+THIS_DIR = os.path.abspath(os.path.dirname(__file__))
+ROOT = os.path.dirname(os.path.dirname(THIS_DIR))
+PACKAGE = 'Vintageous'
+
+_top_level_dir = None
+
+
+def _make_top_level_dir():
+    # unittest discovery needs a directory that contains the package under
+    # its real name.
+    if os.path.basename(ROOT) == PACKAGE:
+        return os.path.dirname(ROOT)
+    top = tempfile.mkdtemp(prefix='vintageous-headless-')
+    atexit.register(shutil.rmtree, top, True)
+    os.symlink(ROOT, os.path.join(top, PACKAGE))
+    return top
+
+
+def plugin_modules():
+    """
+    Returns the names of the package's plugins, in the order Sublime Text
+    loads them.
+    """
+    names = []
+    for path in sorted(glob.glob(os.path.join(ROOT, '*.py'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name != '__init__':
+            names.append(PACKAGE + '.' + name)
+    return names
+
+
+def install(top_level_dir=None):
+    """
+    Makes the fake Sublime Text API and the package importable and loads the
+    package's plugins. Returns the path of the directory that contains the
+    package.
+
+    @top_level_dir
+      Directory that already contains the package; one is created if not
+      given.
+    """
+    global _top_level_dir
+
+    if _top_level_dir is not None:
+        return _top_level_dir
+
+    if THIS_DIR not in sys.path:
+        sys.path.insert(0, THIS_DIR)
+
+    import sublime
+    import sublime_plugin
+
+    _top_level_dir = top_level_dir or _make_top_level_dir()
+    sys.path.insert(0, _top_level_dir)
+
+    # Sublime Text always has a view open.
+    sublime.active_window().new_file()
+
+    modules = [importlib.import_module(name) for name in plugin_modules()]
+    for module in modules:
+        sublime_plugin.load_module(module)
+    for module in modules:
+        if hasattr(module, 'plugin_loaded'):
+            module.plugin_loaded()
+    return _top_level_dir
+
+
+# A unit of work for a worker: a test module (kind 'module', dotted name) or
+# a command test spec file (kind 'spec', path).
+Unit = namedtuple('Unit', 'kind name')
+
+# Outcome of a single test. `outcome` is one of 'passed', 'failure', 'error'
+# or 'skipped'; `message` holds the traceback or the reason for skipping.
+CaseResult = namedtuple('CaseResult', 'classname name time outcome message')
+
+# The module that runs all command test specs in one go inside Sublime Text.
+# Its specs are sharded one file per unit instead.
+CMD_TESTS_MODULE = PACKAGE + '.tests.commands.test_all_cmds'
+CMD_TESTS_DIR = os.path.join(ROOT, 'tests', 'commands')
+
+
+def _test_modules(pattern):
+    # Same rules as unittest discovery: only packages are searched, and only
+    # files whose names are valid identifiers are imported.
+    names = []
+    tests_dir = os.path.join(ROOT, 'tests')
+    for dirpath, dirnames, filenames in os.walk(tests_dir):
+        dirnames[:] = sorted(d for d in dirnames if os.path.isfile(
+            os.path.join(dirpath, d, '__init__.py')))
+        if not os.path.isfile(os.path.join(dirpath, '__init__.py')):
+            dirnames[:] = []
+            continue
+        package = os.path.relpath(dirpath, ROOT).replace(os.sep, '.')
+        for filename in sorted(filenames):
+            name, ext = os.path.splitext(filename)
+            if (ext == '.py' and name.isidentifier() and
+                    fnmatch.fnmatch(filename, pattern)):
+                names.append('.'.join((PACKAGE, package, name)))
+    return names
+
+
+def _spec_files():
+    # Mirrors ViCmdTester.get_tests(): a -solo file hides its siblings.
+    specs = []
+    for ext in ('*.motion-test', '*.cmd-test'):
+        solo = glob.glob(os.path.join(CMD_TESTS_DIR, ext + '-solo'))
+        specs.extend(solo[0:1] or
+                     sorted(glob.glob(os.path.join(CMD_TESTS_DIR, ext))))
+    return specs
+
+
+def collect_units(pattern='test*.py'):
+    """
+    Returns the `Unit`s whose file names match @pattern. Command test specs
+    are included if the module that runs them matches.
+    """
+    units = []
+    for name in _test_modules(pattern):
+        if name == CMD_TESTS_MODULE:
+            units.extend(Unit('spec', path) for path in _spec_files())
+        else:
+            units.append(Unit('module', name))
+    return units
+
+
+class RecordingResult(unittest.TestResult):
+    """
+    Collects a `CaseResult` for every test run.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cases = []
+        self._started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def _record(self, test, outcome, message=''):
+        classname, _, name = test.id().rpartition('.')
+        elapsed = time.perf_counter() - (self._started or time.perf_counter())
+        self.cases.append(CaseResult(classname, name, elapsed, outcome,
+                                     message))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, 'passed')
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, 'failure', self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, 'error', self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, 'skipped', reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, 'passed')
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, 'failure', 'unexpected success')
+
+
+def _spec_suite(path):
+    from Vintageous.tests.cmd_tester import iter_tests_in_file
+    from Vintageous.tests.cmd_tester import ViCmdTester
+
+    class SpecTest(ViCmdTester):
+        def __init__(self, test):
+            super().__init__()
+            self.test = test
+
+        def id(self):
+            return '{0}.{1}.test_{2}'.format(
+                CMD_TESTS_MODULE, os.path.basename(self.test.file_name),
+                self.test.test_nr)
+
+        def shortDescription(self):
+            return self.test.description.strip() or None
+
+        def runTest(self):
+            self.reset()
+            try:
+                self.test.run_with(self)
+            finally:
+                self.view.close()
+
+    return unittest.TestSuite(SpecTest(t) for t in iter_tests_in_file(path))
+
+
+def run_unit(unit):
+    """
+    Runs the tests in @unit and returns (unit, [CaseResult]).
+    """
+    install()
+    result = RecordingResult()
+    try:
+        if unit.kind == 'spec':
+            suite = _spec_suite(unit.name)
+        else:
+            suite = unittest.TestLoader().loadTestsFromName(unit.name)
+    except Exception:
+        return unit, [CaseResult(unit.name, 'load', 0.0, 'error',
+                                 traceback.format_exc())]
+    suite.run(result)
+    return unit, result.cases
+
+
+def _unit_label(unit):
+    if unit.kind == 'spec':
+        return '{0}.{1}'.format(CMD_TESTS_MODULE, os.path.basename(unit.name))
+    return unit.name
+
+
+def write_junit_xml(path, results, elapsed):
+    """
+    Writes @results, a list of (unit, [CaseResult]), as JUnit XML to @path.
+    """
+    root = ElementTree.Element('testsuites', name=PACKAGE,
+                               time='{0:.3f}'.format(elapsed))
+    totals = dict.fromkeys(('tests', 'failures', 'errors', 'skipped'), 0)
+    for unit, cases in results:
+        counts = {
+            'tests': len(cases),
+            'failures': sum(c.outcome == 'failure' for c in cases),
+            'errors': sum(c.outcome == 'error' for c in cases),
+            'skipped': sum(c.outcome == 'skipped' for c in cases),
+        }
+        for key, value in counts.items():
+            totals[key] += value
+        suite = ElementTree.SubElement(
+            root, 'testsuite', name=_unit_label(unit),
+            time='{0:.3f}'.format(sum(c.time for c in cases)),
+            **{k: str(v) for k, v in counts.items()})
+        for case in cases:
+            element = ElementTree.SubElement(
+                suite, 'testcase', classname=case.classname, name=case.name,
+                time='{0:.3f}'.format(case.time))
+            if case.outcome == 'passed':
+                continue
+            child = ElementTree.SubElement(
+                element, case.outcome,
+                message=(case.message.strip().splitlines() or [''])[-1])
+            if case.outcome != 'skipped':
+                child.text = case.message
+    for key, value in totals.items():
+        root.set(key, str(value))
+    ElementTree.ElementTree(root).write(path, encoding='utf-8',
+                                        xml_declaration=True)
+
+
+_MARKS = {'passed': '.', 'failure': 'F', 'error': 'E', 'skipped': 's'}
+
+
+def run_sharded(pattern, jobs, junit_xml=None, verbose=False):
+    """
+    Runs the tests matching @pattern on @jobs worker processes. Returns the
+    exit status.
+    """
+    units = collect_units(pattern)
+    # Workers share the parent's symlinked package instead of making their
+    # own, so that tracebacks point at the same paths.
+    top = _make_top_level_dir()
+    start = time.perf_counter()
+
+    results = []
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, initializer=install,
+                                    initargs=(top,))
+        try:
+            for unit, cases in pool.imap_unordered(run_unit, units):
+                results.append((unit, cases))
+                _report_progress(unit, cases, verbose)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        install(top)
+        for unit in units:
+            unit, cases = run_unit(unit)
+            results.append((unit, cases))
+            _report_progress(unit, cases, verbose)
+
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: _unit_label(r[0]))
+    cases = [c for unit, unit_cases in results for c in unit_cases]
+    bad = [c for c in cases if c.outcome in ('failure', 'error')]
+
+    if not verbose:
+        print()
+    for case in bad:
+        print('=' * 70)
+        print('{0}: {1} ({2})'.format(case.outcome.upper(), case.name,
+                                      case.classname))
+        print('-' * 70)
+        print(case.message)
+    print('-' * 70)
+    print('Ran {0} tests in {1:.3f}s ({2} jobs)'.format(len(cases), elapsed,
+                                                        jobs))
+    print()
+    counts = ['{0}={1}'.format(outcome, n) for outcome, n in (
+        ('failures', sum(c.outcome == 'failure' for c in cases)),
+        ('errors', sum(c.outcome == 'error' for c in cases)),
+        ('skipped', sum(c.outcome == 'skipped' for c in cases))) if n]
+    status = 'FAILED' if bad else 'OK'
+    if counts:
+        status += ' ({0})'.format(', '.join(counts))
+    print(status)
+
+    if junit_xml:
+        write_junit_xml(junit_xml, results, elapsed)
+    return 1 if bad else 0
+
+
+def _report_progress(unit, cases, verbose):
+    if verbose:
+        for case in cases:
+            print('{0} ({1}) ... {2}'.format(case.name, case.classname,
+                                             case.outcome))
+    else:
+        sys.stdout.write(''.join(_MARKS[c.outcome] for c in cases))
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Runs the Vintageous tests without Sublime Text.')
+    parser.add_argument('-p', '--pattern', default='test*.py',
+                        help='only run test files matching this glob')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='run tests on this many worker processes '
+                             '(0: one per CPU)')
+    parser.add_argument('--junit-xml', metavar='PATH',
+                        help='write the results as JUnit XML to this file')
+    args = parser.parse_args(argv)
+
+    if args.jobs is not None or args.junit_xml:
+        jobs = args.jobs or multiprocessing.cpu_count()
+        return run_sharded(args.pattern, jobs, args.junit_xml, args.verbose)
+
+    top = install()
+    suite = unittest.TestLoader().discover(
+        os.path.join(top, PACKAGE, 'tests'), pattern=args.pattern,
+        top_level_dir=top)
+    result = unittest.TextTestRunner(
+        verbosity=2 if args.verbose else 1).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1418 @@
+"""
+In-memory stand-in for the parts of the `sublime` module Vintageous uses.
+
+Lets motions, actions, ex commands and their tests run under plain CPython.
+Text is kept in a single string; regions (selections included) are adjusted
+on every edit the way Sublime Text adjusts them. Layout is approximated by
+treating every character as one em wide and every line as one unit tall.
+
+Don't import this module directly; see runner.py.
+"""
+
+from collections import OrderedDict
+from bisect import bisect_right
+import copy
+import re
+import sys
+import tempfile
+import traceback
+
+
+LITERAL = 1
+IGNORECASE = 2
+
+CLASS_WORD_START = 1
+CLASS_WORD_END = 2
+CLASS_PUNCTUATION_START = 4
+CLASS_PUNCTUATION_END = 8
+CLASS_SUB_WORD_START = 16
+CLASS_SUB_WORD_END = 32
+CLASS_LINE_START = 64
+CLASS_LINE_END = 128
+CLASS_EMPTY_LINE = 256
+
+OP_EQUAL = 0
+OP_NOT_EQUAL = 1
+OP_REGEX_MATCH = 2
+OP_NOT_REGEX_MATCH = 3
+OP_REGEX_CONTAINS = 4
+OP_NOT_REGEX_CONTAINS = 5
+
+ENCODED_POSITION = 1
+TRANSIENT = 4
+FORCE_GROUP = 8
+
+MONOSPACE_FONT = 1
+KEEP_OPEN_ON_FOCUS_LOST = 2
+
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+PERSISTENT = 16
+DRAW_OUTLINED = 32
+DRAW_NO_FILL = 32
+HIDDEN = 128
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+
+DIALOG_CANCEL = 0
+DIALOG_YES = 1
+DIALOG_NO = 2
+
+DEFAULT_WORD_SEPARATORS = "./\\()\"'-:,.;<>~!@#$%^&*|+=[]{}`~?"
+
+# Sublime Text's defaults for the settings Vintageous reads.
+DEFAULT_PREFERENCES = {
+    'auto_indent': True,
+    'tab_size': 4,
+    'translate_tabs_to_spaces': False,
+    'word_separators': DEFAULT_WORD_SEPARATORS,
+}
+
+
+def version():
+    return '3000'
+
+
+def platform():
+    return {'win32': 'windows', 'darwin': 'osx'}.get(sys.platform, 'linux')
+
+
+def arch():
+    return 'x64'
+
+
+_packages_path = tempfile.gettempdir()
+
+
+def packages_path():
+    return _packages_path
+
+
+def installed_packages_path():
+    return _packages_path
+
+
+def status_message(message):
+    _app.status = message
+
+
+def error_message(message):
+    _app.status = message
+
+
+def message_dialog(message):
+    pass
+
+
+def ok_cancel_dialog(message, ok_title=''):
+    return True
+
+
+def yes_no_cancel_dialog(message, yes_title='', no_title=''):
+    return DIALOG_YES
+
+
+def set_clipboard(text):
+    _app.clipboard = text
+
+
+def get_clipboard(size_limit=16777216):
+    return _app.clipboard
+
+
+def set_timeout(callback, delay=0):
+    # Callbacks run once the command that scheduled them has returned, like
+    # they would on Sublime Text's main thread, and once @delay milliseconds
+    # have passed on the virtual clock moved by `advance_time()`.
+    _app.timeouts.append((_app.clock + max(delay, 0), callback))
+    if not _app.command_depth:
+        run_timeouts()
+
+
+set_timeout_async = set_timeout
+
+
+def run_timeouts():
+    """
+    Runs pending `set_timeout` callbacks that are due. Not part of the
+    Sublime Text API.
+    """
+    while True:
+        due = [t for t in _app.timeouts if t[0] <= _app.clock]
+        if not due:
+            return
+        _app.timeouts.remove(due[0])
+        _call_safely(due[0][1])
+
+
+def advance_time(ms):
+    """
+    Moves the virtual clock used by `set_timeout` @ms milliseconds forward
+    and runs the callbacks that are then due. Not part of the Sublime Text
+    API.
+    """
+    _app.clock += ms
+    if not _app.command_depth:
+        run_timeouts()
+
+
+def load_settings(base_name):
+    try:
+        return _app.settings[base_name]
+    except KeyError:
+        settings = _app.settings[base_name] = Settings()
+        return settings
+
+
+def save_settings(base_name):
+    pass
+
+
+def active_window():
+    return _app.windows[0] if _app.windows else None
+
+
+def windows():
+    return list(_app.windows)
+
+
+def run_command(cmd, args=None):
+    pass
+
+
+def score_selector(scope_name, selector):
+    return _score_selector(scope_name, selector)
+
+
+def log_commands(flag):
+    pass
+
+
+def _score_selector(scope_name, selector):
+    scopes = scope_name.split()
+    for alternative in selector.split(','):
+        names = alternative.split()
+        if names and any(s == names[0] or s.startswith(names[0] + '.')
+                         for s in scopes):
+            return 1
+    return 0
+
+
+def _call_safely(f, *args):
+    try:
+        return f(*args)
+    except Exception:
+        # Sublime Text reports errors in callbacks and moves on.
+        traceback.print_exc()
+
+
+class Region(object):
+    __slots__ = ('a', 'b', 'xpos')
+
+    def __init__(self, a, b=None, xpos=-1):
+        if b is None:
+            b = a
+        self.a = a
+        self.b = b
+        self.xpos = xpos
+
+    def __str__(self):
+        return '(' + str(self.a) + ', ' + str(self.b) + ')'
+
+    def __repr__(self):
+        return '(' + str(self.a) + ', ' + str(self.b) + ')'
+
+    def __len__(self):
+        return self.size()
+
+    def __eq__(self, rhs):
+        return (isinstance(rhs, Region) and
+                self.a == rhs.a and self.b == rhs.b)
+
+    def __ne__(self, rhs):
+        return not self == rhs
+
+    def __hash__(self):
+        return hash((self.a, self.b))
+
+    def __lt__(self, rhs):
+        lhs_begin = self.begin()
+        rhs_begin = rhs.begin()
+        if lhs_begin == rhs_begin:
+            return self.end() < rhs.end()
+        return lhs_begin < rhs_begin
+
+    def __contains__(self, v):
+        if isinstance(v, Region):
+            return v.a in self and v.b in self
+        return self.begin() <= v <= self.end()
+
+    def empty(self):
+        return self.a == self.b
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return abs(self.a - self.b)
+
+    def contains(self, x):
+        return x in self
+
+    def cover(self, rhs):
+        a = min(self.begin(), rhs.begin())
+        b = max(self.end(), rhs.end())
+        if self.a > self.b:
+            return Region(b, a)
+        return Region(a, b)
+
+    def intersection(self, rhs):
+        if self.end() <= rhs.begin() or rhs.end() <= self.begin():
+            return Region(0, 0)
+        return Region(max(self.begin(), rhs.begin()),
+                      min(self.end(), rhs.end()))
+
+    def intersects(self, rhs):
+        lb, le = self.begin(), self.end()
+        rb, re_ = rhs.begin(), rhs.end()
+        return ((lb == rb and le == re_) or
+                (rb > lb and rb < le) or (re_ > lb and re_ < le) or
+                (lb > rb and lb < re_) or (le > rb and le < re_))
+
+
+class Selection(object):
+    def __init__(self, view=None):
+        self.view = view
+        self._regions = []
+
+    def __len__(self):
+        return len(self._regions)
+
+    def __getitem__(self, index):
+        return self._regions[index]
+
+    def __iter__(self):
+        return iter(list(self._regions))
+
+    def __eq__(self, rhs):
+        return (isinstance(rhs, Selection) and
+                self._regions == rhs._regions)
+
+    def __repr__(self):
+        return repr(self._regions)
+
+    def is_valid(self):
+        return self.view is None or self.view.is_valid()
+
+    def clear(self):
+        self._regions = []
+
+    def add(self, x):
+        self._regions.append(self._clamp(x))
+        self._merge()
+
+    def add_all(self, regions):
+        for r in regions:
+            self._regions.append(self._clamp(r))
+        self._merge()
+
+    def _clamp(self, r):
+        # Sublime Text keeps selections within the buffer.
+        if not isinstance(r, Region):
+            r = Region(r)
+        size = len(self.view._text) if self.view is not None else None
+        if size is None:
+            return Region(r.a, r.b, r.xpos)
+        return Region(max(0, min(r.a, size)), max(0, min(r.b, size)), r.xpos)
+
+    def subtract(self, region):
+        kept = []
+        for r in self._regions:
+            if not r.intersects(region) and r != region:
+                kept.append(r)
+                continue
+            if r.begin() < region.begin():
+                kept.append(Region(r.begin(), region.begin()))
+            if r.end() > region.end():
+                kept.append(Region(region.end(), r.end()))
+        self._regions = kept
+
+    def contains(self, region):
+        return any(region in r for r in self._regions)
+
+    def _merge(self):
+        # Overlapping regions collapse into one; adjacent ones don't.
+        ordered = sorted(self._regions, key=lambda r: (r.begin(), r.end()))
+        merged = []
+        for r in ordered:
+            if merged:
+                last = merged[-1]
+                if (r.begin() < last.end() or
+                        (last.empty() and r.begin() == last.begin())):
+                    merged[-1] = r.cover(last) if last.empty() else \
+                        last.cover(r)
+                    continue
+            merged.append(r)
+        self._regions = merged
+
+    def _adjust(self, adjust):
+        self._regions = [adjust(r) for r in self._regions]
+        self._merge()
+
+
+class Settings(object):
+    def __init__(self, parent=None):
+        self._data = {}
+        self._parent = parent
+        self._callbacks = OrderedDict()
+
+    def get(self, key, default=None):
+        if key in self._data:
+            return copy.deepcopy(self._data[key])
+        if self._parent is not None:
+            return self._parent.get(key, default)
+        return default
+
+    def has(self, key):
+        return key in self._data
+
+    def set(self, key, value):
+        self._data[key] = copy.deepcopy(value)
+        self._changed()
+
+    def erase(self, key):
+        if self._data.pop(key, None) is not None:
+            self._changed()
+
+    def add_on_change(self, tag, callback):
+        self._callbacks.setdefault(tag, []).append(callback)
+
+    def clear_on_change(self, tag):
+        self._callbacks.pop(tag, None)
+
+    def _changed(self):
+        for callbacks in list(self._callbacks.values()):
+            for callback in list(callbacks):
+                _call_safely(callback)
+
+
+class Edit(object):
+    def __init__(self, token):
+        self.edit_token = token
+
+
+class _Snapshot(object):
+    __slots__ = ('text', 'sel')
+
+    def __init__(self, view):
+        self.text = view._text
+        self.sel = [Region(r.a, r.b, r.xpos) for r in view._sel]
+
+
+class View(object):
+    def __init__(self, window, widget=False):
+        self._id = self.view_id = _app.next_id()
+        self._buffer_id = _app.next_id()
+        self._window = window
+        self._text = ''
+        self._line_starts = None
+        self._sel = Selection(self)
+        self._sel.add(Region(0))
+        self._settings = Settings(load_settings('Preferences.sublime-settings'))
+        self._regions = {}
+        self._status = {}
+        self._name = ''
+        self._file_name = None
+        self._scratch = False
+        self._read_only = False
+        self._dirty = False
+        self._overwrite = False
+        self._scope = 'text.plain'
+        self._syntax = 'Packages/Text/Plain text.tmLanguage'
+        self._valid = True
+        self._change_count = 0
+        self._viewport_position = (0.0, 0.0)
+        self._undo = []
+        self._redo = []
+        self._glue_marks = []
+        self._history = []
+        self._edit_depth = 0
+        self._widget = widget
+        if widget:
+            self._settings.set('is_widget', True)
+
+    def __eq__(self, other):
+        return isinstance(other, View) and other._id == self._id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._id
+
+    def __len__(self):
+        return self._size()
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return 'View({0})'.format(self._id)
+
+    # Identity ----------------------------------------------------------
+
+    def id(self):
+        return self._id
+
+    def buffer_id(self):
+        return self._buffer_id
+
+    def is_valid(self):
+        return self._valid
+
+    def is_primary(self):
+        return True
+
+    def window(self):
+        return self._window if self._valid else None
+
+    def file_name(self):
+        return self._file_name
+
+    def name(self):
+        return self._name
+
+    def set_name(self, name):
+        self._name = name
+
+    def retarget(self, new_fname):
+        self._file_name = new_fname
+
+    def is_loading(self):
+        return False
+
+    def is_dirty(self):
+        return self._dirty
+
+    def is_read_only(self):
+        return self._read_only
+
+    def set_read_only(self, read_only):
+        self._read_only = read_only
+
+    def is_scratch(self):
+        return self._scratch
+
+    def set_scratch(self, scratch):
+        self._scratch = scratch
+
+    def encoding(self):
+        return 'UTF-8'
+
+    def set_encoding(self, encoding_name):
+        pass
+
+    def line_endings(self):
+        return 'Unix'
+
+    def set_line_endings(self, line_ending_name):
+        pass
+
+    def settings(self):
+        return self._settings
+
+    def meta_info(self, key, pt):
+        return None
+
+    def change_count(self):
+        return self._change_count
+
+    def close(self):
+        if self._window is not None:
+            return self._window._close_view(self)
+        self._valid = False
+        return True
+
+    # Syntax and scopes -------------------------------------------------
+
+    def set_syntax_file(self, syntax_file):
+        self._syntax = syntax_file
+        self._settings.set('syntax', syntax_file)
+
+    def scope_name(self, pt):
+        return self._scope + ' '
+
+    def match_selector(self, pt, selector):
+        return _score_selector(self._scope, selector) > 0
+
+    def score_selector(self, pt, selector):
+        return _score_selector(self._scope, selector)
+
+    def extract_scope(self, pt):
+        return Region(0, self._size())
+
+    # Text --------------------------------------------------------------
+
+    def _size(self):
+        return len(self._text)
+
+    def _substr(self, x):
+        if isinstance(x, Region):
+            return self._text[x.begin():x.end()]
+        if 0 <= x < len(self._text):
+            return self._text[x]
+        return '\x00'
+
+    def _starts(self):
+        if self._line_starts is None:
+            starts = [0]
+            find = self._text.find
+            i = find('\n')
+            while i != -1:
+                starts.append(i + 1)
+                i = find('\n', i + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def _rowcol(self, tp):
+        tp = max(0, min(tp, self._size()))
+        starts = self._starts()
+        row = bisect_right(starts, tp) - 1
+        return (row, tp - starts[row])
+
+    def _text_point(self, row, col):
+        starts = self._starts()
+        if row < 0:
+            return 0
+        if row >= len(starts):
+            return self._size()
+        return min(starts[row] + max(col, 0), len(self._text))
+
+    def _line_end(self, start):
+        end = self._text.find('\n', start)
+        return len(self._text) if end == -1 else end
+
+    def _line(self, x):
+        if isinstance(x, Region):
+            a = self._line(x.begin()).begin()
+            b = self._line(x.end()).end()
+            return Region(a, b)
+        x = max(0, min(x, self._size()))
+        starts = self._starts()
+        start = starts[bisect_right(starts, x) - 1]
+        return Region(start, self._line_end(start))
+
+    def _full_line(self, x):
+        r = self._line(x)
+        if r.b < self._size():
+            return Region(r.a, r.b + 1)
+        return r
+
+    def _lines(self, r):
+        lines = []
+        pt = r.begin()
+        end = r.end()
+        while True:
+            line = self._line(pt)
+            lines.append(line)
+            if line.b >= end or line.b >= self._size():
+                break
+            pt = line.b + 1
+        return lines
+
+    def split_by_newlines(self, r):
+        lines = self._lines(r)
+        return [Region(max(l.a, r.begin()), min(l.b, r.end())) for l in lines]
+
+    def _word(self, x):
+        if isinstance(x, Region):
+            a = self._word(x.begin()).begin()
+            b = self._word(x.end()).end()
+            return Region(a, b)
+        separators = self._word_separators()
+        line = self._line(x)
+        kind = self._char_kind(self._substr(x), separators)
+        if kind == 'space' and x > line.a:
+            kind = self._char_kind(self._substr(x - 1), separators)
+        a = x
+        while a > line.a and self._char_kind(self._substr(a - 1),
+                                             separators) == kind:
+            a -= 1
+        b = x
+        while b < line.b and self._char_kind(self._substr(b),
+                                             separators) == kind:
+            b += 1
+        return Region(a, b)
+
+    def _word_separators(self, separators=None):
+        if separators:
+            return separators
+        return self._settings.get('word_separators', DEFAULT_WORD_SEPARATORS)
+
+    @staticmethod
+    def _char_kind(c, separators):
+        if c in ('\n', '\x00'):
+            return 'eol'
+        if c.isspace():
+            return 'space'
+        if c in separators:
+            return 'punctuation'
+        return 'word'
+
+    def _classify(self, pt, separators=None):
+        separators = self._word_separators(separators)
+        size = self._size()
+        left = self._text[pt - 1] if 0 < pt <= size else '\n'
+        right = self._text[pt] if 0 <= pt < size else '\n'
+        lk = self._char_kind(left, separators)
+        rk = self._char_kind(right, separators)
+
+        flags = 0
+        if left == '\n':
+            flags |= CLASS_LINE_START
+        if right == '\n':
+            flags |= CLASS_LINE_END
+        if left == '\n' and right == '\n':
+            flags |= CLASS_EMPTY_LINE
+        if rk == 'word' and lk != 'word':
+            flags |= CLASS_WORD_START
+        if lk == 'word' and rk != 'word':
+            flags |= CLASS_WORD_END
+        if rk == 'punctuation' and lk != 'punctuation':
+            flags |= CLASS_PUNCTUATION_START
+        if lk == 'punctuation' and rk != 'punctuation':
+            flags |= CLASS_PUNCTUATION_END
+        if flags & CLASS_WORD_START or (
+                lk == rk == 'word' and (
+                    (left.islower() and right.isupper()) or
+                    (left == '_' and right != '_'))):
+            flags |= CLASS_SUB_WORD_START
+        if flags & CLASS_WORD_END or (
+                lk == rk == 'word' and (
+                    (left.islower() and right.isupper()) or
+                    (left != '_' and right == '_'))):
+            flags |= CLASS_SUB_WORD_END
+        return flags
+
+    def _find_by_class(self, pt, forward, classes, separators=None):
+        if forward:
+            size = self._size()
+            pt += 1
+            while pt < size:
+                if self._classify(pt, separators) & classes:
+                    return pt
+                pt += 1
+            return size
+        pt -= 1
+        while pt > 0:
+            if self._classify(pt, separators) & classes:
+                return pt
+            pt -= 1
+        return 0
+
+    def _expand_by_class(self, x, classes, separators=None):
+        if not isinstance(x, Region):
+            x = Region(x)
+        a, b = x.begin(), x.end()
+        size = self._size()
+        while a > 0 and not (self._classify(a, separators) & classes):
+            a -= 1
+        b = b + 1 if b == a and b < size else b
+        while b < size and not (self._classify(b, separators) & classes):
+            b += 1
+        return Region(a, b)
+
+    def _compile(self, pattern, flags):
+        if flags & LITERAL:
+            pattern = re.escape(pattern)
+        re_flags = re.MULTILINE
+        if flags & IGNORECASE:
+            re_flags |= re.IGNORECASE
+        return re.compile(pattern, re_flags)
+
+    def _find(self, pattern, start_pt, flags=0):
+        try:
+            m = self._compile(pattern, flags).search(self._text, start_pt)
+        except re.error:
+            return Region(-1, -1)
+        if not m:
+            return Region(-1, -1)
+        return Region(m.start(), m.end())
+
+    def _find_all(self, pattern, flags=0, fmt=None, extractions=None):
+        try:
+            rx = self._compile(pattern, flags)
+        except re.error:
+            return []
+        regions = []
+        for m in rx.finditer(self._text):
+            regions.append(Region(m.start(), m.end()))
+            if fmt is not None and extractions is not None:
+                extractions.append(m.expand(fmt))
+        return regions
+
+    # Editing -----------------------------------------------------------
+
+    def begin_edit(self, edit_token=0, cmd=None, args=None):
+        self._edit_depth += 1
+        return Edit(edit_token)
+
+    def end_edit(self, edit):
+        self._edit_depth -= 1
+
+    def insert(self, edit, pt, text):
+        self._splice(pt, pt, text)
+        return len(text)
+
+    def erase(self, edit, r):
+        self._splice(r.begin(), r.end(), '')
+
+    def replace(self, edit, r, text):
+        self._splice(r.begin(), r.end(), text)
+
+    def _splice(self, a, b, text):
+        size = self._size()
+        a = max(0, min(a, size))
+        b = max(a, min(b, size))
+        if a == b and not text:
+            return
+        self._text = self._text[:a] + text + self._text[b:]
+        self._line_starts = None
+        self._dirty = True
+        self._change_count += 1
+
+        removed = b - a
+        added = len(text)
+
+        def move(x):
+            if x < a:
+                return x
+            if not removed:
+                return x + added
+            if x == a:
+                return a
+            if x < b:
+                return a + added
+            return x - removed + added
+
+        def adjust(r):
+            return Region(move(r.a), move(r.b))
+
+        self._sel._adjust(adjust)
+        for key, (regions, scope, icon, flags) in self._regions.items():
+            self._regions[key] = ([adjust(r) for r in regions],
+                                  scope, icon, flags)
+        _app.dispatch('on_modified', self)
+
+    def sel(self):
+        return self._sel
+
+    def has_non_empty_selection_region(self):
+        return any(not r.empty() for r in self._sel)
+
+    def command_history(self, delta, modifying_only=False):
+        history = self._history
+        if modifying_only:
+            history = [h for h in history if h[2]]
+        index = len(history) - 1 + delta
+        if 0 <= index < len(history):
+            name, args, _ = history[index]
+            return (name, copy.deepcopy(args), 1)
+        return (None, None, 0)
+
+    def run_command(self, cmd, args=None):
+        args = args or {}
+        # Text commands run from within other text commands share their
+        # undo group.
+        new_group = not self._edit_depth
+        before = _Snapshot(self) if new_group else None
+        change_count = self._change_count
+
+        _app.command_depth += 1
+        try:
+            handler = _app.text_commands.get(cmd)
+            if handler is not None:
+                instance = handler(self)
+                if instance.is_enabled_(args):
+                    instance.run_(0, args)
+            elif cmd in _builtin_view_commands:
+                self._edit_depth += 1
+                try:
+                    _builtin_view_commands[cmd](self, **args)
+                finally:
+                    self._edit_depth -= 1
+            elif self._window is not None:
+                self._window._run_window_command(cmd, args)
+        finally:
+            _app.command_depth -= 1
+
+        if new_group:
+            modified = self._change_count != change_count
+            if (cmd == 'insert' and self._history and
+                    self._history[-1][0] == 'insert'):
+                # Like Sublime Text, record runs of typed text as one
+                # command.
+                last = self._history.pop()
+                args = {'characters': last[1].get('characters', '') +
+                                      args.get('characters', '')}
+                self._history.append((cmd, args, last[2] or modified))
+            elif cmd not in ('undo', 'redo', 'soft_undo', 'soft_redo'):
+                self._history.append((cmd, copy.deepcopy(args), modified))
+                if modified:
+                    self._undo.append(before)
+                    self._redo = []
+        if not _app.command_depth:
+            run_timeouts()
+
+    # Regions -----------------------------------------------------------
+
+    def add_regions(self, key, regions, scope='', icon='', flags=0):
+        self._regions[key] = ([Region(r.a, r.b) for r in regions],
+                              scope, icon, flags)
+
+    def get_regions(self, key):
+        try:
+            return [Region(r.a, r.b) for r in self._regions[key][0]]
+        except KeyError:
+            return []
+
+    def erase_regions(self, key):
+        self._regions.pop(key, None)
+
+    def folded_regions(self):
+        return []
+
+    def fold(self, x):
+        return False
+
+    def unfold(self, x):
+        return []
+
+    def set_status(self, key, value):
+        self._status[key] = value
+
+    def get_status(self, key):
+        return self._status.get(key, '')
+
+    def erase_status(self, key):
+        self._status.pop(key, None)
+
+    def set_overwrite_status(self, value):
+        self._overwrite = value
+
+    def overwrite_status(self):
+        return self._overwrite
+
+    # Layout ------------------------------------------------------------
+
+    def line_height(self):
+        return 1.0
+
+    def em_width(self):
+        return 1.0
+
+    def visible_region(self):
+        return Region(0, self._size())
+
+    def show(self, x, show_surrounds=True):
+        pass
+
+    def show_at_center(self, x):
+        pass
+
+    def viewport_position(self):
+        return self._viewport_position
+
+    def set_viewport_position(self, xy, animate=True):
+        self._viewport_position = tuple(xy)
+
+    def viewport_extent(self):
+        return (80.0, float(len(self._starts())))
+
+    def layout_extent(self):
+        return (80.0, float(len(self._starts())))
+
+    def text_to_layout(self, tp):
+        row, col = self._rowcol(tp)
+        return (float(col), float(row))
+
+    def layout_to_text(self, vector):
+        return self._text_point(int(vector[1]), int(vector[0]))
+
+    def window_to_layout(self, vector):
+        return vector
+
+    def window_to_text(self, vector):
+        return self.layout_to_text(vector)
+
+    # Vintageous calls these through the public names; the fake itself uses
+    # the private ones so that api_calls only counts the former.
+    classify = _classify
+    expand_by_class = _expand_by_class
+    find = _find
+    find_all = _find_all
+    find_by_class = _find_by_class
+    full_line = _full_line
+    line = _line
+    lines = _lines
+    rowcol = _rowcol
+    size = _size
+    substr = _substr
+    text_point = _text_point
+    word = _word
+
+
+class Window(object):
+    def __init__(self):
+        self._id = self.window_id = _app.next_id()
+        self._views = []
+        self._active = None
+        self._panels = {}
+        self._settings = Settings()
+        self._folders = []
+
+    def __eq__(self, other):
+        return isinstance(other, Window) and other._id == self._id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._id
+
+    def id(self):
+        return self._id
+
+    def is_valid(self):
+        return True
+
+    def settings(self):
+        return self._settings
+
+    def views(self):
+        return list(self._views)
+
+    def active_view(self):
+        return self._active
+
+    def active_group(self):
+        return 0
+
+    def num_groups(self):
+        return 1
+
+    def focus_group(self, idx):
+        pass
+
+    def active_view_in_group(self, group):
+        return self._active
+
+    def views_in_group(self, group):
+        return list(self._views)
+
+    def get_view_index(self, view):
+        try:
+            return (0, self._views.index(view))
+        except ValueError:
+            return (-1, -1)
+
+    def set_view_index(self, view, group, idx):
+        if view in self._views:
+            self._views.remove(view)
+            self._views.insert(idx, view)
+
+    def get_layout(self):
+        return {'cols': [0.0, 1.0], 'rows': [0.0, 1.0],
+                'cells': [[0, 0, 1, 1]]}
+
+    def set_layout(self, layout):
+        pass
+
+    def folders(self):
+        return list(self._folders)
+
+    def project_data(self):
+        return None
+
+    def extract_variables(self):
+        return {}
+
+    def new_file(self, flags=0, syntax=''):
+        view = View(self)
+        self._views.append(view)
+        self.focus_view(view)
+        _app.dispatch('on_new', view)
+        return view
+
+    def open_file(self, fname, flags=0, group=-1):
+        view = self.find_open_file(fname)
+        if view is None:
+            view = View(self)
+            view._file_name = fname
+            try:
+                with open(fname, 'rt') as f:
+                    view._text = f.read()
+            except (IOError, OSError):
+                pass
+            self._views.append(view)
+            _app.dispatch('on_load', view)
+        self.focus_view(view)
+        return view
+
+    def find_open_file(self, fname):
+        for view in self._views:
+            if view.file_name() == fname:
+                return view
+
+    def focus_view(self, view):
+        if view is self._active:
+            return
+        previous = self._active
+        self._active = view
+        if previous is not None and previous.is_valid():
+            _app.dispatch('on_deactivated', previous)
+        _app.dispatch('on_activated', view)
+
+    def _close_view(self, view):
+        if view not in self._views:
+            view._valid = False
+            return True
+        _app.dispatch('on_pre_close', view)
+        self._views.remove(view)
+        view._valid = False
+        if self._active is view:
+            self._active = None
+            if self._views:
+                self.focus_view(self._views[-1])
+        _app.dispatch('on_close', view)
+        return True
+
+    def create_output_panel(self, name, unlisted=False):
+        try:
+            return self._panels[name]
+        except KeyError:
+            panel = self._panels[name] = View(self, widget=True)
+            return panel
+
+    get_output_panel = create_output_panel
+
+    def find_output_panel(self, name):
+        return self._panels.get(name)
+
+    def destroy_output_panel(self, name):
+        self._panels.pop(name, None)
+
+    def active_panel(self):
+        return None
+
+    def show_input_panel(self, caption, initial_text, on_done, on_change,
+                         on_cancel):
+        panel = View(self, widget=True)
+        panel._text = initial_text
+        panel._sel.clear()
+        panel._sel.add(Region(len(initial_text)))
+        return panel
+
+    def show_quick_panel(self, items, on_select, flags=0, selected_index=-1,
+                         on_highlight=None):
+        pass
+
+    def status_message(self, message):
+        status_message(message)
+
+    def run_command(self, cmd, args=None):
+        args = args or {}
+        _app.command_depth += 1
+        try:
+            self._run_window_command(cmd, args)
+        finally:
+            _app.command_depth -= 1
+        if not _app.command_depth:
+            run_timeouts()
+
+    def _run_window_command(self, cmd, args):
+        handler = _app.window_commands.get(cmd)
+        if handler is not None:
+            instance = handler(self)
+            if instance.is_enabled_(args):
+                instance.run_(0, args)
+            return
+
+        if cmd in _builtin_window_commands:
+            _builtin_window_commands[cmd](self, **args)
+            return
+
+        view = self.active_view()
+        if view is not None and (cmd in _app.text_commands or
+                                 cmd in _builtin_view_commands):
+            # Outer command already in progress, so this doesn't make a new
+            # undo group of its own.
+            view.run_command(cmd, args)
+
+
+# Built-in commands -----------------------------------------------------------
+#
+# Only those Vintageous runs; unknown commands are ignored, like in Sublime
+# Text.
+
+def _cmd_insert(view, characters=''):
+    for r in reversed(list(view.sel())):
+        view._splice(r.begin(), r.end(), characters)
+
+
+def _cmd_append(view, characters='', force=False, scroll_to_end=False):
+    view._splice(view._size(), view._size(), characters)
+
+
+def _cmd_left_delete(view):
+    for r in reversed(list(view.sel())):
+        if r.empty():
+            if r.a > 0:
+                view._splice(r.a - 1, r.a, '')
+        else:
+            view._splice(r.begin(), r.end(), '')
+
+
+def _cmd_right_delete(view):
+    for r in reversed(list(view.sel())):
+        if r.empty():
+            view._splice(r.a, r.a + 1, '')
+        else:
+            view._splice(r.begin(), r.end(), '')
+
+
+def _cmd_select_all(view):
+    view.sel().clear()
+    view.sel().add(Region(0, view._size()))
+
+
+def _cmd_single_selection(view):
+    first = view.sel()[0]
+    view.sel().clear()
+    view.sel().add(first)
+
+
+def _cmd_move(view, by='characters', forward=True, extend=False, **kwargs):
+    regions = list(view.sel())
+    view.sel().clear()
+    for r in regions:
+        if by in ('lines', 'pages'):
+            row, col = view._rowcol(r.b)
+            row += 1 if forward else -1
+            b = view._text_point(row, col) if row >= 0 else 0
+        else:
+            b = min(r.b + 1, view._size()) if forward else max(r.b - 1, 0)
+        view.sel().add(Region(r.a if extend else b, b))
+
+
+def _cmd_move_to(view, to='bol', extend=False):
+    regions = list(view.sel())
+    view.sel().clear()
+    for r in regions:
+        if to == 'bol':
+            b = view._line(r.b).a
+        elif to == 'eol':
+            b = view._line(r.b).b
+        elif to == 'bof':
+            b = 0
+        else:
+            b = view._size()
+        view.sel().add(Region(r.a if extend else b, b))
+
+
+def _cmd_copy(view):
+    text = '\n'.join(view._substr(r) for r in view.sel() if not r.empty())
+    set_clipboard(text)
+
+
+def _cmd_swap_case(view):
+    for r in view.sel():
+        view._splice(r.begin(), r.end(), view._substr(r).swapcase())
+
+
+def _cmd_indent(view):
+    tab = ' ' * view.settings().get('tab_size', 4)
+    if not view.settings().get('translate_tabs_to_spaces', False):
+        tab = '\t'
+    for r in reversed(list(view.sel())):
+        for line in reversed(view._lines(r)):
+            view._splice(line.a, line.a, tab)
+
+
+def _cmd_unindent(view):
+    tab_size = view.settings().get('tab_size', 4)
+    for r in reversed(list(view.sel())):
+        for line in reversed(view._lines(r)):
+            text = view._substr(line)
+            if text.startswith('\t'):
+                view._splice(line.a, line.a + 1, '')
+                continue
+            spaces = len(text) - len(text.lstrip(' '))
+            view._splice(line.a, line.a + min(spaces, tab_size), '')
+
+
+def _cmd_reindent(view, force_indent=True):
+    # Indents lines like the closest non-blank line above them.
+    for r in reversed(list(view.sel())):
+        for line in reversed(view._lines(r)):
+            if line.a == 0:
+                continue
+            above = view._line(line.a - 1)
+            while above.a > 0 and not view._substr(above).strip():
+                above = view._line(above.a - 1)
+            text = view._substr(above)
+            indent = text[:len(text) - len(text.lstrip(' \t'))]
+            current = view._substr(line)
+            current_indent = len(current) - len(current.lstrip(' \t'))
+            view._splice(line.a, line.a + current_indent, indent)
+
+
+def _restore(view, snapshot):
+    view._text = snapshot.text
+    view._line_starts = None
+    view._change_count += 1
+    view._sel.clear()
+    view._sel.add_all(snapshot.sel)
+
+
+def _cmd_undo(view):
+    if not view._undo:
+        return
+    snapshot = view._undo.pop()
+    view._redo.append(_Snapshot(view))
+    _restore(view, snapshot)
+    view._glue_marks = [min(m, len(view._undo)) for m in view._glue_marks]
+
+
+def _cmd_redo(view):
+    if not view._redo:
+        return
+    snapshot = view._redo.pop()
+    view._undo.append(_Snapshot(view))
+    _restore(view, snapshot)
+
+
+def _cmd_mark_undo_groups_for_gluing(view):
+    # The marker's own entry doesn't exist yet; the next undo group will be
+    # the first one glued.
+    view._glue_marks.append(len(view._undo))
+
+
+def _cmd_glue_marked_undo_groups(view):
+    if not view._glue_marks:
+        return
+    mark = view._glue_marks.pop()
+    if len(view._undo) - mark > 1:
+        first = view._undo[mark]
+        del view._undo[mark:]
+        view._undo.append(first)
+
+
+def _cmd_unmark_undo_groups_for_gluing(view):
+    if view._glue_marks:
+        view._glue_marks.pop()
+
+
+def _cmd_noop(view, **kwargs):
+    pass
+
+
+_builtin_view_commands = {
+    'append': _cmd_append,
+    'copy': _cmd_copy,
+    'glue_marked_undo_groups': _cmd_glue_marked_undo_groups,
+    'indent': _cmd_indent,
+    'insert': _cmd_insert,
+    'left_delete': _cmd_left_delete,
+    'mark_undo_groups_for_gluing': _cmd_mark_undo_groups_for_gluing,
+    'move': _cmd_move,
+    'move_to': _cmd_move_to,
+    'redo': _cmd_redo,
+    'reindent': _cmd_reindent,
+    'right_delete': _cmd_right_delete,
+    'scroll_lines': _cmd_noop,
+    'select_all': _cmd_select_all,
+    'single_selection': _cmd_single_selection,
+    'soft_redo': _cmd_redo,
+    'soft_undo': _cmd_undo,
+    'swap_case': _cmd_swap_case,
+    'undo': _cmd_undo,
+    'unindent': _cmd_unindent,
+    'unmark_undo_groups_for_gluing': _cmd_unmark_undo_groups_for_gluing,
+}
+
+
+def _cmd_new_file(window):
+    window.new_file()
+
+
+def _cmd_close(window):
+    view = window.active_view()
+    if view is not None:
+        view.close()
+
+
+def _cmd_close_all(window):
+    for view in window.views():
+        view.close()
+
+
+def _cmd_window_noop(window, **kwargs):
+    pass
+
+
+_builtin_window_commands = {
+    'close': _cmd_close,
+    'close_all': _cmd_close_all,
+    'close_file': _cmd_close,
+    'hide_auto_complete': _cmd_window_noop,
+    'hide_overlay': _cmd_window_noop,
+    'hide_panel': _cmd_window_noop,
+    'new_file': _cmd_new_file,
+    'show_overlay': _cmd_window_noop,
+    'show_panel': _cmd_window_noop,
+}
+
+
+class _Application(object):
+    """
+    Global state: windows, settings, commands and event listeners.
+    """
+
+    def __init__(self):
+        self._last_id = 0
+        self.windows = []
+        self.settings = {}
+        self.status = ''
+        self.clipboard = ''
+        # (due time, callback) pairs, in the order they were scheduled.
+        self.timeouts = []
+        # Virtual time in milliseconds; see `advance_time()`.
+        self.clock = 0
+        self.command_depth = 0
+        self.text_commands = {}
+        self.window_commands = {}
+        self.application_commands = {}
+        self.listeners = []
+
+    def next_id(self):
+        self._last_id += 1
+        return self._last_id
+
+    def dispatch(self, event, view):
+        for listener in list(self.listeners):
+            handler = getattr(listener, event, None)
+            if handler is not None:
+                _call_safely(handler, view)
+
+
+_app = _Application()
+for (key, value) in DEFAULT_PREFERENCES.items():
+    load_settings('Preferences.sublime-settings').set(key, value)
+_app.windows.append(Window())
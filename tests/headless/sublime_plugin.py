@@ -0,0 +1,140 @@
+"""
+In-memory stand-in for the `sublime_plugin` module.
+
+Commands and event listeners are registered by `load_module()`, which scans
+a plugin module the way Sublime Text's plugin host does.
+"""
+
+import sublime
+
+
+class Command(object):
+    def name(self):
+        clsname = self.__class__.__name__
+        return command_name(clsname)
+
+    def is_enabled(self):
+        return True
+
+    def is_visible(self):
+        return True
+
+    def is_checked(self):
+        return False
+
+    def description(self):
+        return ''
+
+    def filter_args(self, args):
+        if args:
+            args = dict(args)
+        return args
+
+    def is_enabled_(self, args):
+        try:
+            args = self.filter_args(args)
+            if args:
+                return self.is_enabled(**args)
+            return self.is_enabled()
+        except TypeError:
+            return self.is_enabled()
+
+
+class ApplicationCommand(Command):
+    pass
+
+
+class WindowCommand(Command):
+    def __init__(self, window):
+        self.window = window
+
+    def run_(self, edit_token, args):
+        args = self.filter_args(args)
+        if args:
+            return self.run(**args)
+        return self.run()
+
+
+class TextCommand(Command):
+    def __init__(self, view):
+        self.view = view
+
+    def run_(self, edit_token, args):
+        args = self.filter_args(args)
+        if args:
+            edit = self.view.begin_edit(edit_token, self.name(), args)
+            try:
+                return self.run(edit, **args)
+            finally:
+                self.view.end_edit(edit)
+        edit = self.view.begin_edit(edit_token, self.name())
+        try:
+            return self.run(edit)
+        finally:
+            self.view.end_edit(edit)
+
+
+class EventListener(object):
+    pass
+
+
+def command_name(clsname):
+    """
+    Returns the name Sublime Text gives to commands of class @clsname.
+    """
+    name = clsname[0].lower()
+    last_upper = False
+    for c in clsname[1:]:
+        if c.isupper() and not last_upper:
+            name += '_'
+            name += c.lower()
+        else:
+            name += c
+        last_upper = c.isupper()
+    if name.endswith('_command'):
+        name = name[0:-8]
+    return name
+
+
+def _registry_for(cls):
+    app = sublime._app
+    if issubclass(cls, TextCommand):
+        return app.text_commands
+    if issubclass(cls, WindowCommand):
+        return app.window_commands
+    if issubclass(cls, ApplicationCommand):
+        return app.application_commands
+
+
+def load_module(module):
+    """
+    Registers the commands and event listeners found in @module.
+    """
+    app = sublime._app
+    for value in list(vars(module).values()):
+        if not isinstance(value, type) or value in (
+                ApplicationCommand, WindowCommand, TextCommand,
+                EventListener):
+            continue
+        if value.__module__ != module.__name__:
+            # Imported from elsewhere; registered by its own module.
+            continue
+        registry = _registry_for(value)
+        if registry is not None:
+            registry[command_name(value.__name__)] = value
+        elif issubclass(value, EventListener):
+            app.listeners.append(value())
+
+
+def unload_module(module):
+    """
+    Unregisters everything `load_module` registered for @module.
+    """
+    app = sublime._app
+    for registry in (app.text_commands, app.window_commands,
+                     app.application_commands):
+        for name, cls in list(registry.items()):
+            if cls.__module__ == module.__name__:
+                del registry[name]
+    app.listeners = [l for l in app.listeners
+                     if type(l).__module__ != module.__name__]
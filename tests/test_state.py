@@ -14,6 +14,8 @@ from Vintageous.tests import make_region
 from Vintageous.tests import ViewTest
 from Vintageous.vi.cmd_base import cmd_types
 from Vintageous.vi import cmd_defs
+from Vintageous.vi import keys
+from Vintageous.vi.settings import caching
 
 
 class StateTestCase(ViewTest):
@@ -67,6 +69,51 @@ class Test_State(StateTestCase):
         self.assertTrue(self.state.must_scroll_into_view())
 
 
+class Test_State_Registry(StateTestCase):
+    def test_for_view_returns_same_instance(self):
+        self.assertIs(state.State.for_view(self.view),
+                      state.State.for_view(self.view))
+
+    def test_release_drops_instance(self):
+        s = state.State.for_view(self.view)
+        state.State.release(self.view)
+        self.assertIsNot(state.State.for_view(self.view), s)
+
+
+class Test_State_Command_Slots(StateTestCase):
+    def test_action_is_not_rebuilt_while_caching(self):
+        with caching(self.view):
+            self.state.action = cmd_defs.ViDeleteByChars()
+            self.assertIs(self.state.action, self.state.action)
+
+    def test_setting_action_replaces_live_instance(self):
+        with caching(self.view):
+            self.state.action = cmd_defs.ViDeleteByChars()
+            action = cmd_defs.ViDeleteLine()
+            self.state.action = action
+            self.assertIsInstance(self.state.action, cmd_defs.ViDeleteLine)
+
+    def test_live_instance_is_a_copy(self):
+        with caching(self.view):
+            motion = cmd_defs.ViSearchForward()
+            self.state.motion = motion
+            self.assertIsNot(self.state.motion, motion)
+
+    def test_collecting_input_leaves_shared_definition_alone(self):
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+        self.view.window().run_command('process_notation', {'keys': '/ab'})
+        self.view.window().run_command('press_key', {'key': '<Esc>'})
+
+        self.assertEqual('', keys.mappings[modes.NORMAL]['/']._inp)
+
+    def test_motion_survives_round_trip(self):
+        self.state.motion = cmd_defs.ViGotoSymbolInFile()
+        self.assertIsInstance(self.state.motion, cmd_defs.ViGotoSymbolInFile)
+        self.state.motion = None
+        self.assertEqual(self.state.motion, None)
+
+
 class Test_State_Mode_Switching(StateTestCase):
     # TODO(guillermooo): Disable this only on CI server via env vars?
     @unittest.skipIf(os.environ.get('APPVEYOR', False), 'fails in CI server only')
@@ -0,0 +1,77 @@
+from Vintageous.tests import ViewTest
+from Vintageous.vi import api_calls
+from Vintageous.vi.utils import modes
+
+
+class Test_recording(ViewTest):
+    def testCountsCallsMadeInBlock(self):
+        self.write('abc\nabc')
+        with api_calls.recording() as calls:
+            self.view.substr(0)
+            self.view.line(0)
+            self.view.line(4)
+        self.assertEqual(calls['substr'], 1)
+        self.assertEqual(calls['line'], 2)
+        self.assertEqual(calls.total, 3)
+
+    def testRestoresViewWhenDone(self):
+        with api_calls.recording():
+            pass
+        self.assertFalse(api_calls.is_enabled())
+
+    def testOuterBlocksIncludeCallsFromInnerBlocks(self):
+        self.write('abc')
+        with api_calls.recording() as outer:
+            self.view.substr(0)
+            with api_calls.counting() as inner:
+                self.view.substr(1)
+        self.assertEqual(inner['substr'], 1)
+        self.assertEqual(outer['substr'], 2)
+
+    def testCountingYieldsNoneIfDisabled(self):
+        with api_calls.counting() as calls:
+            self.assertIsNone(calls)
+
+
+class Test_totals(ViewTest):
+    def setUp(self):
+        super().setUp()
+        api_calls.reset()
+        api_calls.enable()
+
+    def tearDown(self):
+        api_calls.disable()
+        api_calls.reset()
+        super().tearDown()
+
+    def testKeepsTotalsPerName(self):
+        self.write('abc')
+        with api_calls.counting('foo'):
+            self.view.substr(0)
+        with api_calls.counting('foo'):
+            self.view.substr(0)
+        self.assertEqual(api_calls.totals()[0][:2], ('foo', 2))
+        self.assertEqual(api_calls.totals()[0][2]['substr'], 2)
+
+
+# Motions should only look at the text they move over, no matter how large
+# the buffer is.
+class Test_motion_budgets(ViewTest):
+    def count_calls(self, text, command):
+        self.write(text)
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+        with api_calls.recording() as calls:
+            self.view.run_command(command, {'mode': modes.NORMAL, 'count': 1})
+        return calls.total
+
+    def testWordDoesNotDependOnBufferSize(self):
+        short = self.count_calls('abc def\n', '_vi_w')
+        long = self.count_calls('abc def\n' + 'xxx\n' * 5000, '_vi_w')
+        self.assertEqual(short, long)
+
+    def testRightBraceDoesNotDependOnBufferSize(self):
+        short = self.count_calls('abc\nabc\n\nabc\n', '_vi_right_brace')
+        long = self.count_calls('abc\nabc\n\nabc\n' + 'xxx\n' * 5000,
+                                '_vi_right_brace')
+        self.assertEqual(short, long)
@@ -0,0 +1,46 @@
+import sublime
+
+from Vintageous.tests import ViewTest
+from Vintageous.vi.utils import modes
+
+
+class Test_KeyContext(ViewTest):
+    def check(self, key, operand=True):
+        return self.state.context.check(key, sublime.OP_EQUAL, operand, False)
+
+    def testIgnoresUnknownKeys(self):
+        self.assertEqual(self.check('foo'), None)
+
+    def testTracksModeChanges(self):
+        self.state.mode = modes.NORMAL
+        self.assertTrue(self.check('vi_mode_normal'))
+        self.assertFalse(self.check('vi_mode_visual'))
+
+        self.state.mode = modes.VISUAL
+        self.assertFalse(self.check('vi_mode_normal'))
+        self.assertTrue(self.check('vi_mode_visual'))
+
+    def testCanNegateCompositeContexts(self):
+        self.state.mode = modes.VISUAL_LINE
+        self.assertTrue(self.check('vi_mode_normal_or_any_visual'))
+        self.assertFalse(self.check('vi_mode_normal_or_visual'))
+        self.assertTrue(self.check('vi_mode_normal_or_visual', operand=False))
+
+    def testTracksCommandModeChanges(self):
+        self.view.settings().set('command_mode', True)
+        self.assertTrue(self.check('vi_command_mode_aware'))
+
+        self.view.settings().set('command_mode', False)
+        self.assertFalse(self.check('vi_command_mode_aware'))
+        self.assertTrue(self.check('vi_insert_mode_aware'))
+
+    def testKeepsAnswersWhenUnrelatedSettingsChange(self):
+        self.view.settings().set('command_mode', True)
+        self.check('vi_mode_normal')
+        table = self.state.context._get_table()
+
+        self.view.settings().set('tab_size', 3)
+        self.assertIs(self.state.context._get_table(), table)
+
+        self.view.settings().set('command_mode', False)
+        self.assertIsNot(self.state.context._get_table(), table)
@@ -13,6 +13,7 @@ from Vintageous.tests import ViewTest
 from Vintageous.tests import ViewTest
 from Vintageous.vi.keys import to_bare_command_name
 from Vintageous.vi.keys import KeySequenceTokenizer
+from Vintageous.vi.keys import tokenize
 from Vintageous.vi.keys import seqs
 from Vintageous.vi import variables
 
@@ -86,6 +87,34 @@ class Test_KeySequenceTokenizer_iter_tokenize(ViewTest):
             self.assertEqual(self.parse(input_), expected, "{0} - {1}".format(i, msg))
 
 
+class Test_tokenize(unittest.TestCase):
+    def setUp(self):
+        self.old_vars = variables._VARIABLES
+        variables._VARIABLES = {}
+
+    def testCachesTokens(self):
+        self.assertEqual(tokenize('<C-P>x'), ('<C-P>', 'x'))
+        self.assertIs(tokenize('<C-P>x'), tokenize('<C-P>x'))
+
+    def testTokensFollowVariables(self):
+        self.assertEqual(tokenize('<leader>x'), ('\\', 'x'))
+        variables._VARIABLES = {'mapleader': ','}
+        self.assertEqual(tokenize('<leader>x'), (',', 'x'))
+        self.assertEqual(to_bare_command_name('2<leader>x'), ',x')
+
+    def testRaisesOnMalformedSequence(self):
+        self.assertRaises(ValueError, tokenize, 'a<foo>')
+
+    def testIterTokenizeYieldsTokensBeforeError(self):
+        tokens = KeySequenceTokenizer('ab<foo>').iter_tokenize()
+        self.assertEqual(next(tokens), 'a')
+        self.assertEqual(next(tokens), 'b')
+        self.assertRaises(ValueError, next, tokens)
+
+    def tearDown(self):
+        variables._VARIABLES = self.old_vars
+
+
 _command_name_tests = (
     ('daw', 'daw', ''),
     ('2daw', 'daw', ''),
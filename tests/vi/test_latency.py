@@ -0,0 +1,47 @@
+import unittest
+
+from Vintageous.vi import latency
+
+
+class Test_latency(unittest.TestCase):
+    def setUp(self):
+        latency.reset()
+
+    def tearDown(self):
+        latency.reset()
+
+    def testCanRecordTimings(self):
+        with latency.timing('foo'):
+            pass
+        histograms = latency.histograms()
+        self.assertEqual(len(histograms), 1)
+        self.assertEqual(histograms[0].name, 'foo')
+        self.assertEqual(histograms[0].count, 1)
+
+    def testRecordsTimingWhenBlockRaises(self):
+        with self.assertRaises(ValueError):
+            with latency.timing('foo'):
+                raise ValueError
+        self.assertEqual(latency.histograms()[0].count, 1)
+
+    def testCanCalculatePercentiles(self):
+        for i in range(1, 101):
+            latency.record('foo', i / 1000)
+        h = latency.histograms()[0]
+        self.assertAlmostEqual(h.percentile(50), 0.050, places=3)
+        self.assertAlmostEqual(h.percentile(95), 0.095, places=3)
+        self.assertAlmostEqual(h.max, 0.1)
+
+    def testKeepsBoundedNumberOfSamples(self):
+        for i in range(latency.MAX_SAMPLES + 10):
+            latency.record('foo', 0.001)
+        h = latency.histograms()[0]
+        self.assertEqual(h.count, latency.MAX_SAMPLES + 10)
+        self.assertEqual(len(h.samples), latency.MAX_SAMPLES)
+
+    def testReportListsAllNames(self):
+        latency.record('foo', 0.001)
+        latency.record('bar', 0.002)
+        report = latency.report()
+        self.assertIn('foo', report)
+        self.assertIn('bar', report)
@@ -0,0 +1,93 @@
+import unittest
+
+from Vintageous.tests import first_sel
+from Vintageous.tests import ViewTest
+from Vintageous.vi.macros import compile_macro
+from Vintageous.vi.utils import modes
+
+
+class Test_compile_macro(unittest.TestCase):
+    def testFusesInserts(self):
+        program = compile_macro([
+            ('insert', {'characters': 'ab'}),
+            ('insert', {'characters': 'c'}),
+            ('_vi_w', {'mode': modes.NORMAL, 'count': 1}),
+            ])
+        self.assertEqual([(s.command, s.args) for s in program], [
+            ('insert', {'characters': 'abc'}),
+            ('_vi_w', {'mode': modes.NORMAL, 'count': 1}),
+            ])
+
+    def testFoldsRepeatedMotions(self):
+        program = compile_macro([
+            ('_vi_w', {'mode': modes.NORMAL, 'count': 1}),
+            ('_vi_w', {'mode': modes.NORMAL, 'count': 2}),
+            ('_vi_w', {'mode': modes.VISUAL, 'count': 1}),
+            ('_vi_dollar', {'mode': modes.NORMAL, 'count': 1}),
+            ('_vi_dollar', {'mode': modes.NORMAL, 'count': 1}),
+            ])
+        self.assertEqual([(s.command, s.args) for s in program], [
+            ('_vi_w', {'mode': modes.NORMAL, 'count': 3}),
+            ('_vi_w', {'mode': modes.VISUAL, 'count': 1}),
+            ('_vi_dollar', {'mode': modes.NORMAL, 'count': 1}),
+            ('_vi_dollar', {'mode': modes.NORMAL, 'count': 1}),
+            ])
+
+    def testUpdatesXposAtStartOfVerticalMotions(self):
+        program = compile_macro([
+            ('_vi_j', {'mode': modes.NORMAL, 'count': 1, 'xpos': 3}),
+            ('_vi_j', {'mode': modes.NORMAL, 'count': 1, 'xpos': 5}),
+            ('_vi_k', {'mode': modes.NORMAL, 'count': 1, 'xpos': 5}),
+            ('_vi_w', {'mode': modes.NORMAL, 'count': 1}),
+            ('_vi_d', {'mode': modes.INTERNAL_NORMAL, 'count': 1,
+                       'motion': {'motion': '_vi_j',
+                                  'motion_args': {'xpos': 1}}}),
+            ])
+        self.assertEqual([(s.command, s.update_xpos) for s in program], [
+            ('_vi_j', True),
+            ('_vi_k', False),
+            ('_vi_w', False),
+            ('_vi_d', True),
+            ])
+        self.assertEqual(program[0].args['count'], 2)
+
+    def testUpdatesXposAfterOperators(self):
+        program = compile_macro([
+            ('_vi_d', {'mode': modes.INTERNAL_NORMAL, 'count': 1,
+                       'motion': {'motion': '_vi_j',
+                                  'motion_args': {'xpos': 1}}}),
+            ('_vi_j', {'mode': modes.NORMAL, 'count': 1, 'xpos': 1}),
+            ('_vi_k', {'mode': modes.NORMAL, 'count': 1, 'xpos': 1}),
+            ])
+        self.assertEqual([(s.command, s.update_xpos) for s in program], [
+            ('_vi_d', True),
+            ('_vi_j', True),
+            ('_vi_k', False),
+            ])
+
+    def testDoesNotChangeRecordedSteps(self):
+        steps = [('insert', {'characters': 'a'}),
+                 ('insert', {'characters': 'b'})]
+        compile_macro(steps)
+        self.assertEqual(steps[0][1], {'characters': 'a'})
+
+
+class Test_vi_at(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+
+    def press(self, keys):
+        for key in keys:
+            self.view.window().run_command('press_key', {'key': key})
+
+    def testCanReplayMacroWithCount(self):
+        self.write(''.join('line {0}\n'.format(i) for i in range(10)))
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('qqjq')
+        self.press('3@q')
+
+        self.assertEqual(self.R((4, 0), (4, 0)), first_sel(self.view))
@@ -6,6 +6,11 @@ from Vintageous.state import State
 from Vintageous.vi.utils import modes
 from Vintageous.vi.mappings import Mappings
 from Vintageous.vi.mappings import _mappings
+from Vintageous.vi.mappings import _KeyTrie
+from Vintageous.vi.mappings import automaton_for
+from Vintageous.vi.mappings import Mapping
+from Vintageous.vi.cmd_base import ViMissingCommandDef
+from Vintageous.vi.keys import mappings as builtin_mappings
 from Vintageous.vi.mappings import mapping_status
 from Vintageous.tests import set_text
 from Vintageous.tests import add_sel
@@ -81,3 +86,136 @@ class Test_Mapping_Expanding(ViewTest):
             self.assertEqual(result.status, expected_status, '[{0}] status failed'.format(i))
 
             self.mappings.clear()
+
+
+class Test_KeyTrie(unittest.TestCase):
+    def setUp(self):
+        self.trie = _KeyTrie()
+        self.trie.add('<C-m>', 'a')
+        self.trie.add('<C-m>x', 'b')
+        self.trie.add('gh', 'c')
+
+    def testCanFindFullMatches(self):
+        self.assertEqual(self.trie.get('<C-m>'), 'a')
+        self.assertEqual(self.trie.get('<C-m>x'), 'b')
+        self.assertEqual(self.trie.get('<C-'), None)
+        self.assertEqual(self.trie.get('ghx'), None)
+
+    def testCanFindPartialMatches(self):
+        self.assertTrue(self.trie.has_prefix('<C'))
+        self.assertTrue(self.trie.has_prefix('<C-m>'))
+        self.assertTrue(self.trie.has_prefix(''))
+        self.assertFalse(self.trie.has_prefix('gx'))
+        self.assertFalse(self.trie.has_prefix('<C-m>xx'))
+
+    def testCanRemove(self):
+        self.trie.remove('<C-m>')
+        self.assertEqual(self.trie.get('<C-m>'), None)
+        self.assertEqual(self.trie.get('<C-m>x'), 'b')
+
+        self.trie.remove('<C-m>x')
+        self.assertFalse(self.trie.has_prefix('<'))
+        self.assertTrue(self.trie.has_prefix('g'))
+
+        self.trie.remove('gh')
+        self.assertEqual(self.trie.root, {})
+
+    def testRemovingMissingSequenceRaises(self):
+        self.assertRaises(KeyError, self.trie.remove, 'g')
+        self.assertRaises(KeyError, self.trie.remove, 'xyz')
+
+
+class Test_Mappings_Lookup(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.mappings = Mappings(self.state)
+        self.mappings.clear()
+        self.state.mode = modes.NORMAL
+
+    def tearDown(self):
+        self.mappings.clear()
+        super().tearDown()
+
+    def testRemovedMappingIsNotExpanded(self):
+        self.mappings.add(modes.NORMAL, 'gh', 'daw')
+        self.mappings.remove(modes.NORMAL, 'gh')
+        self.assertEqual(self.mappings.expand_first('gh'), None)
+        self.assertEqual(self.mappings.expand_first('g'), None)
+
+    def testCanTellLongUserMappings(self):
+        self.mappings.add(modes.NORMAL, 'gh', 'daw')
+        self.mappings.add(modes.NORMAL, 'ghi', 'dd')
+        self.assertEqual(self.mappings.can_be_long_user_mapping('g'), (True, None))
+        self.assertEqual(self.mappings.can_be_long_user_mapping('gh'), (True, 'gh'))
+        self.assertEqual(self.mappings.can_be_long_user_mapping('x'), (False, True))
+
+    def testCanFindLongestUserMapping(self):
+        self.mappings.add(modes.NORMAL, ',a', 'x')
+        self.mappings.add(modes.NORMAL, ',abc', 'dd')
+        self.assertEqual(self.mappings.longest_user_mapping(',ab')[0], ',a')
+        self.assertEqual(self.mappings.longest_user_mapping(',abc')[0], ',abc')
+        self.assertEqual(self.mappings.longest_user_mapping(',b'), (None, None))
+
+    def testClearEmptiesIndex(self):
+        self.mappings.add(modes.VISUAL, 'gh', 'daw')
+        self.mappings.clear()
+        self.state.mode = modes.VISUAL
+        self.assertEqual(self.mappings.expand_first('g'), None)
+
+
+class Test_KeyAutomaton(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.mappings = Mappings(self.state)
+        self.mappings.clear()
+        self.state.mode = modes.NORMAL
+
+    def tearDown(self):
+        self.mappings.clear()
+        super().tearDown()
+
+    def feed(self, *keys):
+        self.state.partial_sequence = ''
+        for key in keys:
+            self.state.partial_sequence += key
+            cursor = self.mappings.advance(key)
+        return cursor
+
+    def testCanFindCommand(self):
+        cursor = automaton_for(modes.NORMAL).start().advance('g').advance('g')
+        self.assertIs(cursor.command, builtin_mappings[modes.NORMAL]['gg'])
+        cursor = cursor.advance('x')
+        self.assertIsInstance(cursor.command, ViMissingCommandDef)
+
+    def testIsRecompiledWhenUserMappingsChange(self):
+        before = automaton_for(modes.NORMAL)
+        self.assertIs(automaton_for(modes.NORMAL), before)
+        self.mappings.add(modes.NORMAL, 'gY', 'dd')
+        self.assertIsNot(automaton_for(modes.NORMAL), before)
+        cursor = automaton_for(modes.NORMAL).start().advance('g').advance('Y')
+        self.assertEqual(cursor.user_mapping().mapping, 'dd')
+
+    def testCursorResolvesUserMappings(self):
+        self.mappings.add(modes.NORMAL, 'gY', 'dd')
+        self.mappings.add(modes.NORMAL, 'qqq', 'x')
+
+        self.feed('g', 'Y')
+        command = self.mappings.resolve()
+        self.assertIsInstance(command, Mapping)
+        self.assertEqual(command.mapping, 'dd')
+
+        self.feed('q', 'q')
+        self.assertTrue(self.mappings.incomplete_user_mapping())
+
+    def testCursorResolvesLikeResolve(self):
+        for keys in (('g', 'g'), ('d',), ('<C-w>', 'q'), ('g', 'Y')):
+            self.assertIsNotNone(self.feed(*keys))
+            from_cursor = self.mappings.resolve()
+            self.mappings.cursor = None
+            from_scratch = self.mappings.resolve()
+            self.assertIs(type(from_cursor), type(from_scratch), keys)
+            self.assertEqual(from_cursor.__dict__, from_scratch.__dict__, keys)
+
+    def testCountsAreNotResolvedIncrementally(self):
+        self.assertIsNone(self.feed('2'))
+        self.assertIsNone(self.feed('"'))
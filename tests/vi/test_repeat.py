@@ -0,0 +1,109 @@
+from Vintageous.tests import first_sel
+from Vintageous.tests import ViewTest
+from Vintageous.vi import repeat
+from Vintageous.vi.mappings import Mappings
+from Vintageous.vi.utils import modes
+
+
+class Test_repeat(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+        repeat.release(self.view)
+
+    def tearDown(self):
+        repeat.release(self.view)
+        super().tearDown()
+
+    def press(self, keys):
+        self.view.window().run_command('process_notation', {'keys': keys})
+
+    def dot(self, count=None):
+        for key in (str(count) if count else '') + '.':
+            self.view.window().run_command('press_key', {'key': key})
+
+    def testCachesStepsOfChange(self):
+        self.write('aa bb cc dd ee\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('dw')
+        self.dot()
+        self.assertIsNotNone(repeat._cache.get(self.view.id()))
+        self.dot()
+        self.dot()
+
+        self.assertEqual('ee\n', self.get_all_text())
+
+    def testRunsCachedInsertions(self):
+        self.write('abc\nabc\nabc\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('Ax<Esc>')
+        self.press('j')
+        self.dot()
+        self.press('j')
+        self.dot()
+
+        self.assertEqual('abcx\nabcx\nabcx\n', self.get_all_text())
+        self.assertEqual(modes.NORMAL, self.state.mode)
+
+    def testRunsCachedChangesWithMotions(self):
+        self.write('foo bar\nfoo bar\nfoo bar\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('cwxyz<Esc>')
+        self.press('j0')
+        self.dot()
+        self.press('j0')
+        self.dot()
+
+        self.assertEqual('xyz bar\nxyz bar\nxyz bar\n', self.get_all_text())
+
+    def testCanUndoCachedChangeAtOnce(self):
+        self.write('abc\nabc\nabc\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('Ax<Esc>')
+        self.press('j')
+        self.dot()
+        self.press('j')
+        self.dot()
+        self.press('u')
+
+        self.assertEqual('abcx\nabcx\nabc\n', self.get_all_text())
+
+    def testCachesByCount(self):
+        self.write('a b c d e f g\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('dw')
+        self.dot()
+        self.dot(2)
+
+        self.assertEqual('e f g\n', self.get_all_text())
+        self.assertEqual(self.R(0, 0), first_sel(self.view))
+
+    def testDropsCacheWhenMappingsChange(self):
+        self.write('aa bb cc dd\n')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.press('dw')
+        self.dot()
+        cached = repeat._cache[self.view.id()]
+
+        mappings = Mappings(self.state)
+        mappings.add(modes.NORMAL, 'zq', 'x')
+        try:
+            self.dot()
+            self.assertIsNot(cached, repeat._cache[self.view.id()])
+        finally:
+            mappings.remove(modes.NORMAL, 'zq')
+
+        self.assertEqual('dd\n', self.get_all_text())
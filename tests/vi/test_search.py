@@ -1,7 +1,20 @@
+import unittest
+
+import sublime
+
 from Vintageous.tests import first_sel
 from Vintageous.tests import ViewTest
 
+from Vintageous.vi import api_calls
+from Vintageous.vi import search
+from Vintageous.vi.search import buffer_matches
+from Vintageous.vi.search import compile_pattern
+from Vintageous.vi.search import find_last_before
 from Vintageous.vi.search import find_wrapping
+from Vintageous.vi.search import reverse_search
+from Vintageous.vi.search import reverse_find_wrapping
+from Vintageous.vi.search import reverse_search_by_pt
+from Vintageous.vi.utils import modes
 
 
 class Test_find_wrapping(ViewTest):
@@ -36,4 +49,338 @@ aaa aaa xxx aaa
 
         # 4 is the beginning of the second line
         match = find_wrapping(self.view, 'xxx', 4, self.view.size())
-        self.assertEqual(match, self.R(12, 15))
\ No newline at end of file
+        self.assertEqual(match, self.R(12, 15))
+
+class Test_find_last_before(ViewTest):
+    def setUp(self):
+        super().setUp()
+        # Use tiny chunks so that matches cross chunk boundaries.
+        self.chunk_size = search.REVERSE_SEARCH_CHUNK_SIZE
+        search.REVERSE_SEARCH_CHUNK_SIZE = 4
+
+    def tearDown(self):
+        search.REVERSE_SEARCH_CHUNK_SIZE = self.chunk_size
+        super().tearDown()
+
+    def testFindsLastMatch(self):
+        self.write('foo bar\nfoo bar\nbar\n')
+
+        match = find_last_before(self.view, 'foo', 0, self.view.size())
+
+        self.assertEqual(self.R(8, 11), match)
+
+    def testIgnoresMatchesEndingAfterEnd(self):
+        self.write('foo bar\nfoo bar\n')
+
+        match = find_last_before(self.view, 'foo', 0, 10)
+
+        self.assertEqual(self.R(0, 3), match)
+
+    def testIgnoresMatchesStartingBeforeStart(self):
+        self.write('foo bar\nfoo bar\n')
+
+        self.assertIsNone(find_last_before(self.view, 'foo', 1, 10))
+
+    def testFindsMatchesAcrossChunks(self):
+        self.write('abc\nxx foobarbaz\nyy\n')
+
+        match = find_last_before(self.view, 'foobarbaz', 0, self.view.size())
+
+        self.assertEqual(self.R(7, 16), match)
+
+    def testFindsMultilineMatches(self):
+        self.write('abc\nfoo\nbar\nbaz\nqux\n')
+
+        match = find_last_before(self.view, r'foo\n[\s\S]*?baz', 0,
+                                 self.view.size())
+
+        self.assertEqual(self.R(4, 15), match)
+
+    def testFindsMatchStartingLast(self):
+        self.write('aaaa\n')
+
+        match = find_last_before(self.view, 'aa', 0, 4)
+
+        self.assertEqual(self.R(2, 4), match)
+
+    def testAnchorsToLines(self):
+        self.write('xfoo\nfoo foo\n')
+
+        self.assertEqual(self.R(5, 8),
+                         find_last_before(self.view, '^foo', 0, 13))
+        self.assertIsNone(find_last_before(self.view, '^foo', 6, 13))
+
+    def testCanIgnoreCase(self):
+        self.write('FOO bar\nbar\n')
+
+        match = find_last_before(self.view, 'foo', 0, self.view.size(),
+                                 sublime.IGNORECASE)
+
+        self.assertEqual(self.R(0, 3), match)
+
+    def testCanSearchLiterally(self):
+        self.write('a.c abc\n')
+
+        match = find_last_before(self.view, 'a.c', 0, self.view.size(),
+                                 sublime.LITERAL)
+
+        self.assertEqual(self.R(0, 3), match)
+
+    def testFailsIfNotFound(self):
+        self.write('foo bar\nfoo bar\n')
+
+        self.assertIsNone(find_last_before(self.view, 'baz', 0,
+                                           self.view.size()))
+
+
+class Test_compile_pattern(ViewTest):
+    def testCompilesPatternsPythonReadsLikeSublimeText(self):
+        for term in ('foo', r'\bfoo\b', '[a-z]+', "it's", '^a.*$'):
+            self.assertIsNotNone(compile_pattern(term), term)
+
+    def testRejectsPatternsPythonReadsDifferently(self):
+        # Python accepts these, but doesn't match them like Boost does.
+        for term in (r'\<foo\>', '[[:alpha:]]+', '[[=a=]]', 'a++', 'a{2}+',
+                     r"\'", r'\Afoo', r'foo\Z', r'(?<=a)b', r'(?<!a)b'):
+            self.assertIsNone(compile_pattern(term), term)
+
+    def testEscapesLiteralPatterns(self):
+        self.assertIsNotNone(compile_pattern(r'\<a++', sublime.LITERAL))
+
+    def testSearchesBackwardsWithViewIfPythonReadsPatternDifferently(self):
+        self.write('foo <foo> foo\n')
+
+        with api_calls.recording() as calls:
+            find_last_before(self.view, r'\<foo\>', 0, self.view.size())
+
+        self.assertGreater(calls['find'], 0)
+
+
+class Test_reverse_search(ViewTest):
+    def testSearchesFromStartOfLine(self):
+        self.write('foo bar\nfoo bar\n')
+
+        self.assertEqual(self.R(0, 3), reverse_search(self.view, 'foo', 2, 7))
+        self.assertIsNone(reverse_search_by_pt(self.view, 'foo', 2, 7))
+
+    def testFailsIfRangeIsOutOfBounds(self):
+        self.write('foo\n')
+
+        self.assertIsNone(reverse_search(self.view, 'foo', 0, 100))
+        self.assertIsNone(reverse_search_by_pt(self.view, 'foo', -1, 3))
+
+
+class Test_buffer_matches(ViewTest):
+    def setUp(self):
+        super().setUp()
+        search.release(self.view)
+        self.write('abc\nxyz abc\nabc\nxyz\nabc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+    def tearDown(self):
+        search.release(self.view)
+        super().tearDown()
+
+    def testSearchesBufferOnce(self):
+        with api_calls.recording() as calls:
+            buffer_matches(self.view, 'abc')
+            matches = buffer_matches(self.view, 'abc')
+
+        self.assertEqual(1, calls['find_all'])
+        self.assertEqual([self.R(0, 3), self.R(8, 11), self.R(12, 15),
+                          self.R(20, 23)], matches.regions)
+
+    def testSearchesAgainAfterBufferChanges(self):
+        buffer_matches(self.view, 'abc')
+        self.view.run_command('insert', {'characters': 'abc'})
+
+        with api_calls.recording() as calls:
+            matches = buffer_matches(self.view, 'abc')
+
+        self.assertEqual(1, calls['find_all'])
+        self.assertEqual(5, len(matches.regions))
+
+    def testCachesByFlags(self):
+        buffer_matches(self.view, 'ABC')
+
+        matches = buffer_matches(self.view, 'ABC', sublime.IGNORECASE)
+
+        self.assertEqual(4, len(matches.regions))
+        self.assertEqual([], buffer_matches(self.view, 'ABC').regions)
+
+    def testEvictsLeastRecentlyUsed(self):
+        first = buffer_matches(self.view, 'abc')
+        for i in range(search.MATCH_CACHE_SIZE):
+            buffer_matches(self.view, 'x' * (i + 1))
+
+        self.assertIsNot(first, buffer_matches(self.view, 'abc'))
+
+    def testFindsLikeView(self):
+        matches = buffer_matches(self.view, 'abc')
+
+        self.assertEqual(self.R(8, 11), find_wrapping(
+            self.view, 'abc', 1, self.view.size(), matches=matches))
+        self.assertEqual(self.R(20, 23), find_wrapping(
+            self.view, 'abc', 1, self.view.size(), times=3, matches=matches))
+        self.clear_sel()
+        self.add_sel(self.R(21, 21))
+        self.assertEqual(self.R(0, 3), find_wrapping(
+            self.view, 'abc', 21, self.view.size(), matches=matches))
+        self.assertEqual(self.R(8, 11), reverse_find_wrapping(
+            self.view, 'abc', 0, 12, matches=matches))
+        self.assertEqual(self.R(20, 23), reverse_find_wrapping(
+            self.view, 'abc', 0, 0, matches=matches))
+
+
+class Test_buffer_matches_RepeatSearch(ViewTest):
+    def setUp(self):
+        super().setUp()
+        search.release(self.view)
+
+    def tearDown(self):
+        search.release(self.view)
+        super().tearDown()
+
+    def repeat(self, reverse=False, count=1):
+        self.view.run_command('_vi_repeat_buffer_search', {'mode': modes.NORMAL, 'reverse': reverse, 'count': count})
+
+    def testSearchesOnceForFirstSearch(self):
+        self.write('foo\nabc\nbar\nabc\nmoo\nabc\nend')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        with api_calls.recording() as calls:
+            self.view.run_command('_vi_slash_impl', {'mode': modes.NORMAL, 'search_string': 'abc'})
+
+        self.assertEqual(0, calls['find_all'])
+        self.assertEqual(self.R(4, 4), first_sel(self.view))
+
+    def testRepeatsSearchWithoutSearchingBufferAgain(self):
+        self.write('foo\nabc\nbar\nabc\nmoo\nabc\nend')
+        self.clear_sel()
+        self.add_sel(self.R(4, 4))
+
+        self.view.run_command('_vi_star', {'mode': modes.NORMAL})
+        self.repeat()
+        with api_calls.recording() as calls:
+            self.repeat()
+            self.repeat(reverse=True)
+
+        self.assertEqual(0, calls['find_all'])
+        self.assertEqual(0, calls['find'])
+        self.assertEqual(self.R(20, 20), first_sel(self.view))
+
+    def testRepeatsSearchWithCount(self):
+        self.write(' '.join(['abc'] * 20))
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+        self.state.last_buffer_search = 'abc'
+        self.state.last_buffer_search_command = 'vi_slash'
+
+        with api_calls.recording() as calls:
+            self.repeat(count=5)
+            self.repeat(count=5)
+
+        self.assertEqual(1, calls['find_all'])
+        self.assertEqual(self.R(40, 40), first_sel(self.view))
+
+    def testFindsMatchesAddedAfterSearch(self):
+        self.write('abc xyz abc')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+        self.view.run_command('_vi_star', {'mode': modes.NORMAL})
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+        self.view.run_command('insert', {'characters': 'abc '})
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+        self.view.run_command('_vi_repeat_buffer_search', {'mode': modes.NORMAL, 'reverse': False})
+
+        self.assertEqual(self.R(4, 4), first_sel(self.view))
+
+
+class Test_hilite(ViewTest):
+    def setUp(self):
+        super().setUp()
+        search.release(self.view)
+        self.write('abc\n' * 100)
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+        self.scroll_to(40)
+
+    def tearDown(self):
+        search.release(self.view)
+        del self.view.visible_region
+        self.view.settings().erase('vintageous_hlsearch_max_regions')
+        super().tearDown()
+
+    def scroll_to(self, row):
+        region = self.R(self.view.text_point(row, 0),
+                        self.view.text_point(row + 10, 0))
+        self.view.visible_region = lambda: region
+
+    def hilited_rows(self):
+        return [self.view.rowcol(r.a)[0]
+                for r in self.view.get_regions('vi_search')]
+
+    def testHighlightsAroundVisibleRegion(self):
+        search.hilite(self.view, 'abc')
+
+        self.assertEqual(list(range(30, 61)), self.hilited_rows())
+
+    def testCanLimitHighlightedMatches(self):
+        self.view.settings().set('vintageous_hlsearch_max_regions', 8)
+
+        search.hilite(self.view, 'abc')
+
+        self.assertEqual(list(range(38, 46)), self.hilited_rows())
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testFollowsScrolling(self):
+        search.hilite(self.view, 'abc')
+        self.scroll_to(80)
+        sublime.advance_time(search.HLSEARCH_POLL_INTERVAL)
+
+        self.assertEqual(list(range(70, 100)), self.hilited_rows())
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testFollowsChanges(self):
+        search.hilite(self.view, 'abc')
+        self.view.sel().clear()
+        self.view.sel().add(self.R(self.view.text_point(45, 0)))
+        self.view.run_command('insert', {'characters': 'abc\n'})
+        sublime.advance_time(search.HLSEARCH_POLL_INTERVAL)
+
+        self.assertEqual(list(range(30, 61)), self.hilited_rows())
+
+    @unittest.skipUnless(hasattr(sublime, 'advance_time'), 'needs the headless clock')
+    def testStopsWhenErased(self):
+        search.hilite(self.view, 'abc')
+        search.erase_hilite(self.view)
+        self.scroll_to(80)
+        sublime.advance_time(search.HLSEARCH_POLL_INTERVAL)
+
+        self.assertEqual([], self.hilited_rows())
+
+    def testSearchesOnlyAroundVisibleRegionWithColdCache(self):
+        self.clear_sel()
+        self.add_sel(self.R(self.view.text_point(40, 0)))
+
+        with api_calls.recording() as calls:
+            self.view.run_command('_vi_star', {'mode': modes.NORMAL})
+
+        self.assertEqual(0, calls['find_all'])
+        # One find for the motion, one for each highlighted match and one
+        # past the last.
+        self.assertEqual(1 + 31 + 1, calls['find'])
+        self.assertEqual(list(range(30, 61)), self.hilited_rows())
+        self.assertEqual(self.R(self.view.text_point(41, 0)), first_sel(self.view))
+
+    def testSearchFindsMatchesNotHighlighted(self):
+        self.view.run_command('_vi_slash_impl', {'mode': modes.NORMAL, 'search_string': 'abc', 'count': 90})
+
+        self.assertEqual(90, self.view.rowcol(first_sel(self.view).b)[0])
+        self.assertEqual(100, len(search.hilited_matches(self.view)))
+        self.assertEqual(31, len(self.hilited_rows()))
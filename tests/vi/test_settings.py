@@ -15,6 +15,8 @@ from Vintageous.vi.settings import opt_bool_parser
 from Vintageous.vi.settings import set_minimap
 from Vintageous.vi.settings import set_sidebar
 from Vintageous.vi.settings import opt_rulers_parser
+from Vintageous.vi.settings import opt_int_parser
+from Vintageous.vi.settings import caching
 
 
 class TestSublimeSettings(ViewTest):
@@ -65,6 +67,33 @@ class TestVintageSettings(ViewTest):
       self.assertEqual(self.setts['foo'], None)
 
 
+class TestCachingVintageSettings(ViewTest):
+  def setUp(self):
+      super().setUp()
+      self.view.settings().erase('vintage')
+      self.setts = VintageSettings(view=self.view)
+
+  def testDefersWritesUntilBlockExits(self):
+      with caching(self.view):
+          self.setts['foo'] = 100
+          self.assertEqual(self.setts['foo'], 100)
+          self.assertEqual(self.view.settings().get('vintage').get('foo'), None)
+      self.assertEqual(self.view.settings().get('vintage')['foo'], 100)
+
+  def testFlushesOnlyWhenOutermostBlockExits(self):
+      with caching(self.view):
+          with caching(self.view):
+              self.setts['foo'] = 100
+          self.assertEqual(self.view.settings().get('vintage').get('foo'), None)
+      self.assertEqual(self.view.settings().get('vintage')['foo'], 100)
+
+  def testKeepsKeysSetOutsideTheCache(self):
+      with caching(self.view):
+          self.setts['foo'] = 100
+          self.view.settings().set('vintage', {'bar': 200})
+      self.assertEqual(self.view.settings().get('vintage'), {'foo': 100, 'bar': 200})
+
+
 class TestSettingsManager(ViewTest):
   def setUp(self):
       super().setUp()
@@ -88,6 +117,7 @@ class TestViEditorSettings(ViewTest):
       super().setUp()
       self.view.settings().erase('vintage')
       self.view.settings().erase('vintageous_hlsearch')
+      self.view.settings().erase('vintageous_timeoutlen')
       self.view.settings().erase('vintageous_foo')
       self.view.window().settings().erase('vintageous_foo')
       self.settsman = VintageSettings(view=self.view)
@@ -103,6 +133,8 @@ class TestViEditorSettings(ViewTest):
           'rulers',
           'showsidebar',
           'visualbell',
+          'timeout',
+          'timeoutlen',
       ]
 
       self.assertEqual(sorted(all_settings), sorted(list(VI_OPTIONS.keys())))
@@ -118,6 +150,8 @@ class TestViEditorSettings(ViewTest):
           'visualbell':  vi_user_setting(scope=SCOPE_VI_WINDOW,  values=(True, False, '0', '1'), default=True,  parser=opt_bool_parser,   action=set_generic_view_setting, negatable=True),
           'rulers':      vi_user_setting(scope=SCOPE_VIEW,       values=None,                    default=[],    parser=opt_rulers_parser, action=set_generic_view_setting, negatable=False),
           'showsidebar': vi_user_setting(scope=SCOPE_WINDOW,     values=(True, False, '0', '1'), default=True,  parser=None,              action=set_sidebar,              negatable=True),
+          'timeout':     vi_user_setting(scope=SCOPE_VI_VIEW,    values=(True, False, '0', '1'), default=True,  parser=opt_bool_parser,   action=set_generic_view_setting, negatable=True),
+          'timeoutlen':  vi_user_setting(scope=SCOPE_VI_VIEW,    values=None,                    default=1000,  parser=opt_int_parser,    action=set_generic_view_setting, negatable=False),
       }
 
       self.assertEqual(len(KNOWN_OPTIONS), len(VI_OPTIONS))
@@ -131,6 +165,17 @@ class TestViEditorSettings(ViewTest):
       self.settsman.view.settings().set('vintageous_hlsearch', 100)
       self.assertEqual(self.settsman['hlsearch'], True)
 
+  def testParsesValuesOfOptionsWithoutFixedValues(self):
+      self.settsman.view.settings().set('vintageous_timeoutlen', 500)
+      self.assertEqual(self.settsman['timeoutlen'], 500)
+      self.settsman.view.settings().set('vintageous_timeoutlen', '500')
+      self.assertEqual(self.settsman['timeoutlen'], 500)
+
+  def testCanRetrieveDefaultValueIfSetValueCannotBeParsed(self):
+      for value in ('foo', -1, 1.5, True, [500]):
+          self.settsman.view.settings().set('vintageous_timeoutlen', value)
+          self.assertEqual(self.settsman['timeoutlen'], 1000, value)
+
   def testCanRetrieveWindowLevelSettings(self):
       # TODO: use mock to patch dict
       VI_OPTIONS['foo'] = vi_user_setting(scope=SCOPE_WINDOW, values=(100,), default='bar', parser=None, action=None, negatable=False)
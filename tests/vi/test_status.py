@@ -0,0 +1,92 @@
+from Vintageous.tests import ViewTest
+from Vintageous.vi import api_calls
+from Vintageous.vi import status
+from Vintageous.vi.utils import modes
+
+
+class Test_status(ViewTest):
+    def setUp(self):
+        super().setUp()
+        status.release(self.view)
+        self.view.erase_status('vim-test')
+
+    def tearDown(self):
+        status.erase_status(self.view, 'vim-test')
+        status.release(self.view)
+        super().tearDown()
+
+    def testPushesChangesRightAwayOutsideRendering(self):
+        status.set_status(self.view, 'vim-test', 'foo')
+
+        self.assertEqual('foo', self.view.get_status('vim-test'))
+
+    def testHoldsBackChangesWhileRendering(self):
+        with status.rendering(self.view):
+            status.set_status(self.view, 'vim-test', 'foo')
+            self.assertEqual('', self.view.get_status('vim-test'))
+            with status.rendering(self.view):
+                status.set_status(self.view, 'vim-test', 'bar')
+            self.assertEqual('', self.view.get_status('vim-test'))
+
+        self.assertEqual('bar', self.view.get_status('vim-test'))
+
+    def testPushesLatestValueOnlyOnce(self):
+        with api_calls.recording() as calls:
+            with status.rendering(self.view):
+                status.set_status(self.view, 'vim-test', 'foo')
+                status.erase_status(self.view, 'vim-test')
+                status.set_status(self.view, 'vim-test', 'bar')
+
+        self.assertEqual(1, calls['set_status'])
+        self.assertEqual(0, calls['erase_status'])
+        self.assertEqual('bar', self.view.get_status('vim-test'))
+
+    def testSkipsValuesAlreadyShown(self):
+        status.set_status(self.view, 'vim-test', 'foo')
+
+        with api_calls.recording() as calls:
+            status.set_status(self.view, 'vim-test', 'foo')
+            with status.rendering(self.view):
+                status.erase_status(self.view, 'vim-test')
+                status.set_status(self.view, 'vim-test', 'foo')
+
+        self.assertEqual(0, calls.total)
+
+    def testCanErase(self):
+        status.set_status(self.view, 'vim-test', 'foo')
+        status.erase_status(self.view, 'vim-test')
+
+        self.assertEqual('', self.view.get_status('vim-test'))
+
+
+class Test_status_PressKey(ViewTest):
+    def setUp(self):
+        super().setUp()
+        self.state.mode = modes.NORMAL
+        self.state.reset_command_data()
+        self.write('abc def')
+        self.clear_sel()
+        self.add_sel(self.R(0, 0))
+
+    def press(self, key):
+        self.view.window().run_command('press_key', {'key': key})
+
+    def testShowsPendingRegisterAndCount(self):
+        for key in '"a3':
+            self.press(key)
+
+        self.assertEqual('"a3', self.view.get_status('vim-seq'))
+
+    def testSetsStatusOnceForEachKey(self):
+        with api_calls.recording() as calls:
+            self.press('d')
+
+        self.assertEqual('d', self.view.get_status('vim-seq'))
+        self.assertLessEqual(calls['set_status'] + calls['erase_status'], 2)
+
+    def testErasesSequenceWhenCommandRuns(self):
+        self.press('d')
+        self.press('w')
+
+        self.assertEqual('', self.view.get_status('vim-seq'))
+        self.assertEqual('def', self.get_all_text())
@@ -0,0 +1,173 @@
+"""
+Counts the calls Vintageous commands make to the Sublime Text API.
+
+Most of the time a command spends is spent in calls like `view.substr()` or
+`view.line()`, so the number of such calls a command makes per keystroke is a
+good proxy for its cost. Counting is off by default because it wraps the
+`sublime.View` methods listed in `COUNTED`; turn it on with `enable()` (or the
+`vintageous_toggle_api_call_counting` command) and look at the results with
+`report()` (or `vintageous_show_api_call_stats`).
+
+In tests, use `recording()` to check that a command stays within budget:
+
+    with api_calls.recording() as calls:
+        self.view.run_command('_vi_w', {'mode': modes.NORMAL, 'count': 1})
+    self.assertLessEqual(calls['substr'], 10)
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+import functools
+
+import sublime
+
+
+# `sublime.View` methods that are counted.
+COUNTED = (
+    'classify',
+    'erase_status',
+    'expand_by_class',
+    'find',
+    'find_all',
+    'find_by_class',
+    'full_line',
+    'line',
+    'lines',
+    'rowcol',
+    'set_status',
+    'size',
+    'substr',
+    'text_point',
+    'word',
+)
+
+
+class ApiCallCounter(Counter):
+    """
+    Number of API calls made, indexed by `sublime.View` method name.
+    """
+
+    @property
+    def total(self):
+        return sum(self.values())
+
+
+# Original methods replaced by counting wrappers, indexed by name. Empty when
+# counting is disabled.
+_originals = {}
+# Counters for the `counting` blocks currently running. A call is counted in
+# every one of them so that outer blocks include the calls made by inner ones.
+_active = []
+# Calls made by each command, indexed by command name.
+_totals = {}
+# Number of times each command has been counted, indexed by command name.
+_invocations = Counter()
+
+
+def _make_counted(name, method):
+    @functools.wraps(method)
+    def counted(*args, **kwargs):
+        for counter in _active:
+            counter[name] += 1
+        return method(*args, **kwargs)
+    return counted
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def enable():
+    """
+    Starts counting API calls.
+    """
+    if is_enabled():
+        return
+    for name in COUNTED:
+        method = getattr(sublime.View, name, None)
+        if method is None:
+            continue
+        _originals[name] = method
+        setattr(sublime.View, name, _make_counted(name, method))
+
+
+def disable():
+    """
+    Stops counting API calls and restores the original `sublime.View`.
+    """
+    for name, method in _originals.items():
+        setattr(sublime.View, name, method)
+    _originals.clear()
+
+
+@contextmanager
+def counting(name=None):
+    """
+    Counts the API calls made while the block runs.
+
+    Yields an `ApiCallCounter`, or `None` if counting is disabled. If @name
+    is given, the calls are added to the totals kept for @name.
+    """
+    if not is_enabled():
+        yield None
+        return
+
+    counter = ApiCallCounter()
+    _active.append(counter)
+    try:
+        yield counter
+    finally:
+        # Blocks are strictly nested. (Counters that compare equal are not
+        # necessarily the same counter, so don't use remove().)
+        _active.pop()
+        if name is not None:
+            _totals.setdefault(name, ApiCallCounter()).update(counter)
+            _invocations[name] += 1
+
+
+@contextmanager
+def recording():
+    """
+    Counts the API calls made while the block runs, enabling counting if
+    needed. Meant for tests.
+    """
+    was_enabled = is_enabled()
+    enable()
+    try:
+        with counting() as counter:
+            yield counter
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def totals():
+    """
+    Returns (name, invocations, counter) tuples sorted by name.
+    """
+    return [(name, _invocations[name], _totals[name])
+            for name in sorted(_totals)]
+
+
+def reset():
+    _totals.clear()
+    _invocations.clear()
+
+
+def report():
+    """
+    Returns the recorded API calls as plain text.
+    """
+    header = '{0:<40} {1:>8} {2:>10} {3:>10}'.format(
+        'name', 'count', 'calls', 'per call')
+    lines = [header, '-' * len(header)]
+    for name, invocations, counter in totals():
+        lines.append('{0:<40} {1:>8} {2:>10} {3:>10.1f}'.format(
+            name, invocations, counter.total, counter.total / invocations))
+        for method, calls in sorted(counter.items()):
+            lines.append('    {0:<36} {1:>8} {2:>10} {3:>10.1f}'.format(
+                method, '', calls, calls / invocations))
+    if not is_enabled():
+        lines.append('')
+        lines.append('API call counting is disabled.')
+    return '\n'.join(lines) + '\n'
@@ -9,10 +9,65 @@ from Vintageous.vi import utils
 
 
 class KeyContext(object):
+    """
+    Answers Vintageous' keymap context queries.
+
+    Answers are precomputed in a per-view table that is only rebuilt after
+    one of the settings they depend on (the mode, `command_mode`, widget
+    flags and `vintageous_*` options) has changed, so that each query is a
+    lookup.
+    """
+
+    # Tag used to watch for changes to settings.
+    _ON_CHANGE_TAG = 'Vintageous.contexts'
+
+    # Settings the context answers are computed from.
+    _WATCHED_SETTINGS = ('command_mode',
+                         'syntax',
+                         'is_widget',
+                         'is_vintageous_widget',
+                         '__vi_external_disable',
+                         '__vi_external_disable_keys',
+                         'vintageous_use_ctrl_keys',
+                         'vintageous_enable_cmdline_mode',
+                         )
+
+    # Context answers indexed by view.id(). A missing entry means the answers
+    # must be recomputed.
+    _tables = {}
+    # Snapshots of the watched settings, indexed by the view.id() of the
+    # views whose settings we are watching.
+    _watched = {}
+    _prefs_snapshot = None
+
     def __get__(self, instance, owner):
         self.state = instance
         return self
 
+    @staticmethod
+    def invalidate(view=None):
+        """
+        Forces the context answers for @view to be recomputed. If @view is
+        `None`, answers for all views are recomputed.
+        """
+        if view is None:
+            KeyContext._tables.clear()
+            return
+        KeyContext._tables.pop(view.id(), None)
+
+    @staticmethod
+    def release(view):
+        """
+        Drops any data held for @view.
+        """
+        KeyContext._tables.pop(view.id(), None)
+        if view.id() in KeyContext._watched:
+            del KeyContext._watched[view.id()]
+            try:
+                view.settings().clear_on_change(KeyContext._ON_CHANGE_TAG)
+            except AttributeError:
+                pass
+
     # def vi_must_change_mode(self, key, operator, operand, match_all):
     #     is_normal_mode = self.state.settings.view['command_mode']
     #     is_exit_mode_insert = (self.state.action in ACTIONS_EXITING_TO_INSERT_MODE)
@@ -65,14 +120,12 @@ class KeyContext(object):
 
     def vi_command_mode_aware(self, key, operator, operand, match_all):
         in_command_mode = self.state.view.settings().get('command_mode')
-        is_view = self.vi_is_view(key, operator, operand, match_all)
-        value = in_command_mode and is_view
+        value = in_command_mode and utils.is_view(self.state.view)
         return self._check(value, operator, operand, match_all)
 
     def vi_insert_mode_aware(self, key, operator, operand, match_all):
         in_command_mode = self.state.view.settings().get('command_mode')
-        is_view = self.vi_is_view(key, operator, operand, match_all)
-        value = (not in_command_mode) and is_view
+        value = (not in_command_mode) and utils.is_view(self.state.view)
         return self._check(value, operator, operand, match_all)
 
     def vi_use_ctrl_keys(self, key, operator, operand, match_all):
@@ -145,15 +198,14 @@ class KeyContext(object):
         # XXX: This context is used to disable some keys for VISUALLINE.
         # However, this is hiding some problems in visual transformers that might not be dealing
         # correctly with VISUALLINE.
-        normal = self.vi_mode_normal(key, operator, operand, match_all)
-        visual = self.vi_mode_visual(key, operator, operand, match_all)
-        visual = visual or self.vi_mode_visual_block(key, operator, operand, match_all)
-        return self._check((normal or visual), operator, operand, match_all)
+        value = self.state.mode in (modes.NORMAL, modes.VISUAL,
+                                    modes.VISUAL_BLOCK)
+        return self._check(value, operator, operand, match_all)
 
     def vi_mode_normal_or_any_visual(self, key, operator, operand, match_all):
-        normal_or_visual = self.vi_mode_normal_or_visual(key, operator, operand, match_all)
-        visual_line = self.vi_mode_visual_line(key, operator, operand, match_all)
-        return self._check((normal_or_visual or visual_line), operator, operand, match_all)
+        value = self.state.mode in (modes.NORMAL, modes.VISUAL,
+                                    modes.VISUAL_BLOCK, modes.VISUAL_LINE)
+        return self._check(value, operator, operand, match_all)
 
     # def vi_state_next_character_is_user_input(self, key, operator, operand, match_all):
         # value = (self.state.expecting_user_input or
@@ -206,11 +258,70 @@ class KeyContext(object):
     #     return self._check(rv, operator, operand, match_all)
 
     def check(self, key, operator, operand, match_all):
-        func = getattr(self, key, None)
-        if func:
-            return func(key, operator, operand, match_all)
-        else:
+        if key not in KeyContext._names:
             return None
+        return self._check(self._get_table()[key], operator, operand,
+                           match_all)
+
+    def _get_table(self):
+        view = self.state.view
+        table = KeyContext._tables.get(view.id())
+        if table is not None:
+            return table
+
+        self._watch(view)
+        table = {}
+        for name in KeyContext._names:
+            table[name] = getattr(self, name)(name, sublime.OP_EQUAL, True,
+                                              False)
+        KeyContext._tables[view.id()] = table
+        return table
+
+    @staticmethod
+    def _snapshot(settings):
+        """
+        Returns the values in @settings that the context answers depend on.
+        """
+        vintage = settings.get('vintage')
+        mode = vintage.get('mode') if isinstance(vintage, dict) else None
+        return (mode,) + tuple(settings.get(name)
+                               for name in KeyContext._WATCHED_SETTINGS)
+
+    @staticmethod
+    def _on_prefs_change(prefs):
+        snapshot = KeyContext._snapshot(prefs)
+        if snapshot != KeyContext._prefs_snapshot:
+            KeyContext._prefs_snapshot = snapshot
+            KeyContext.invalidate()
+
+    @staticmethod
+    def _on_view_change(view):
+        try:
+            snapshot = KeyContext._snapshot(view.settings())
+        except AttributeError:
+            return
+        if snapshot != KeyContext._watched.get(view.id()):
+            KeyContext._watched[view.id()] = snapshot
+            KeyContext.invalidate(view)
+
+    def _watch(self, view):
+        if KeyContext._prefs_snapshot is None:
+            prefs = sublime.load_settings('Preferences.sublime-settings')
+            KeyContext._prefs_snapshot = KeyContext._snapshot(prefs)
+            prefs.add_on_change(KeyContext._ON_CHANGE_TAG,
+                                lambda: KeyContext._on_prefs_change(prefs))
+
+        if view.id() in KeyContext._watched:
+            return
+
+        try:
+            settings = view.settings()
+            KeyContext._watched[view.id()] = KeyContext._snapshot(settings)
+            settings.add_on_change(KeyContext._ON_CHANGE_TAG,
+                                   lambda: KeyContext._on_view_change(view))
+        except AttributeError:
+            # Probably the console.
+            return
 
     def _check(self, value, operator, operand, match_all):
         if operator == sublime.OP_EQUAL:
@@ -223,3 +334,8 @@ class KeyContext(object):
                 return not value
             elif operand == False:
                 return value
+
+
+# Names of all the context keys we can answer.
+KeyContext._names = frozenset(name for name in dir(KeyContext)
+                              if name.startswith('vi_'))
@@ -46,7 +46,7 @@ class ViCommandMixin(object):
 
     @property
     def state(self):
-        return State(self._view)
+        return State.for_view(self._view)
 
     def save_sel(self):
         """
@@ -1,3 +1,4 @@
+import functools
 import re
 
 from Vintageous import PluginLogger
@@ -257,7 +258,7 @@ def seq_to_command(state, seq, mode=None):
     """
     mode = mode or state.mode
 
-    _logger.info('[seq_to_command] state/seq: {0}/{1}'.format(mode, seq))
+    _logger.info('[seq_to_command] state/seq: %s/%s', mode, seq)
 
     command = None
 
@@ -289,9 +290,11 @@ mappings = {
 }
 
 
-# TODO: Add a timeout for ambiguous cmd_base.
 # Key sequence to command mapping. Mappings are set by the user.
 #
+# Keys that could start a longer mapping wait for the next key for up to
+# 'timeoutlen' milliseconds; see `PressKey`.
+#
 # Returns a partial definition containing the user-pressed keys so that we
 # can replay the command exactly as it was typed in.
 user_mappings = {
@@ -372,6 +375,8 @@ class key_names:
         Leader,
     ]
 
+    as_set = frozenset(as_list)
+
     max_len = len('<space>')
 
 
@@ -402,7 +407,7 @@ class KeySequenceTokenizer(object):
         return self.source[self.idx + 1]
 
     def is_named_key(self, key):
-        return key.lower() in key_names.as_list
+        return key.lower() in key_names.as_set
 
     def sort_modifiers(self, modifiers):
         """
@@ -474,6 +479,14 @@ class KeySequenceTokenizer(object):
             return c
 
     def iter_tokenize(self):
+        try:
+            tokens = tokenize(self.source)
+        except ValueError:
+            # Yield the tokens before the error, like _iter_tokenize() does.
+            return self._iter_tokenize()
+        return iter(tokens)
+
+    def _iter_tokenize(self):
         while True:
             token = self.tokenize_one()
             if token == EOF:
@@ -484,6 +497,41 @@ class KeySequenceTokenizer(object):
         return variables.get(c) if variables.is_key_name(c) else c
 
 
+# Number of distinct sequences whose tokens are remembered. Macros, the '.'
+# command and ProcessNotation tokenize the same few sequences over and over.
+TOKENIZER_CACHE_SIZE = 512
+
+
+@functools.lru_cache(maxsize=TOKENIZER_CACHE_SIZE)
+def _tokenize(source, leader, local_leader):
+    # @leader and @local_leader are only part of the cache key: tokens depend
+    # on the value of these variables.
+    return tuple(KeySequenceTokenizer(source)._iter_tokenize())
+
+
+def tokenize(source):
+    """
+    Returns the keys in @source, a sequence of key names in Vim notation, as
+    a tuple. Results are cached.
+
+    Raises `ValueError` if @source is malformed.
+    """
+    return _tokenize(source, variables.get('<leader>'),
+                     variables.get('<localleader>'))
+
+
+_BARE_PREFIX = re.compile(r'^(?:".)?(?:[1-9]+)?')
+
+
+@functools.lru_cache(maxsize=TOKENIZER_CACHE_SIZE)
+def _to_bare_command_name(seq, leader, local_leader):
+    new_seq = _BARE_PREFIX.sub('', seq)
+    # Account for d2d and similar sequences.
+    new_seq = KeySequenceTokenizer(new_seq).iter_tokenize()
+
+    return ''.join(k for k in new_seq if not k.isdigit())
+
+
 def to_bare_command_name(seq):
     """
     Strips register and count data from @seq.
@@ -492,11 +540,8 @@ def to_bare_command_name(seq):
     if seq == '0':
         return seq
 
-    new_seq = re.sub(r'^(?:".)?(?:[1-9]+)?', '', seq)
-    # Account for d2d and similar sequences.
-    new_seq = list(KeySequenceTokenizer(new_seq).iter_tokenize())
-
-    return ''.join(k for k in new_seq if not k.isdigit())
+    return _to_bare_command_name(seq, variables.get('<leader>'),
+                                 variables.get('<localleader>'))
 
 
 def assign(seq, modes, *args, **kwargs):
@@ -0,0 +1,91 @@
+"""
+Keeps track of how long Vintageous takes to process keys and run commands.
+
+Timings are collected all the time; they are cheap to take and are stored
+in memory only. Use the `vintageous_show_latency_stats` command to see them.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+import math
+
+
+# Number of timings kept for each name. Older timings are discarded.
+MAX_SAMPLES = 1000
+
+
+class LatencyHistogram(object):
+    """
+    Most recent timings, in seconds, recorded under the same name.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.samples.append(seconds)
+
+    def percentile(self, p):
+        """
+        Returns the @p-th percentile (0-100) of the recorded timings.
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        # Nearest-rank method.
+        idx = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return ordered[idx]
+
+    @property
+    def max(self):
+        return max(self.samples) if self.samples else 0.0
+
+
+# Histograms indexed by name.
+_histograms = {}
+
+
+def record(name, seconds):
+    try:
+        histogram = _histograms[name]
+    except KeyError:
+        histogram = _histograms[name] = LatencyHistogram(name)
+    histogram.add(seconds)
+
+
+@contextmanager
+def timing(name):
+    """
+    Records the time it takes to run the block under @name.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(name, perf_counter() - start)
+
+
+def histograms():
+    return sorted(_histograms.values(), key=lambda h: h.name)
+
+
+def reset():
+    _histograms.clear()
+
+
+def report():
+    """
+    Returns the recorded timings as a table in plain text.
+    """
+    header = '{0:<40} {1:>8} {2:>10} {3:>10} {4:>10}'.format(
+        'name', 'count', 'p50 (ms)', 'p95 (ms)', 'max (ms)')
+    lines = [header, '-' * len(header)]
+    for h in histograms():
+        lines.append('{0:<40} {1:>8} {2:>10.3f} {3:>10.3f} {4:>10.3f}'.format(
+            h.name, h.count, h.percentile(50) * 1000,
+            h.percentile(95) * 1000, h.max * 1000))
+    return '\n'.join(lines) + '\n'
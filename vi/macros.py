@@ -1,3 +1,6 @@
+import copy
+
+
 class MacroRegisters(dict):
     '''Crude implementation of macro registers.
     '''
@@ -17,3 +20,107 @@ class MacroRegisters(dict):
         # TODO(guillermooo): further restrict valid register names.
         # TODO(guillermooo): implement a vs A register.
         return super().__getitem__(key.lower())
+
+
+# Motions for which one run with count=n is the same as n runs with count=1.
+ADDITIVE_MOTIONS = frozenset((
+    '_vi_b',
+    '_vi_big_b',
+    '_vi_big_e',
+    '_vi_big_w',
+    '_vi_e',
+    '_vi_ge',
+    '_vi_g_big_e',
+    '_vi_h',
+    '_vi_j',
+    '_vi_k',
+    '_vi_l',
+    '_vi_left_brace',
+    '_vi_right_brace',
+    '_vi_w',
+))
+
+# Motions that keep the xpos they started from when run one after another.
+VERTICAL_MOTIONS = frozenset((
+    '_vi_j',
+    '_vi_k',
+))
+
+
+class MacroStep(object):
+    """
+    A command in a compiled macro.
+    """
+
+    def __init__(self, command, args, update_xpos=False):
+        self.command = command
+        self.args = args
+        # Whether the current xpos must be recomputed before running the
+        # command. Not set within a run of vertical motions, which keep the
+        # xpos they started from, like in Vim.
+        self.update_xpos = update_xpos
+
+    def __repr__(self):
+        return 'MacroStep({0!r}, {1!r}, update_xpos={2!r})'.format(
+            self.command, self.args, self.update_xpos)
+
+    @property
+    def takes_xpos(self):
+        if 'xpos' in self.args:
+            return True
+        motion = self.args.get('motion')
+        return bool(motion) and 'xpos' in motion.get('motion_args', {})
+
+    def set_xpos(self, xpos):
+        if 'xpos' in self.args:
+            self.args['xpos'] = xpos
+        elif self.args.get('motion'):
+            self.args['motion']['motion_args']['xpos'] = xpos
+
+
+def _can_fuse(previous, step):
+    # Inserts of text typed in one go.
+    if previous.command == step.command == 'insert':
+        return set(previous.args) == set(step.args) == {'characters'}
+
+    if previous.command != step.command:
+        return False
+    if previous.command not in ADDITIVE_MOTIONS:
+        return False
+    if not (isinstance(previous.args.get('count'), int) and
+            isinstance(step.args.get('count'), int)):
+        return False
+
+    ignored = ('count', 'xpos')
+    return ({k: v for k, v in previous.args.items() if k not in ignored} ==
+            {k: v for k, v in step.args.items() if k not in ignored})
+
+
+def _fuse(previous, step):
+    if previous.command == 'insert':
+        previous.args['characters'] += step.args['characters']
+    else:
+        previous.args['count'] += step.args['count']
+
+
+def compile_macro(steps):
+    """
+    Compiles the (command name, args) pairs recorded by `q` into a list of
+    `MacroStep`s: consecutive inserts are fused, repeated additive motions
+    are folded into a single counted motion and xpos is recomputed for each
+    command that takes one, except within runs of vertical motions.
+    """
+    program = []
+    for command, args in steps:
+        step = MacroStep(command, copy.deepcopy(args))
+        if program and _can_fuse(program[-1], step):
+            _fuse(program[-1], step)
+            continue
+        program.append(step)
+
+    vertical = False
+    for step in program:
+        step.update_xpos = step.takes_xpos and not (
+            vertical and step.command in VERTICAL_MOTIONS)
+        vertical = step.command in VERTICAL_MOTIONS
+    return program
@@ -1,10 +1,13 @@
+from Vintageous.plugins import plugins
 from Vintageous.vi import utils
 from Vintageous.vi.keys import mappings
 from Vintageous.vi.keys import seq_to_command
 from Vintageous.vi.keys import to_bare_command_name
+from Vintageous.vi.keys import tokenize
 from Vintageous.vi.keys import KeySequenceTokenizer
 from Vintageous.vi.utils import modes
 from Vintageous.vi.cmd_base import cmd_types
+from Vintageous.vi.cmd_base import ViMissingCommandDef
 from Vintageous.vi import variables
 
 
@@ -19,6 +22,77 @@ _mappings = {
 }
 
 
+class _KeyTrie(object):
+    """
+    Prefix tree over the key sequences mapped in a mode, so that looking up a
+    sequence costs O(len(seq)) regardless of the number of mappings.
+
+    Sequences are stored character by character, like `str.startswith` sees
+    them, so that '<C' is a prefix of '<C-m>'.
+    """
+
+    # Key under which a node stores the value of the sequence ending there.
+    # Never a character.
+    _VALUE = None
+
+    def __init__(self):
+        self.root = {}
+
+    def _node(self, seq):
+        node = self.root
+        for c in seq:
+            node = node.get(c)
+            if node is None:
+                return None
+        return node
+
+    def add(self, seq, value):
+        node = self.root
+        for c in seq:
+            node = node.setdefault(c, {})
+        node[self._VALUE] = value
+
+    def remove(self, seq):
+        path = [self.root]
+        for c in seq:
+            node = path[-1].get(c)
+            if node is None:
+                raise KeyError(seq)
+            path.append(node)
+        del path[-1][self._VALUE]
+        # Prune the nodes no other sequence goes through.
+        for i in range(len(seq), 0, -1):
+            if path[i]:
+                break
+            del path[i - 1][seq[i - 1]]
+
+    def get(self, seq):
+        node = self._node(seq)
+        if node is None:
+            return None
+        return node.get(self._VALUE)
+
+    def has_prefix(self, seq):
+        """
+        Returns `True` if any sequence starts with @seq.
+        """
+        return bool(self._node(seq))
+
+    def has_longer(self, seq):
+        """
+        Returns `True` if any sequence longer than @seq starts with it.
+        """
+        node = self._node(seq)
+        return node is not None and any(c is not self._VALUE for c in node)
+
+
+# Indexes the sequences in `_mappings`. Kept in sync by `Mappings`.
+_tries = dict((mode, _KeyTrie()) for mode in _mappings)
+# Bumped whenever `_mappings` changes, so that automata can tell they are out
+# of date.
+_generation = 0
+
+
 class mapping_status:
     INCOMPLETE = 1
     COMPLETE = 2
@@ -39,27 +113,227 @@ class Mapping(object):
             raise ValueError('no mapping found')
 
 
+class _AutomatonNode(object):
+    def __init__(self):
+        self.children = {}
+        # Built-in or plugin command definition.
+        self.command = None
+        # User mapping ({'name': ..., 'type': ...}).
+        self.user = None
+        # Whether a user mapping ends here or further down.
+        self.user_below = False
+        # Whether a user mapping ends further down.
+        self.user_longer = False
+
+
+class KeyAutomaton(object):
+    """
+    Every sequence mapped in a mode (built-in commands, plugins and user
+    mappings) compiled into one prefix tree. Resolving a sequence key by key
+    costs O(len(key)) per key; see `KeyCursor`.
+
+    Plugin commands override built-in commands and user mappings are checked
+    before either, like in `Mappings.resolve`.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.root = _AutomatonNode()
+        for table in (mappings.get(mode, {}), plugins.mappings.get(mode, {})):
+            for seq, command in table.items():
+                self._node(seq).command = command
+        for seq, mapped_to in _mappings.get(mode, {}).items():
+            self._node(seq, user=True).user = mapped_to
+
+    def _node(self, seq, user=False):
+        node = self.root
+        node.user_below = node.user_below or user
+        for c in seq:
+            node.user_longer = node.user_longer or user
+            node = node.children.setdefault(c, _AutomatonNode())
+            node.user_below = node.user_below or user
+        return node
+
+    def start(self):
+        return KeyCursor(self, '', self.root, None, None)
+
+
+class KeyCursor(object):
+    """
+    Position reached in a `KeyAutomaton` after a key sequence.
+
+    `node` is `None` once the sequence has left the automaton.
+    """
+
+    def __init__(self, automaton, seq, node, head, head_user):
+        self.automaton = automaton
+        self.seq = seq
+        self.node = node
+        # First key of the sequence and the user mapping for it, if any.
+        self.head = head
+        self.head_user = head_user
+
+    def advance(self, key):
+        node = self.node
+        for c in key:
+            if node is None:
+                break
+            node = node.children.get(c)
+        if not self.seq:
+            return KeyCursor(self.automaton, key, node, key,
+                             node and node.user)
+        return KeyCursor(self.automaton, self.seq + key, node, self.head,
+                         self.head_user)
+
+    @property
+    def command(self):
+        """
+        The built-in or plugin command mapped to the sequence, or a 'missing'
+        command.
+        """
+        if self.node is None or self.node.command is None:
+            return ViMissingCommandDef()
+        return self.node.command
+
+    @property
+    def incomplete_user_mapping(self):
+        # Like Vim, wait for the longer mapping even if the sequence is
+        # mapped too.
+        return self.node is not None and self.node.user_longer
+
+    def user_mapping(self):
+        """
+        Returns the same `Mapping` as `Mappings.expand_first` would for the
+        sequence, or `None`.
+        """
+        if self.node is not None and self.node.user is not None:
+            return Mapping(self.seq, self.node.user['name'], '',
+                           mapping_status.COMPLETE)
+        if self.head_user is not None:
+            return Mapping(self.head, self.head_user['name'],
+                           self.seq[len(self.head):], mapping_status.COMPLETE)
+        if self.node is not None and self.node.user_below:
+            return Mapping(self.seq, '', '', mapping_status.INCOMPLETE)
+        return None
+
+    def resolve(self, check_user_mappings=True):
+        """
+        Returns the same as `Mappings.resolve` would for the sequence.
+        """
+        if check_user_mappings:
+            command = self.user_mapping()
+            if command:
+                return command
+        return self.command
+
+
+# Compiled automata and the state of the mapping tables they were compiled
+# from, indexed by mode.
+_automata = {}
+# Cursor for each view's partial sequence, indexed by view id.
+_cursors = {}
+
+
+def automaton_for(mode):
+    """
+    Returns the `KeyAutomaton` for @mode, compiling it again if any mapping
+    table has changed since it was last compiled.
+    """
+    # Built-in and plugin commands are only ever added.
+    signature = (len(mappings.get(mode, {})),
+                 len(plugins.mappings.get(mode, {})), _generation)
+    try:
+        compiled_for, automaton = _automata[mode]
+        if compiled_for == signature:
+            return automaton
+    except KeyError:
+        pass
+    automaton = KeyAutomaton(mode)
+    _automata[mode] = (signature, automaton)
+    return automaton
+
+
+def _mappings_changed():
+    global _generation
+    _generation += 1
+
+
+def generation():
+    """
+    Returns a value that changes whenever a key mapping table changes, so
+    that anything derived from resolving keys can tell it's out of date.
+    """
+    # Built-in and plugin commands are only ever added.
+    return (_generation,
+            sum(len(table) for table in mappings.values()),
+            sum(len(table) for table in plugins.mappings.values()))
+
+
+def _can_advance(key):
+    # Whether the automaton can consume @key as is. Counts, registers and
+    # keys that `to_bare_command_name` would rewrite (like '<leader>') need
+    # the whole sequence to be resolved again.
+    if key.isdigit() or key == '"':
+        return False
+    if len(key) == 1:
+        return key != '<'
+    try:
+        return tokenize(key) == (key,)
+    except ValueError:
+        return False
+
+
 class Mappings(object):
     def __init__(self, state):
         self.state = state
+        self.cursor = None
 
-    def _get_mapped_seqs(self, mode):
-        return sorted(_mappings[mode].keys())
+    def advance(self, key):
+        """
+        Moves the cursor for the state's partial sequence past @key, which
+        must have just been appended to it. `incomplete_user_mapping()` and
+        `resolve()` then use the cursor instead of resolving the whole
+        sequence again.
+
+        Returns the new `KeyCursor`, or `None` if the sequence can't be
+        resolved incrementally.
+        """
+        view_id = self.state.view.id()
+        previous = _cursors.pop(view_id, None)
+        self.cursor = None
+
+        seq = self.state.partial_sequence
+        if not _can_advance(key):
+            return None
+
+        automaton = automaton_for(self.state.mode)
+        if seq == key:
+            self.cursor = automaton.start().advance(key)
+        elif (previous is not None and previous.automaton is automaton and
+              previous.seq + key == seq):
+            self.cursor = previous.advance(key)
+        else:
+            return None
+
+        _cursors[view_id] = self.cursor
+        return self.cursor
+
+    def _current_cursor(self):
+        cursor = self.cursor
+        if (cursor is not None and cursor.seq == self.state.partial_sequence
+                and cursor.automaton.mode == self.state.mode):
+            return cursor
 
     def _find_partial_match(self, mode, seq):
-        return list(x for x in self._get_mapped_seqs(mode)
-                            if x.startswith(seq))
+        return _tries[mode].has_prefix(seq)
 
     def _find_full_match(self, mode, seq):
-        partials = self._find_partial_match(mode, seq)
-        try:
-            self.state.logger.info("[Mappings] checking partials {0} for {1}".format(partials, seq))
-            name = list(x for x in partials if x == seq)[0]
-            # FIXME: Possibly related to #613. We're not returning the view's
-            # current mode.
-            return (name, _mappings[mode][name])
-        except IndexError:
+        mapped_to = _tries[mode].get(seq)
+        if mapped_to is None:
             return (None, None)
+        # FIXME: Possibly related to #613. We're not returning the view's
+        # current mode.
+        return (seq, mapped_to)
 
     def expand(self, seq):
         pass
@@ -69,7 +343,7 @@ class Mappings(object):
 
         keys, mapped_to = self._find_full_match(self.state.mode, seq)
         if keys:
-            self.state.logger.info("[Mappings] found full command: {0} -> {1}".format(keys, mapped_to))
+            self.state.logger.info('[Mappings] found full command: %s -> %s', keys, mapped_to)
             return Mapping(seq, mapped_to['name'], seq[len(keys):],
                            mapping_status.COMPLETE)
 
@@ -77,34 +351,55 @@ class Mappings(object):
             head += key
             keys, mapped_to = self._find_full_match(self.state.mode, head)
             if keys:
-                self.state.logger.info("[Mappings] found full command: {0} -> {1}".format(keys, mapped_to))
+                self.state.logger.info('[Mappings] found full command: %s -> %s', keys, mapped_to)
                 return Mapping(head, mapped_to['name'], seq[len(head):],
                                mapping_status.COMPLETE)
             else:
                 break
 
         if self._find_partial_match(self.state.mode, seq):
-            self.state.logger.info("[Mappings] found partial command: {0}".format(seq))
+            self.state.logger.info('[Mappings] found partial command: %s', seq)
             return Mapping(seq, '', '', mapping_status.INCOMPLETE)
 
         return None
 
+    def longest_user_mapping(self, seq):
+        """
+        Returns the longest run of keys at the start of @seq that is mapped
+        by the user in the current mode, and what it's mapped to. Returns
+        `(None, None)` if there's none.
+        """
+        trie = _tries[self.state.mode]
+        head = ''
+        found = (None, None)
+        for key in KeySequenceTokenizer(seq).iter_tokenize():
+            head += key
+            mapped_to = trie.get(head)
+            if mapped_to is not None:
+                found = (head, mapped_to)
+            elif not trie.has_prefix(head):
+                break
+        return found
+
     # XXX: Provisional. Get rid of this as soon as possible.
     def can_be_long_user_mapping(self, key):
-        full_match = self._find_full_match(self.state.mode, key)
-        partial_matches = self._find_partial_match(self.state.mode, key)
-        if partial_matches:
-            self.state.logger.info("[Mappings] user mapping found: {0} -> {1}".format(key, partial_matches))
+        if self._find_partial_match(self.state.mode, key):
+            full_match = self._find_full_match(self.state.mode, key)
+            self.state.logger.info('[Mappings] user mapping found: %s', key)
             return (True, full_match[0])
-        self.state.logger.info("[Mappings] user mapping not found: {0} -> {1}".format(key, partial_matches))
+        self.state.logger.info('[Mappings] user mapping not found: %s', key)
         return (False, True)
 
     # XXX: Provisional. Get rid of this as soon as possible.
     def incomplete_user_mapping(self):
-        (maybe_mapping, complete) = \
-            self.can_be_long_user_mapping(self.state.partial_sequence)
-        if maybe_mapping and not complete:
-            self.state.logger.info("[Mappings] incomplete user mapping {0}".format(self.state.partial_sequence))
+        cursor = self._current_cursor()
+        if cursor is not None:
+            incomplete = cursor.incomplete_user_mapping
+        else:
+            incomplete = _tries[self.state.mode].has_longer(
+                                                self.state.partial_sequence)
+        if incomplete:
+            self.state.logger.info(lambda: "[Mappings] incomplete user mapping {0}".format(self.state.partial_sequence))
             return True
 
     def resolve(self, sequence=None, mode=None, check_user_mappings=True):
@@ -125,6 +420,12 @@ class Mappings(object):
 
             For example, this is the case of g~~.
         """
+        cursor = self._current_cursor()
+        if sequence is None and mode is None and cursor is not None:
+            command = cursor.resolve(check_user_mappings)
+            self.state.logger.info('[Mappings] %s resolved to: %s', cursor.seq, command)
+            return command
+
         # we usually need to look at the partial sequence, but some commands do weird things,
         # like ys, which isn't a namespace but behaves as such sometimes.
         seq = sequence or self.state.partial_sequence
@@ -138,28 +439,32 @@ class Mappings(object):
             command = self.expand_first(seq)
 
         if command:
-            self.state.logger.info('[Mappings] {0} equals command: {1}'.format(seq, command))
+            self.state.logger.info('[Mappings] %s equals command: %s', seq, command)
             return command
             # return {'name': command.mapping, 'type': cmd_types.USER}
         else:
-            self.state.logger.info('[Mappings] looking up >{0}<'.format(seq))
+            self.state.logger.info('[Mappings] looking up >%s<', seq)
             command = seq_to_command(self.state, seq, mode=mode)
-            self.state.logger.info('[Mappings] got {0}'.format(command))
+            self.state.logger.info('[Mappings] got %s', command)
             return command
 
     def add(self, mode, new, target):
         new = variables.expand_keys(new)
         _mappings[mode][new] = {'name': target, 'type': cmd_types.USER}
+        _tries[mode].add(new, _mappings[mode][new])
+        _mappings_changed()
 
     def remove(self, mode, new):
         try:
             del _mappings[mode][new]
         except KeyError:
             raise KeyError('mapping not found')
+        _tries[mode].remove(new)
+        _mappings_changed()
 
     def clear(self):
-        _mappings[modes.NORMAL] = {}
-        _mappings[modes.VISUAL] = {}
-        _mappings[modes.VISUAL_LINE] = {}
-        _mappings[modes.VISUAL_BLOCK] = {}
-        _mappings[modes.OPERATOR_PENDING] = {}
+        for mode in (modes.NORMAL, modes.VISUAL, modes.VISUAL_LINE,
+                     modes.VISUAL_BLOCK, modes.OPERATOR_PENDING):
+            _mappings[mode] = {}
+            _tries[mode] = _KeyTrie()
+        _mappings_changed()
@@ -0,0 +1,113 @@
+"""
+On-demand cProfile capture for Vintageous commands.
+
+While a capture is running, key processing and ex commands entered through
+the command line run under a single `cProfile.Profile`. Ex commands run
+directly with `window.run_command()`, for example from key bindings, are
+only profiled if they run while keys are being processed. Stopping the capture writes the collected stats
+to a `.prof` file in the plugin log dir, ready to be attached to bug reports
+and inspected with `pstats` or a viewer like snakeviz.
+"""
+
+from contextlib import contextmanager
+import cProfile
+import os
+import threading
+import time
+
+from Vintageous import PluginLogger
+
+
+_logger = PluginLogger(__name__)
+
+# The running profiler, if any.
+_profile = None
+# Where the running profiler's stats will be written to.
+_path = None
+# Nesting level of `profiling` blocks in each thread (`.depth`); only the
+# outermost one toggles the profiler so that nested commands aren't counted
+# twice.
+_local = threading.local()
+
+
+def is_running():
+    return _profile is not None
+
+
+def resolve_path(file_name=None):
+    """
+    Returns the absolute path where stats named @file_name will be written.
+
+    Relative names are taken to be relative to the plugin log dir. If no
+    name is given, one based on the current time is made up.
+    """
+    if not file_name:
+        file_name = time.strftime('Vintageous-%Y%m%d-%H%M%S.prof')
+    elif not os.path.splitext(file_name)[1]:
+        file_name += '.prof'
+
+    file_name = os.path.expanduser(file_name)
+    if os.path.isabs(file_name):
+        return file_name
+
+    log_dir = PluginLogger.log_dir
+    if not log_dir:
+        raise ValueError('cannot locate the log dir')
+    return os.path.join(log_dir, file_name)
+
+
+def start(file_name=None):
+    """
+    Starts a capture whose stats will be written to @file_name.
+
+    Returns the path of the file.
+    """
+    global _profile, _path
+
+    if is_running():
+        raise ValueError('already profiling to {0}'.format(_path))
+
+    _path = resolve_path(file_name)
+    _profile = cProfile.Profile()
+    _logger.info('[profiler] started, writing to %s', _path)
+    return _path
+
+
+def stop():
+    """
+    Stops the running capture and writes its stats to disk.
+
+    Returns the path of the file written.
+    """
+    global _profile, _path
+
+    if not is_running():
+        raise ValueError('not profiling')
+
+    profile, path = _profile, _path
+    _profile = _path = None
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    profile.dump_stats(path)
+    _logger.info('[profiler] stopped, stats written to %s', path)
+    return path
+
+
+@contextmanager
+def profiling():
+    """
+    Runs the block under the running profiler, if any.
+    """
+    depth = getattr(_local, 'depth', 0)
+    profile = _profile if not depth else None
+    if profile is not None:
+        profile.enable()
+    _local.depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+        if profile is not None:
+            profile.disable()
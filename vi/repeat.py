@@ -0,0 +1,120 @@
+"""
+Caches the commands run by the '.' command.
+
+'.' replays the keys stored in `State.repeat_data` through
+`process_notation`, which tokenizes them and resolves each key against the
+key mappings again. While that happens, we capture the steps the keys
+resolve to: the command data `State.eval()` runs, the text inserted and the
+switches back to normal mode. The next time the same change is repeated
+under the same conditions, `_vi_dot` runs the captured steps directly.
+"""
+
+from contextlib import contextmanager
+
+
+# Step types.
+#
+# (COMMAND, data): `data` is what `State.command_data()` returned right
+#                  before `State.eval()` ran a command.
+# (INSERT, text):  `text` was inserted in insert or replace mode.
+# (ESC, mode):     `_enter_normal_mode` ran with `mode` (or no mode if None).
+COMMAND = 'command'
+INSERT = 'insert'
+ESC = 'esc'
+
+
+class Chain(list):
+    """
+    Steps captured while a change was being replayed, in order.
+
+    A chain is `complete` only if running its steps is the same as running
+    the keys it was captured from. For example, a change that ended up
+    waiting for interactive input isn't.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.complete = True
+
+    def leading(self):
+        """
+        Returns the number of steps before the first one that runs an action.
+
+        `process_notation` doesn't glue these into the undo group of the
+        change.
+        """
+        for i, (type_, data) in enumerate(self):
+            if type_ != COMMAND or data[1]:
+                return i
+        return len(self)
+
+
+# Chain receiving steps, if any.
+_capturing = None
+# (key, chain) pairs indexed by view.id().
+_cache = {}
+
+
+@contextmanager
+def capturing():
+    """
+    Captures the steps run while the block runs.
+
+    Yields a `Chain`. Steps run by nested blocks are captured only by the
+    innermost one.
+    """
+    global _capturing
+    outer = _capturing
+    chain = _capturing = Chain()
+    try:
+        yield chain
+    except Exception:
+        chain.complete = False
+        raise
+    finally:
+        _capturing = outer
+
+
+def record(type_, data):
+    """
+    Adds a step to the chain being captured, if any.
+    """
+    if _capturing is not None:
+        _capturing.append((type_, data))
+
+
+def invalidate():
+    """
+    Marks the chain being captured, if any, as unusable.
+    """
+    if _capturing is not None:
+        _capturing.complete = False
+
+
+def cached(view, key):
+    """
+    Returns the chain cached for @view under @key, or `None`.
+    """
+    try:
+        cached_key, chain = _cache[view.id()]
+    except KeyError:
+        return None
+    if cached_key != key:
+        return None
+    return chain
+
+
+def store(view, key, chain):
+    """
+    Caches @chain for @view under @key if it's complete.
+
+    Only the last change repeated is kept for each view.
+    """
+    if chain.complete and chain:
+        _cache[view.id()] = (key, chain)
+    else:
+        _cache.pop(view.id(), None)
+
+
+def release(view):
+    _cache.pop(view.id(), None)
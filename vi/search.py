@@ -1,6 +1,10 @@
 import sublime
 import sublime_plugin
 
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import partial
 import re
 
 
@@ -28,19 +32,242 @@ def find_all_in_range(view, term, start, end, flags=0):
         start = m.end()
 
 
-def find_wrapping(view, term, start, end, flags=0, times=1):
+class BufferMatches(object):
+    """
+    All the matches of a pattern in a view, in order, as returned by
+    `view.find_all()`.
+
+    Matches don't overlap, so a search starting inside a match continues
+    after it, as Vim does with the default 'cpoptions'.
+    """
+
+    def __init__(self, regions):
+        self.regions = regions
+        self.starts = [r.a for r in regions]
+        self.ends = [r.b for r in regions]
+
+    def find(self, start, end):
+        """
+        Returns the first match starting at or after @start if it ends at
+        or before @end, like `find_in_range`.
+        """
+        i = bisect_left(self.starts, start)
+        if i < len(self.regions) and self.regions[i].b <= end:
+            return self.regions[i]
+
+    def find_last(self, start, end):
+        """
+        Returns the last match ending at or before @end if it starts at or
+        after @start.
+        """
+        i = bisect_right(self.ends, end) - 1
+        if i >= 0 and self.regions[i].a >= start:
+            return self.regions[i]
+
+    def overlapping(self, start, end):
+        """
+        Returns the matches that end after @start and start before @end.
+        """
+        return self.regions[bisect_right(self.ends, start):
+                            bisect_left(self.starts, end)]
+
+
+# Maximum number of `BufferMatches` kept by `buffer_matches`, across views.
+MATCH_CACHE_SIZE = 16
+
+# `BufferMatches` indexed by (view id, pattern, flags, change count), least
+# recently used first.
+_match_cache = OrderedDict()
+
+
+def cached_buffer_matches(view, term, flags=0):
+    """
+    Returns the `BufferMatches` of @term in @view if they are cached and
+    still valid, or `None`.
+    """
+    key = (view.id(), term, flags, view.change_count())
+    matches = _match_cache.get(key)
+    if matches is not None:
+        _match_cache.move_to_end(key)
+    return matches
+
+
+def buffer_matches(view, term, flags=0):
+    """
+    Returns the `BufferMatches` of @term in @view.
+
+    Matches are cached until the buffer changes, so that searches repeated
+    with 'n' or 'N' and the highlighting of their matches share a single
+    `view.find_all()`.
+    """
+    key = (view.id(), term, flags, view.change_count())
+    try:
+        matches = _match_cache.pop(key)
+    except KeyError:
+        matches = BufferMatches(view.find_all(term, flags))
+        # Matches for a previous version of the buffer are no longer valid.
+        for old in [k for k in _match_cache if k[:3] == key[:3]]:
+            del _match_cache[old]
+        while len(_match_cache) >= MATCH_CACHE_SIZE:
+            _match_cache.popitem(last=False)
+    _match_cache[key] = matches
+    return matches
+
+
+# Maximum number of matches highlighted at once, unless
+# `vintageous_hlsearch_max_regions` says otherwise.
+HLSEARCH_MAX_REGIONS = 1000
+
+# How often, in milliseconds, views with highlighted matches are checked for
+# scrolling and changes.
+HLSEARCH_POLL_INTERVAL = 250
+
+
+class _Hilite(object):
+    """
+    Matches highlighted in a view.
+    """
+
+    def __init__(self, view, term, flags):
+        self.view = view
+        self.term = term
+        self.flags = flags
+        # Region of the buffer whose matches are all highlighted.
+        self.covered = None
+        self.change_count = None
+
+
+# `_Hilite`s indexed by view.id().
+_hilites = {}
+
+
+def hilite(view, term, flags=0):
+    """
+    Highlights the matches of @term in @view.
+
+    Only matches in the visible region and one screen above and below it are
+    highlighted, up to `vintageous_hlsearch_max_regions` matches. While the
+    highlights are on, the view is polled so that they follow scrolling and
+    changes to the buffer. Searches still find matches anywhere.
+    """
+    entry = _hilites[view.id()] = _Hilite(view, term, flags)
+    _hilite_visible(entry)
+    if _hilites.get(view.id()) is entry:
+        sublime.set_timeout(partial(_poll_hilite, entry),
+                            HLSEARCH_POLL_INTERVAL)
+
+
+def _hilite_visible(entry):
+    view = entry.view
+    visible = view.visible_region()
+    margin = max(visible.size(), 1)
+    window = sublime.Region(view.line(max(visible.a - margin, 0)).a,
+                            view.full_line(min(visible.b + margin,
+                                               view.size())).b)
+
+    matches = cached_buffer_matches(view, entry.term, entry.flags)
+    if matches is not None:
+        regs = matches.overlapping(window.a, window.b)
+    else:
+        # Don't search the whole buffer just to highlight part of it.
+        regs = find_all_in_range(view, entry.term, window.a, window.b,
+                                 entry.flags)
+
+    limit = view.settings().get('vintageous_hlsearch_max_regions',
+                                HLSEARCH_MAX_REGIONS)
+    covered = window
+    if len(regs) > limit:
+        # Keep the matches around the visible region.
+        first = bisect_right([r.b for r in regs], visible.a)
+        lo = max(min(first - limit // 4, len(regs) - limit), 0)
+        hi = lo + limit
+        covered = sublime.Region(
+            regs[lo - 1].b if lo > 0 else window.a,
+            regs[hi].a if hi < len(regs) else window.b)
+        regs = regs[lo:hi]
+
+    entry.covered = covered
+    entry.change_count = view.change_count()
+
+    if not regs:
+        view.erase_regions('vi_search')
+        if matches is not None and not matches.regions:
+            # No matches anywhere: nothing to follow.
+            _hilites.pop(view.id(), None)
+        return
+
+    view.add_regions('vi_search', regs, 'comment', '',
+                     sublime.DRAW_NO_FILL)
+
+
+def _poll_hilite(entry):
+    view = entry.view
+    if _hilites.get(view.id()) is not entry:
+        return
+    if not view.is_valid():
+        del _hilites[view.id()]
+        return
+
+    if (entry.change_count != view.change_count() or
+        not entry.covered.contains(view.visible_region())):
+            _hilite_visible(entry)
+            if _hilites.get(view.id()) is not entry:
+                return
+
+    sublime.set_timeout(partial(_poll_hilite, entry), HLSEARCH_POLL_INTERVAL)
+
+
+def hilited_matches(view):
+    """
+    Returns all the matches in @view of the term highlighted in it, including
+    those that aren't highlighted because they aren't near the visible
+    region.
+    """
+    entry = _hilites.get(view.id())
+    if entry is None:
+        return []
+    return buffer_matches(view, entry.term, entry.flags).regions
+
+
+def erase_hilite(view):
+    """
+    Removes the highlighted matches from @view.
+    """
+    _hilites.pop(view.id(), None)
+    view.erase_regions('vi_search')
+
+
+def release(view):
+    """
+    Drops the cached matches and highlighting data for @view.
+    """
+    _hilites.pop(view.id(), None)
+    for key in [k for k in _match_cache if k[0] == view.id()]:
+        del _match_cache[key]
+
+
+def find_wrapping(view, term, start, end, flags=0, times=1, matches=None):
+    """
+    If @matches is a `BufferMatches` for @term and @flags, it is used
+    instead of searching the view.
+    """
     try:
         current_sel = view.sel()[0]
     except IndexError:
         return
 
+    def find(start, end):
+        if matches is not None:
+            return matches.find(start, end)
+        return find_in_range(view, term, start, end, flags)
+
     for x in range(times):
-        match = find_in_range(view, term, start, end, flags)
+        match = find(start, end)
         # make sure we wrap around the end of the buffer
         if not match:
             start = 0
             end = current_sel.a
-            match = find_in_range(view, term, start, end, flags)
+            match = find(start, end)
             if not match:
                 return
         start = match.b
@@ -48,16 +275,30 @@ def find_wrapping(view, term, start, end, flags=0, times=1):
     return match
 
 
-def reverse_find_wrapping(view, term, start, end, flags=0, times=1):
+def reverse_find_wrapping(view, term, start, end, flags=0, times=1,
+                          matches=None):
+    """
+    If @matches is a `BufferMatches` for @term and @flags, it is used
+    instead of searching the view.
+    """
     current_sel = view.sel()[0]
+
+    def find(start, end):
+        if matches is None:
+            return reverse_search(view, term, start, end, flags)
+        # Like reverse_search.
+        if start < 0 or end > view.size():
+            return None
+        return matches.find_last(view.line(start).a, end)
+
     # Search wrapping around the end of the buffer.
     for x in range(times):
-        match = reverse_search(view, term, start, end, flags)
+        match = find(start, end)
         # Start searching in the lower half of the buffer if we aren't doing it yet.
         if not match and start <= current_sel.b:
             start = current_sel.b
             end = view.size()
-            match = reverse_search(view, term, start, end, flags)
+            match = find(start, end)
             if not match:
                 return
         # No luck in the whole buffer.
@@ -80,7 +321,91 @@ def find_last_in_range(view, term, start, end, flags=0):
     return last_found
 
 
-# reverse search
+# Number of characters pulled from the view by the first step of a backward
+# search. Each further step pulls twice as many as the previous one.
+REVERSE_SEARCH_CHUNK_SIZE = 16 * 1024
+
+
+# Syntax of the Boost regular expressions used by `view.find()` that Python
+# accepts but reads differently, or that can't be matched like the buffer
+# would be against the text we pull in chunks. Escaped characters may be
+# flagged too, which only means we don't use Python for them.
+_BOOST_ONLY_SYNTAX = re.compile(r"""
+    \\[<>'`AZzG]  # word and buffer boundaries
+  | \(\?<[=!]     # lookbehinds, which can't see past the text we pull
+  | \[[:=.]       # POSIX classes, equivalence classes, collating elements
+  | [*+?}]\+      # possessive quantifiers
+""", re.VERBOSE)
+
+
+def compile_pattern(term, flags=0):
+    """
+    Returns @term compiled as a Python regular expression that behaves like
+    it would in `view.find()` with @flags, or `None` if it isn't valid or
+    Python can't match it like `view.find()` would.
+    """
+    if flags & sublime.LITERAL:
+        term = re.escape(term)
+    elif _BOOST_ONLY_SYNTAX.search(term):
+        return None
+    re_flags = re.MULTILINE
+    if flags & sublime.IGNORECASE:
+        re_flags |= re.IGNORECASE
+    try:
+        return re.compile(term, re_flags)
+    except re.error:
+        return None
+
+
+def find_last_before(view, term, start, end, flags=0):
+    """
+    Returns the match of @term that starts last at or after @start and ends
+    at or before @end, or `None`.
+
+    Text is pulled from the view in chunks, from @end backwards, and stops
+    being pulled as soon as a match starts in the last chunk. Each chunk is
+    searched together with the text after it, so matches that run into
+    later chunks (including multiline ones) are found too. Chunks start at
+    line beginnings, so that `^`, `\\b` and lookbehinds behave as they
+    would in `view.find()`. Patterns see the text up to the end of @end's
+    line, not further.
+    """
+    rx = compile_pattern(term, flags)
+    if rx is None:
+        # Not a pattern Python matches like Sublime Text does; walk the range
+        # forward instead.
+        return find_last_in_range(view, term, start, end, flags)
+
+    # Include the rest of the line so that patterns can look past @end, as
+    # with `$` or lookaheads, even if matches must end before it.
+    text = view.substr(sublime.Region(end, view.full_line(end).b))
+    hi = end
+    size = REVERSE_SEARCH_CHUNK_SIZE
+    while hi > start:
+        # Chunks start at line beginnings, but matches can't start before
+        # @start.
+        lo = view.line(max(start, hi - size)).a
+        text = view.substr(sublime.Region(lo, hi)) + text
+        # Only matches starting in this chunk are new.
+        limit = hi - lo
+        last = None
+        pos = max(start - lo, 0)
+        while pos < limit:
+            m = rx.search(text, pos)
+            if m is None or m.start() >= limit:
+                break
+            if lo + m.end() <= end:
+                last = m
+            pos = m.start() + 1
+        if last is not None:
+            return sublime.Region(lo + last.start(), lo + last.end())
+        # Growing the chunks keeps the text searched linear in the distance
+        # covered, even though every chunk is searched with the text after
+        # it.
+        hi = lo
+        size *= 2
+
+
 def reverse_search(view, term, start, end, flags=0):
     assert isinstance(start, int) or start is None
     assert isinstance(end, int) or end is None
@@ -91,28 +416,8 @@ def reverse_search(view, term, start, end, flags=0):
     if start < 0 or end > view.size():
         return None
 
-    lo_line = view.full_line(start)
-    hi_line = view.full_line(end)
-
-    while True:
-        low_row, hi_row = view.rowcol(lo_line.a)[0], view.rowcol(hi_line.a)[0]
-        middle_row = (low_row + hi_row) // 2
-
-        middle_line = view.full_line(view.text_point(middle_row, 0))
-
-        lo_region = sublime.Region(lo_line.a, middle_line.b)
-        hi_region = sublime.Region(middle_line.b, min(hi_line.b, end))
-
-        if find_in_range(view, term, hi_region.a, hi_region.b, flags):
-            lo_line = view.full_line(middle_line.b)
-        elif find_in_range(view, term, lo_region.a, lo_region.b, flags):
-            hi_line = view.full_line(middle_line.a)
-        else:
-            return None
-
-        if lo_line == hi_line:
-            # we found the line we were looking for, now extract the match.
-            return find_last_in_range(view, term, hi_line.a, min(hi_line.b, end), flags)
+    # Matches may start anywhere on @start's line.
+    return find_last_before(view, term, view.line(start).a, end, flags)
 
 
 def reverse_search_by_pt(view, term, start, end, flags=0):
@@ -125,28 +430,7 @@ def reverse_search_by_pt(view, term, start, end, flags=0):
     if start < 0 or end > view.size():
         return None
 
-    lo_line = view.full_line(start)
-    hi_line = view.full_line(end)
-
-    while True:
-        low_row, hi_row = view.rowcol(lo_line.a)[0], view.rowcol(hi_line.a)[0]
-        middle_row = (low_row + hi_row) // 2
-
-        middle_line = view.full_line(view.text_point(middle_row, 0))
-
-        lo_region = sublime.Region(lo_line.a, middle_line.b)
-        hi_region = sublime.Region(middle_line.b, min(hi_line.b, end))
-
-        if find_in_range(view, term, hi_region.a, hi_region.b, flags):
-            lo_line = view.full_line(middle_line.b)
-        elif find_in_range(view, term, lo_region.a, lo_region.b, flags):
-            hi_line = view.full_line(middle_line.a)
-        else:
-            return None
-
-        if lo_line == hi_line:
-            # we found the line we were looking for, now extract the match.
-            return find_last_in_range(view, term, max(hi_line.a, start), min(hi_line.b, end), flags)
+    return find_last_before(view, term, start, end, flags)
 
 
 # TODO: Test me.
@@ -168,20 +452,25 @@ class BufferSearchBase(sublime_plugin.TextCommand):
     def build_pattern(self, query):
         return query
 
-    def hilite(self, query):
-        flags = self.calculate_flags()
-        regs = self.view.find_all(self.build_pattern(query), flags)
+    def buffer_matches(self, query, repeating=False):
+        """
+        Returns the `BufferMatches` for @query if the search is being
+        repeated, or `None`.
 
-        if not regs:
-            self.view.erase_regions('vi_search')
-            return
+        A single search is faster with `view.find()` than with all the
+        matches in the buffer, so only repeated searches use them.
+        """
+        if not repeating:
+            return None
+        return buffer_matches(self.view, self.build_pattern(query),
+                              self.calculate_flags())
 
+    def hilite(self, query):
         # TODO: Re-enable this.
         # if State(self.view).settings.vi['hlsearch'] == False:
         #     return
 
-        self.view.add_regions('vi_search', regs, 'comment', '',
-                              sublime.DRAW_NO_FILL)
+        hilite(self.view, self.build_pattern(query), self.calculate_flags())
 
 
 # TODO: Test me.
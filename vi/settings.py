@@ -2,6 +2,7 @@ import sublime
 
 from collections import defaultdict
 from collections import namedtuple
+from contextlib import contextmanager
 import json
 
 vi_user_setting = namedtuple('vi_editor_setting', 'scope values default parser action negatable')
@@ -27,6 +28,39 @@ def destroy(view):
         del VintageSettings._volatile[view.id()]
     except KeyError:
         pass
+    VintageSettings._cache.pop(view.id(), None)
+
+
+@contextmanager
+def caching(view):
+    """
+    Serves the `vintage` view settings of @view from memory until the
+    outermost `caching` block for @view exits. Only then are the keys written
+    in the meantime flushed back to the view settings, with a single call to
+    `view.settings().set()`.
+
+    Use it to wrap a key-processing cycle. Blocks can be nested.
+    """
+    cache = VintageSettings._cache.get(view.id())
+    if cache is not None:
+        cache.depth += 1
+        try:
+            yield
+        finally:
+            cache.depth -= 1
+        return
+
+    # Ensure the underlying settings exist before we take a copy.
+    VintageSettings(view)
+    cache = _VintageCache(view)
+    VintageSettings._cache[view.id()] = cache
+    try:
+        yield
+    finally:
+        # The cache may have been dropped already by .destroy().
+        if VintageSettings._cache.get(view.id()) is cache:
+            del VintageSettings._cache[view.id()]
+        cache.flush()
 
 
 def set_generic_view_setting(view, name, value, opt, globally=False):
@@ -69,6 +103,16 @@ def opt_bool_parser(value):
         return False
 
 
+def opt_int_parser(value):
+    try:
+        converted = int(value)
+        if converted < 0:
+            raise ValueError
+        return converted
+    except TypeError:
+        raise ValueError
+
+
 def opt_rulers_parser(value):
     try:
         converted = json.loads(value)
@@ -92,6 +136,8 @@ VI_OPTIONS = {
     'rulers':      vi_user_setting(scope=SCOPE_VIEW,      values=None,                    default=[],    parser=opt_rulers_parser, action=set_generic_view_setting, negatable=False),
     'showminimap': vi_user_setting(scope=SCOPE_WINDOW,    values=(True, False, '0', '1'), default=True,  parser=None,              action=set_minimap,              negatable=True),
     'showsidebar': vi_user_setting(scope=SCOPE_WINDOW,    values=(True, False, '0', '1'), default=True,  parser=None,              action=set_sidebar,              negatable=True),
+    'timeout':     vi_user_setting(scope=SCOPE_VI_VIEW,   values=(True, False, '0', '1'), default=True,  parser=opt_bool_parser,   action=set_generic_view_setting, negatable=True),
+    'timeoutlen':  vi_user_setting(scope=SCOPE_VI_VIEW,   values=None,                    default=1000,  parser=opt_int_parser,    action=set_generic_view_setting, negatable=False),
 }
 
 
@@ -156,6 +202,17 @@ def get_option(view, name):
         value = view.window().settings().get('vintageous_' + name)
     else:
         value = view.settings().get('vintageous_' + name)
+    if option_data.values is None:
+        # Any value the option's parser accepts. Settings files may hold
+        # anything, and parsers take the strings typed in :set commands.
+        if value is None:
+            return option_data.default
+        try:
+            if not isinstance(value, str):
+                value = json.dumps(value)
+            return option_data.parser(value)
+        except (ValueError, TypeError):
+            return option_data.default
     return value if (value in option_data.values) else option_data.default
 
 
@@ -177,6 +234,40 @@ class SublimeSettings(object):
         self.view.settings().set(key, value)
 
 
+class _VintageCache(object):
+    """
+    In-memory copy of a view's `vintage` settings.
+
+    Tracks the keys written while active so that they can be merged back into
+    the view settings later.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.depth = 1
+        self.data = dict(view.settings().get('vintage') or {})
+        self.dirty = set()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.dirty.add(key)
+
+    def flush(self):
+        if not self.dirty:
+            return
+        # Merge into the current data so that keys set by others are kept.
+        setts = self.view.settings().get('vintage')
+        if not isinstance(setts, dict):
+            setts = {}
+        for key in self.dirty:
+            setts[key] = self.data[key]
+        self.view.settings().set('vintage', setts)
+        self.dirty = set()
+
+
 class VintageSettings(object):
     """
     Helper class for accessing settings related to Vintage.
@@ -187,6 +278,9 @@ class VintageSettings(object):
       b) the window.Settings object
       c) VintageSettings._volatile
 
+    While a `caching` block is active for the view, view settings are read
+    from and written to VintageSettings._cache instead of a).
+
     This class knows where to store the settings' data it's passed.
 
     It is meant to be used as a descriptor.
@@ -195,10 +289,16 @@ class VintageSettings(object):
     _volatile_settings = []
     # Stores volatile settings indexed by view.id().
     _volatile = defaultdict(dict)
+    # Stores _VintageCache instances indexed by view.id().
+    _cache = {}
 
     def __init__(self, view=None):
         self.view = view
 
+        if view is not None and view.id() in VintageSettings._cache:
+            # Checked already when the cache was created.
+            return
+
         if view is not None and not isinstance(self.view.settings().get('vintage'), dict):
             self.view.settings().set('vintage', dict())
 
@@ -208,7 +308,11 @@ class VintageSettings(object):
     def __get__(self, instance, owner):
         # This method is called when this class is accessed as a data member.
         if instance is not None:
-            return VintageSettings(instance.v)
+            setts = VintageSettings(instance.v)
+            # Shadow the descriptor so that long-lived instances don't need to
+            # rebuild us on every access.
+            instance.__dict__['vi'] = setts
+            return setts
         return VintageSettings()
 
     def __getitem__(self, key):
@@ -236,14 +340,24 @@ class VintageSettings(object):
             if key in VintageSettings._volatile_settings:
                 self._set_volatile(key, value)
                 return
+            cache = VintageSettings._cache.get(self.view.id())
+            if cache is not None:
+                cache.set(key, value)
+                return
             setts, target = self.view.settings().get('vintage'), self.view
         else:
             setts, target = self.view.window().settings().get('vintage'), self.view.window()
 
+        if not isinstance(setts, dict):
+            # Someone has erased the settings since we were created.
+            setts = {}
         setts[key] = value
         target.settings().set('vintage', setts)
 
     def _get_vintageous_view_setting(self, key):
+        cache = VintageSettings._cache.get(self.view.id())
+        if cache is not None:
+            return cache.get(key)
         return self.view.settings().get('vintage').get(key)
 
     def _get_vintageous_window_setting(self, key):
@@ -0,0 +1,94 @@
+"""
+Renders the Vintageous keys of the status bar.
+
+A key press may update the same status key several times (for example,
+`vim-seq` is set when the key is added to the sequence and erased when the
+command runs). Inside a `rendering` block, `set_status()` and
+`erase_status()` only record the latest value for each key; when the
+outermost block for the view exits, the values that differ from the ones
+last shown are pushed to the view with one `view.set_status()` or
+`view.erase_status()` call each.
+
+Outside `rendering` blocks, changes are pushed right away, but still only if
+they differ from what's shown.
+"""
+
+from contextlib import contextmanager
+
+
+class _StatusBuffer(object):
+    def __init__(self):
+        self.depth = 1
+        # Latest value set for each key, or `None` if erased.
+        self.values = {}
+
+
+# Open buffers indexed by view.id().
+_buffers = {}
+# Values last pushed to each view (`None` if erased), indexed by view.id(),
+# then by key.
+_shown = {}
+
+
+def _push(view, key, value):
+    shown = _shown.setdefault(view.id(), {})
+    if key in shown and shown[key] == value:
+        return
+    if value is None:
+        view.erase_status(key)
+    else:
+        view.set_status(key, value)
+    shown[key] = value
+
+
+@contextmanager
+def rendering(view):
+    """
+    Holds back status changes for @view until the outermost `rendering`
+    block for @view exits. Blocks can be nested.
+
+    Use it to wrap a key-processing cycle.
+    """
+    buffer = _buffers.get(view.id())
+    if buffer is not None:
+        buffer.depth += 1
+        try:
+            yield
+        finally:
+            buffer.depth -= 1
+        return
+
+    buffer = _buffers[view.id()] = _StatusBuffer()
+    try:
+        yield
+    finally:
+        if _buffers.get(view.id()) is buffer:
+            del _buffers[view.id()]
+        for key, value in buffer.values.items():
+            _push(view, key, value)
+
+
+def set_status(view, key, value):
+    """
+    Sets the status @key of @view to @value.
+    """
+    buffer = _buffers.get(view.id())
+    if buffer is not None:
+        buffer.values[key] = value
+    else:
+        _push(view, key, value)
+
+
+def erase_status(view, key):
+    """
+    Erases the status @key of @view.
+    """
+    set_status(view, key, None)
+
+
+def release(view):
+    """
+    Forgets what's shown in @view.
+    """
+    _buffers.pop(view.id(), None)
+    _shown.pop(view.id(), None)
@@ -216,11 +216,22 @@ def row_to_pt(view, row, col=0):
 
 @contextmanager
 def gluing_undo_groups(view, state):
+    """
+    Glues the edits made while the block runs into one undo group.
+
+    Blocks can be nested; the outermost one does the gluing.
+    """
+    if state.processing_notation:
+        yield
+        return
+
     state.processing_notation = True
     view.run_command('mark_undo_groups_for_gluing')
-    yield
-    view.run_command('glue_marked_undo_groups')
-    state.processing_notation = False
+    try:
+        yield
+    finally:
+        view.run_command('glue_marked_undo_groups')
+        state.processing_notation = False
 
 
 def blink(times=4, delay=55):
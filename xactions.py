@@ -6,10 +6,16 @@ import sublime
 from Vintageous import PluginLogger
 from Vintageous.state import _init_vintageous
 from Vintageous.state import State
+from Vintageous.vi import api_calls
 from Vintageous.vi import cmd_base
 from Vintageous.vi import cmd_defs
+from Vintageous.vi import latency
 from Vintageous.vi import mappings
+from Vintageous.vi import profiler
+from Vintageous.vi import repeat
 from Vintageous.vi import search
+from Vintageous.vi import settings
+from Vintageous.vi import status
 from Vintageous.vi import units
 from Vintageous.vi import utils
 from Vintageous.vi.constants import regions_transformer_reversed
@@ -18,6 +24,7 @@ from Vintageous.vi.core import ViWindowCommandBase
 from Vintageous.vi.keys import key_names
 from Vintageous.vi.keys import KeySequenceTokenizer
 from Vintageous.vi.keys import to_bare_command_name
+from Vintageous.vi.macros import compile_macro
 from Vintageous.vi.mappings import Mappings
 from Vintageous.vi.utils import first_sel
 from Vintageous.vi.utils import gluing_undo_groups
@@ -32,6 +39,14 @@ from Vintageous.vi.utils import restoring_sel
 
 _logger = PluginLogger(__name__)
 
+# Keys waiting for the rest of a user mapping, indexed by view.id(). Each
+# entry is the token of the timeout that will run them on their own; see
+# `PressKey.schedule_mapping_timeout`.
+_mapping_timeouts = {}
+# Partial sequence waiting for the rest of a user mapping, indexed by
+# view.id().
+_pending_mappings = {}
+
 
 class _vi_g_big_u(ViTextCommandBase):
     '''
@@ -347,7 +362,6 @@ class _enter_normal_mode(ViTextCommandBase):
                 state.glue_until_normal_mode = False
 
         if mode == modes.INSERT and int(state.normal_insert_count) > 1:
-            state.enter_insert_mode()
             # TODO: Calculate size the view has grown by and place the caret
             # after the newly inserted text.
             sels = list(self.view.sel())
@@ -358,18 +372,44 @@ class _enter_normal_mode(ViTextCommandBase):
             self.view.sel().add_all(new_sels)
             times = int(state.normal_insert_count) - 1
             state.normal_insert_count = '1'
-            self.view.window().run_command('_vi_dot', {
+            type_, seq_or_cmd = (state.repeat_data or (None, None))[:2]
+            if type_ == 'native' and seq_or_cmd[0] == 'insert':
+                # Insert all the copies of the typed text at once instead of
+                # repeating the insertion once per copy.
+                self.view.run_command('_vi_insert_repeated', {
+                                'text': seq_or_cmd[1]['characters'],
                                 'count': times,
-                                'mode': mode,
-                                'repeat_data': state.repeat_data,
                                 })
+            else:
+                state.enter_insert_mode()
+                self.view.window().run_command('_vi_dot', {
+                                    'count': times,
+                                    'mode': mode,
+                                    'repeat_data': state.repeat_data,
+                                    })
             self.view.sel().clear()
             self.view.sel().add_all(new_sels)
 
+        # The count only applies to the insert session we're leaving.
+        state.normal_insert_count = '1'
+
         state.update_xpos(force=True)
         sublime.status_message('')
 
 
+class _vi_insert_repeated(ViTextCommandBase):
+    """
+    Inserts @text @count times at every caret, with one edit per caret.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def run(self, edit, text='', count=1):
+        text = text * count
+        for s in reversed(list(self.view.sel())):
+            self.view.replace(edit, R(s.b), text)
+
+
 class _enter_normal_mode_impl(ViTextCommandBase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -429,7 +469,7 @@ class _enter_normal_mode_impl(ViTextCommandBase):
 
         regions_transformer(self.view, f)
 
-        self.view.erase_regions('vi_search')
+        search.erase_hilite(self.view)
         self.view.run_command('_vi_adjust_carets', {'mode': mode})
 
 
@@ -627,9 +667,20 @@ class ProcessNotation(ViWindowCommandBase):
         super().__init__(*args, **kwargs)
 
     def run(self, keys, repeat_count=None, check_user_mappings=True):
+        # Keep the state in memory while the whole sequence is processed.
+        with latency.timing('ProcessNotation.run'), \
+             profiler.profiling(), \
+             settings.caching(self._view), \
+             status.rendering(self._view):
+            self._run(keys, repeat_count, check_user_mappings)
+
+    def _run(self, keys, repeat_count=None, check_user_mappings=True):
         state = self.state
-        _logger.info("[ProcessNotation] seq received: {0} mode: {1}"
-                                                    .format(keys, state.mode))
+        # Keys are fed straight to PressKey instead of going through
+        # `window.run_command('press_key', ...)` for each of them.
+        press_key = PressKey(self.window)
+        _logger.info(lambda: "[ProcessNotation] seq received: {0} mode: {1}"
+                             .format(keys, state.mode))
         initial_mode = state.mode
         # Disable interactive prompts. For example, to supress interactive
         # input collection in /foo<CR>.
@@ -642,17 +693,13 @@ class ProcessNotation(ViWindowCommandBase):
         # undo history, but store the full sequence for '.' to use.
         leading_motions = ''
         for key in KeySequenceTokenizer(keys).iter_tokenize():
-            self.window.run_command('press_key', {
-                                'key': key,
-                                'do_eval': False,
-                                'repeat_count': repeat_count,
-                                'check_user_mappings': check_user_mappings
-                                })
+            press_key.run(key, do_eval=False, repeat_count=repeat_count,
+                          check_user_mappings=check_user_mappings)
             if state.action:
                 # The last key press has caused an action to be primed. That
                 # means there are no more leading motions. Break out of here.
-                _logger.info('[ProcessNotation] first action found in {0}'
-                                                      .format(state.sequence))
+                _logger.info(lambda: '[ProcessNotation] first action found '
+                                     'in {0}'.format(state.sequence))
                 state.reset_command_data()
                 if state.mode == modes.OPERATOR_PENDING:
                     state.mode = modes.NORMAL
@@ -671,6 +718,7 @@ class ProcessNotation(ViWindowCommandBase):
         if state.must_collect_input:
             # State is requesting more input, so this is the last command in
             # the sequence and it needs more input.
+            repeat.invalidate()
             self.collect_input()
             return
 
@@ -680,29 +728,35 @@ class ProcessNotation(ViWindowCommandBase):
                 (not state.must_collect_input)):
                     return
 
-            _logger.info('[ProcessNotation] original seq/leading motions: {0}/{1}'
-                                               .format(keys, leading_motions))
+            _logger.info('[ProcessNotation] original seq/leading motions: %s/%s',
+                         keys, leading_motions)
             keys = keys[len(leading_motions):]
-            _logger.info('[ProcessNotation] seq stripped to {0}'.format(keys))
+            _logger.info('[ProcessNotation] seq stripped to %s', keys)
 
         if not (state.motion and not state.action):
             with gluing_undo_groups(self.window.active_view(), state):
                 try:
+                    # Text typed in insert mode. Only <Esc> can take us out of
+                    # insert mode, so runs of characters are inserted at once.
+                    typed = []
                     for key in KeySequenceTokenizer(keys).iter_tokenize():
                         if key.lower() == key_names.ESC:
+                            if state.mode == modes.INSERT:
+                                # Like <count>i: the count repeats the text
+                                # typed, which we insert in one go.
+                                typed *= int(state.normal_insert_count)
+                            self.insert(typed)
                             # XXX: We should pass a mode here?
+                            repeat.record(repeat.ESC, None)
                             self.window.run_command('_enter_normal_mode')
                             continue
 
                         elif state.mode not in (modes.INSERT, modes.REPLACE):
-                            self.window.run_command('press_key', {
-                                    'key': key,
-                                    'repeat_count': repeat_count,
-                                    'check_user_mappings': check_user_mappings
-                                    })
+                            press_key.run(key, repeat_count=repeat_count,
+                                          check_user_mappings=check_user_mappings)
                         else:
-                            self.window.run_command('insert', {
-                               'characters': utils.translate_char(key)})
+                            typed.append(utils.translate_char(key))
+                    self.insert(typed)
                     if not state.must_collect_input:
                         return
                 finally:
@@ -717,8 +771,9 @@ class ProcessNotation(ViWindowCommandBase):
         # We'll reach this point if we have a command that requests input
         # whose input parser isn't satistied. For example, `/foo`. Note that
         # `/foo<CR>`, on the contrary, would have satisfied the parser.
-        _logger.info('[ProcessNotation] unsatisfied parser: {0} {1}'
-                                          .format(state.action, state.motion))
+        _logger.info(lambda: '[ProcessNotation] unsatisfied parser: {0} {1}'
+                             .format(state.action, state.motion))
+        repeat.invalidate()
         if (state.action and state.motion):
             # We have a parser an a motion that can collect data. Collect data
             # interactively.
@@ -736,6 +791,16 @@ class ProcessNotation(ViWindowCommandBase):
 
         self.collect_input()
 
+    def insert(self, typed):
+        """
+        Inserts the characters in @typed, then empties it.
+        """
+        if typed:
+            text = ''.join(typed)
+            repeat.record(repeat.INSERT, text)
+            self.window.run_command('insert', {'characters': text})
+            del typed[:]
+
     def collect_input(self):
         try:
             command = None
@@ -748,8 +813,8 @@ class ProcessNotation(ViWindowCommandBase):
                 command = self.state.action or self.state.motion
 
             parser_def = command.input_parser
-            _logger.info('[ProcessNotation] last attemp to collect input: {0}'
-                                                  .format(parser_def.command))
+            _logger.info('[ProcessNotation] last attemp to collect input: %s',
+                         parser_def.command)
             if parser_def.interactive_command:
                 self.window.run_command(parser_def.interactive_command,
                                         {parser_def.input_param: command._inp}
@@ -783,9 +848,20 @@ class PressKey(ViWindowCommandBase):
         super().__init__(*args, **kwargs)
 
     def run(self, key, repeat_count=None, do_eval=True, check_user_mappings=True):
-        _logger.info("[PressKey] pressed: {0}".format(key))
+        # Keep the state in memory until we're done processing the key.
+        with latency.timing('PressKey.run'), profiler.profiling(), \
+             api_calls.counting('PressKey.run'), \
+             settings.caching(self._view), \
+             status.rendering(self._view):
+            self._run(key, repeat_count, do_eval, check_user_mappings)
+
+    def _run(self, key, repeat_count=None, do_eval=True, check_user_mappings=True):
+        _logger.info('[PressKey] pressed: %s', key)
 
         state = self.state
+        # Any key cancels the timeout for the keys pressed before it.
+        _mapping_timeouts.pop(state.view.id(), None)
+        pending = _pending_mappings.pop(state.view.id(), None)
 
         # If the user has made selections with the mouse, we may be in an
         # inconsistent state. Try to remedy that.
@@ -798,6 +874,7 @@ class PressKey(ViWindowCommandBase):
 
 
         if key.lower() == '<esc>':
+            repeat.record(repeat.ESC, state.mode)
             self.window.run_command('_enter_normal_mode', {'mode': state.mode})
             state.reset_command_data()
             return
@@ -828,20 +905,34 @@ class PressKey(ViWindowCommandBase):
             return
 
         state.partial_sequence += key
-        _logger.info("[PressKey] sequence {0}".format(state.sequence))
-        _logger.info("[PressKey] partial sequence {0}".format(state.partial_sequence))
+        _logger.info(lambda: "[PressKey] sequence {0}".format(state.sequence))
+        _logger.info(lambda: "[PressKey] partial sequence {0}".format(state.partial_sequence))
 
         # key_mappings = KeyMappings(self.window.active_view())
         key_mappings = Mappings(state)
+        key_mappings.advance(key)
         if check_user_mappings and key_mappings.incomplete_user_mapping():
-            _logger.info("[PressKey] incomplete user mapping: {0}".format(state.partial_sequence))
+            _logger.info(lambda: "[PressKey] incomplete user mapping: {0}".format(state.partial_sequence))
             # for example, we may have typed 'aa' and there's an 'aaa' mapping.
             # we need to keep collecting input.
+            if do_eval:
+                _pending_mappings[state.view.id()] = state.partial_sequence
+                # ProcessNotation has no one to wait for.
+                if not state.non_interactive:
+                    self.schedule_mapping_timeout()
             return
 
-        _logger.info('[PressKey] getting cmd for seq/partial seq in (mode): {0}/{1} ({2})'.format(state.sequence,
-                                                                                                    state.partial_sequence,
-                                                                                                    state.mode))
+        if (do_eval and pending is not None and
+            state.partial_sequence == pending + key and
+            key_mappings.longest_user_mapping(pending + key)[0] != pending + key):
+                # The key doesn't lead to the user mapping we were waiting
+                # for.
+                self.run_pending_keys()
+                return
+
+        _logger.info(lambda: '[PressKey] getting cmd for seq/partial seq in (mode): {0}/{1} ({2})'.format(state.sequence,
+                                                                                                            state.partial_sequence,
+                                                                                                            state.mode))
         command = key_mappings.resolve(check_user_mappings=check_user_mappings)
 
         if isinstance(command, cmd_defs.ViOpenRegister):
@@ -853,26 +944,13 @@ class PressKey(ViWindowCommandBase):
         # most probably not have to wipe the state.
         if isinstance(command, mappings.Mapping):
             if do_eval:
-                new_keys = command.mapping
-                if state.mode == modes.OPERATOR_PENDING:
-                    command_name = command.mapping
-                    new_keys = state.sequence[:-len(state.partial_sequence)] + command.mapping
-                reg = state.register
-                acount = state.action_count
-                mcount = state.motion_count
-                state.reset_command_data()
-                state.register = reg
-                state.motion_count = mcount
-                state.action_count = acount
-                state.mode = modes.NORMAL
-                _logger.info('[PressKey] running user mapping {0} via process_notation starting in mode {1}'.format(new_keys, state.mode))
-                self.window.run_command('process_notation', {'keys': new_keys, 'check_user_mappings': False})
+                self.run_user_mapping(command.mapping)
             return
 
         if isinstance(command, cmd_defs.ViOpenNameSpace):
             # Keep collecing input to complete the sequence. For example, we
             # may have typed 'g'.
-            _logger.info("[PressKey] opening namespace: {0}".format(state.partial_sequence))
+            _logger.info(lambda: "[PressKey] opening namespace: {0}".format(state.partial_sequence))
             return
 
         elif isinstance(command, cmd_base.ViMissingCommandDef):
@@ -893,7 +971,7 @@ class PressKey(ViWindowCommandBase):
                 command = key_mappings.resolve(sequence=bare_seq)
 
             if isinstance(command, cmd_base.ViMissingCommandDef):
-                _logger.info('[PressKey] unmapped sequence: {0}'.format(state.sequence))
+                _logger.info(lambda: '[PressKey] unmapped sequence: {0}'.format(state.sequence))
                 utils.blink()
                 state.mode = modes.NORMAL
                 state.reset_command_data()
@@ -906,11 +984,11 @@ class PressKey(ViWindowCommandBase):
                 # For example, dd, g~g~ or g~~
                 # remove counts
                 action_seq = to_bare_command_name(state.sequence)
-                _logger.info('[PressKey] action seq: {0}'.format(action_seq))
+                _logger.info('[PressKey] action seq: %s', action_seq)
                 command = key_mappings.resolve(sequence=action_seq, mode=modes.NORMAL)
                 # TODO: Make _missing a command.
                 if isinstance(command, cmd_base.ViMissingCommandDef):
-                    _logger.info("[PressKey] unmapped sequence: {0}".format(state.sequence))
+                    _logger.info(lambda: "[PressKey] unmapped sequence: {0}".format(state.sequence))
                     state.reset_command_data()
                     return
 
@@ -919,7 +997,7 @@ class PressKey(ViWindowCommandBase):
 
         state.set_command(command)
 
-        _logger.info("[PressKey] '{0}'' mapped to '{1}'".format(state.partial_sequence, command))
+        _logger.info(lambda: "[PressKey] '{0}'' mapped to '{1}'".format(state.partial_sequence, command))
 
         if state.mode == modes.OPERATOR_PENDING:
             state.reset_partial_sequence()
@@ -927,6 +1005,84 @@ class PressKey(ViWindowCommandBase):
         if do_eval:
             state.eval()
 
+    def schedule_mapping_timeout(self):
+        """
+        Runs the keys waiting for the rest of a user mapping on their own if
+        no other key is pressed within 'timeoutlen' milliseconds.
+        """
+        state = self.state
+        if not state.settings.vi['timeout']:
+            return
+
+        view = state.view
+        token = object()
+        _mapping_timeouts[view.id()] = token
+
+        def is_pending():
+            return (_mapping_timeouts.get(view.id()) is token and
+                    self.window.active_view().id() == view.id())
+
+        def timed_out():
+            if not is_pending():
+                return
+            del _mapping_timeouts[view.id()]
+            self.run_pending_keys()
+
+        # Only hop over to the main thread if the keys are still pending.
+        sublime.set_timeout_async(
+            lambda: is_pending() and sublime.set_timeout(timed_out, 0),
+            state.settings.vi['timeoutlen'])
+
+    def run_user_mapping(self, mapped_keys):
+        """
+        Runs the keys the user mapping in the partial sequence maps to.
+        """
+        state = self.state
+        new_keys = mapped_keys
+        if state.mode == modes.OPERATOR_PENDING:
+            new_keys = state.sequence[:-len(state.partial_sequence)] + mapped_keys
+        reg = state.register
+        acount = state.action_count
+        mcount = state.motion_count
+        state.reset_command_data()
+        state.register = reg
+        state.motion_count = mcount
+        state.action_count = acount
+        state.mode = modes.NORMAL
+        _logger.info(lambda: '[PressKey] running user mapping {0} via process_notation starting in mode {1}'.format(new_keys, state.mode))
+        self.window.run_command('process_notation', {'keys': new_keys, 'check_user_mappings': False})
+
+    def run_pending_keys(self):
+        """
+        Runs the keys that were waiting for the rest of a user mapping, once
+        it has timed out or can no longer be completed. Like in Vim, the
+        longest user mapping they start with runs, or else the first key on
+        its own. Then the remaining keys are pressed again, user mappings
+        included.
+        """
+        state = self.state
+        _pending_mappings.pop(state.view.id(), None)
+        keys = state.partial_sequence
+        if not keys or not state.sequence.endswith(keys):
+            return
+        _logger.info('[PressKey] running keys pending for a user mapping: %s', keys)
+        head, mapped_to = Mappings(state).longest_user_mapping(keys)
+        if head is not None:
+            rest = keys[len(head):]
+            # Counts and registers typed before the keys are kept.
+            state.sequence = state.sequence[:len(state.sequence) - len(rest)]
+            state.partial_sequence = head
+            self.run_user_mapping(mapped_to['name'])
+        else:
+            first = next(KeySequenceTokenizer(keys).iter_tokenize())
+            rest = keys[len(first):]
+            state.sequence = state.sequence[:-len(keys)]
+            state.reset_partial_sequence()
+            self.window.run_command('press_key', {'key': first,
+                                                  'check_user_mappings': False})
+        for key in KeySequenceTokenizer(rest).iter_tokenize():
+            self.window.run_command('press_key', {'key': key})
+
     def handle_counts(self, key, repeat_count):
         """
         Returns `True` if the processing of the current key needs to stop.
@@ -934,14 +1090,14 @@ class PressKey(ViWindowCommandBase):
         state = State(self.window.active_view())
         if not state.action and key.isdigit():
             if not repeat_count and (key != '0' or state.action_count) :
-                _logger.info('[PressKey] action count digit: {0}'.format(key))
+                _logger.info('[PressKey] action count digit: %s', key)
                 state.action_count += key
                 return True
 
         if (state.action and (state.mode == modes.OPERATOR_PENDING) and
             key.isdigit()):
                 if not repeat_count and (key != '0' or state.motion_count):
-                    _logger.info('[PressKey] motion count digit: {0}'.format(key))
+                    _logger.info('[PressKey] motion count digit: %s', key)
                     state.motion_count += key
                     return True
 
@@ -982,8 +1138,7 @@ class _vi_dot(ViWindowCommandBase):
             return
 
         if type_ == 'vi':
-            self.window.run_command('process_notation', {'keys': seq_or_cmd,
-                                                   'repeat_count': count})
+            self.repeat_vi(repeat_data, mode, count)
         elif type_ == 'native':
             sels = list(self.window.active_view().sel())
             # FIXME: We're not repeating as we should. It's the motion that
@@ -1000,6 +1155,62 @@ class _vi_dot(ViWindowCommandBase):
         state.repeat_data = repeat_data
         state.update_xpos()
 
+    def repeat_vi(self, repeat_data, mode, count):
+        """
+        Repeats a change stored as a key sequence.
+
+        The first time a change is repeated, its keys are run through
+        `process_notation` and the steps they resolve to are cached; after
+        that, and until something invalidates the cache, the steps run
+        directly.
+        """
+        view = self.window.active_view()
+        key = (repeat_data, mode, count, mappings.generation())
+        # Steps run from here on belong to this change only, even if we're
+        # being repeated or run by an outer change.
+        with repeat.capturing() as chain:
+            steps = repeat.cached(view, key)
+            if steps is not None:
+                self.run_steps(steps)
+                return
+
+            self.window.run_command('process_notation', {
+                'keys': repeat_data[1], 'repeat_count': count})
+        repeat.store(view, key, chain)
+
+    def run_steps(self, steps):
+        """
+        Runs @steps as `process_notation` would have run the keys they were
+        captured from.
+        """
+        state = self.state
+        state.non_interactive = True
+        try:
+            leading = steps.leading()
+            for step in steps[:leading]:
+                self.run_step(step)
+            if leading == len(steps):
+                return
+            with gluing_undo_groups(self.window.active_view(), state):
+                for step in steps[leading:]:
+                    self.run_step(step)
+        finally:
+            state.non_interactive = False
+
+    def run_step(self, step):
+        type_, data = step
+        if type_ == repeat.COMMAND:
+            self.state.restore_command_data(data)
+            self.state.eval()
+            self.state.reset_command_data()
+        elif type_ == repeat.INSERT:
+            self.window.run_command('insert', {'characters': data})
+        elif data is None:
+            self.window.run_command('_enter_normal_mode')
+        else:
+            self.window.run_command('_enter_normal_mode', {'mode': data})
+            self.state.reset_command_data()
+
 
 class _vi_dd(ViTextCommandBase):
 
@@ -2432,17 +2643,15 @@ class _vi_at(IrreversibleTextCommand):
                 return
 
         state = State(self.view)
-        for cmd, args in cmds:
-            # TODO(guillermooo): Is this robust enough?
-            if 'xpos' in args:
-                state.update_xpos(force=True)
-                args['xpos'] = State(self.view).xpos
-            elif args.get('motion') and 'xpos' in args.get('motion'):
-                state.update_xpos(force=True)
-                motion = args.get('motion')
-                motion['motion_args']['xpos'] = State(self.view).xpos
-                args['motion'] = motion
-            self.view.run_command(cmd, args)
+        program = compile_macro(cmds)
+        with gluing_undo_groups(self.view, state):
+            for i in range(count or 1):
+                for step in program:
+                    if step.update_xpos:
+                        state.update_xpos(force=True)
+                    if step.takes_xpos:
+                        step.set_xpos(state.xpos)
+                    self.view.run_command(step.command, step.args)
 
 
 class _enter_visual_block_mode(ViTextCommandBase):
@@ -2687,9 +2896,10 @@ class _vi_g_big_h(ViWindowCommandBase):
     def run(self, mode=None, count=1):
         view = self.window.active_view()
 
-        regs = view.get_regions('vi_search')
+        # Only the matches near the visible region are highlighted.
+        regs = search.hilited_matches(view)
         if regs:
-            view.sel().add_all(view.get_regions('vi_search'))
+            view.sel().add_all(regs)
 
             self.state.enter_select_mode()
             self.state.display_status()
@@ -210,7 +210,7 @@ class _vi_slash(ViMotionCommand, BufferSearchBase):
 
 
 class _vi_slash_impl(ViMotionCommand, BufferSearchBase):
-    def run(self, search_string='', mode=None, count=1):
+    def run(self, search_string='', mode=None, count=1, repeating=False):
         def f(view, s):
             if mode == modes.VISUAL:
                 return sublime.Region(s.a, match.a + 1)
@@ -239,7 +239,8 @@ class _vi_slash_impl(ViMotionCommand, BufferSearchBase):
         # Search wrapping around the end of the buffer.
         # flags = sublime.IGNORECASE | sublime.LITERAL
         flags = self.calculate_flags()
-        match = find_wrapping(self.view, search_string, start, wrapped_end, flags=flags, times=count)
+        match = find_wrapping(self.view, search_string, start, wrapped_end, flags=flags, times=count,
+                              matches=self.buffer_matches(search_string, repeating))
         if not match:
             return
 
@@ -1208,10 +1209,11 @@ class _vi_big_m(ViMotionCommand):
 
 
 class _vi_star(ViMotionCommand, ExactWordBufferSearchBase):
-    def run(self, count=1, mode=None, search_string=None):
+    def run(self, count=1, mode=None, search_string=None, repeating=False):
         def f(view, s):
             pattern = self.build_pattern(query)
             flags = self.calculate_flags()
+            matches = self.buffer_matches(query, repeating)
 
             if mode == modes.INTERNAL_NORMAL:
                 match = find_wrapping(view,
@@ -1219,14 +1221,16 @@ class _vi_star(ViMotionCommand, ExactWordBufferSearchBase):
                                       start=view.word(s.end()).end(),
                                       end=view.size(),
                                       flags=flags,
-                                      times=1)
+                                      times=1,
+                                      matches=matches)
             else:
                 match = find_wrapping(view,
                                       term=pattern,
                                       start=view.word(s.end()).end(),
                                       end=view.size(),
                                       flags=flags,
-                                      times=1)
+                                      times=1,
+                                      matches=matches)
 
             if match:
                 if mode == modes.INTERNAL_NORMAL:
@@ -1257,10 +1261,11 @@ class _vi_star(ViMotionCommand, ExactWordBufferSearchBase):
 
 
 class _vi_octothorp(ViMotionCommand, ExactWordBufferSearchBase):
-    def run(self, count=1, mode=None, search_string=None):
+    def run(self, count=1, mode=None, search_string=None, repeating=False):
         def f(view, s):
             pattern = self.build_pattern(query)
             flags = self.calculate_flags()
+            matches = self.buffer_matches(query, repeating)
 
             if mode == modes.INTERNAL_NORMAL:
                 match = reverse_find_wrapping(view,
@@ -1268,14 +1273,16 @@ class _vi_octothorp(ViMotionCommand, ExactWordBufferSearchBase):
                                               start=0,
                                               end=start_sel.a,
                                               flags=flags,
-                                              times=1)
+                                              times=1,
+                                              matches=matches)
             else:
                 match = reverse_find_wrapping(view,
                                               term=pattern,
                                               start=0,
                                               end=start_sel.a,
                                               flags=flags,
-                                              times=1)
+                                              times=1,
+                                              matches=matches)
 
             if match:
                 if mode == modes.INTERNAL_NORMAL:
@@ -1713,7 +1720,7 @@ class _vi_right_paren(ViMotionCommand):
 
 
 class _vi_question_mark_impl(ViMotionCommand, BufferSearchBase):
-    def run(self, search_string, mode=None, count=1, extend=False):
+    def run(self, search_string, mode=None, count=1, extend=False, repeating=False):
         def f(view, s):
             # FIXME: readjust carets if we searched for '\n'.
             if mode == modes.VISUAL:
@@ -1742,7 +1749,8 @@ class _vi_question_mark_impl(ViMotionCommand, BufferSearchBase):
                                       start=0,
                                       end=self.view.sel()[0].b,
                                       flags=flags,
-                                      times=count)
+                                      times=count,
+                                      matches=self.buffer_matches(search_string, repeating))
 
         if not found:
             print("Vintageous: Pattern not found.")
@@ -1818,19 +1826,20 @@ class _vi_repeat_buffer_search(ViMotionCommand):
         self.view.run_command(command, {
             'mode': mode,
             'count': count,
-            'search_string': search_string
+            'search_string': search_string,
+            'repeating': True
             })
 
 class _vi_n(ViMotionCommand):
     # TODO: This is a jump.
     def run(self, mode=None, count=1, search_string=''):
-        self.view.run_command('_vi_slash_impl', {'mode': mode, 'count': count, 'search_string': search_string})
+        self.view.run_command('_vi_slash_impl', {'mode': mode, 'count': count, 'search_string': search_string, 'repeating': True})
 
 
 class _vi_big_n(ViMotionCommand):
     # TODO: This is a jump.
     def run(self, count=1, mode=None, search_string=''):
-        self.view.run_command('_vi_question_mark_impl', {'mode': mode, 'count': count, 'search_string': search_string})
+        self.view.run_command('_vi_question_mark_impl', {'mode': mode, 'count': count, 'search_string': search_string, 'repeating': True})
 
 
 class _vi_big_e(ViMotionCommand):
@@ -9,8 +9,10 @@ import sublime_plugin
 
 from Vintageous.state import _init_vintageous
 from Vintageous.state import State
+from Vintageous.vi import api_calls
 from Vintageous.vi import settings
 from Vintageous.vi import cmd_defs
+from Vintageous.vi import latency
 from Vintageous.vi.dot_file import DotFile
 from Vintageous.vi.utils import modes
 from Vintageous.vi.utils import regions_transformer
@@ -44,11 +46,12 @@ class VintageStateTracker(sublime_plugin.EventListener):
         view.run_command('_vi_adjust_carets', {'mode': state.mode})
 
     def on_query_context(self, view, key, operator, operand, match_all):
-        vintage_state = State(view)
+        vintage_state = State.for_view(view)
         return vintage_state.context.check(key, operator, operand, match_all)
 
     def on_close(self, view):
         settings.destroy(view)
+        State.release(view)
 
 
 class ViMouseTracker(sublime_plugin.EventListener):
@@ -172,6 +175,46 @@ class ReloadVintageousSettings(sublime_plugin.TextCommand):
         DotFile.from_user().run()
 
 
+class VintageousShowLatencyStats(sublime_plugin.WindowCommand):
+    """Shows how long keys and commands have taken to run in a scratch view.
+    """
+
+    def run(self, reset=False):
+        view = self.window.new_file()
+        view.set_scratch(True)
+        view.set_name('Vintageous Latency Stats')
+        view.run_command('append', {'characters': latency.report()})
+        if reset:
+            latency.reset()
+
+
+class VintageousToggleApiCallCounting(sublime_plugin.WindowCommand):
+    """Turns counting of Sublime Text API calls on or off.
+    """
+
+    def run(self):
+        if api_calls.is_enabled():
+            api_calls.disable()
+        else:
+            api_calls.enable()
+        status = 'enabled' if api_calls.is_enabled() else 'disabled'
+        sublime.status_message("Vintageous: API call counting {0}"
+                               .format(status))
+
+
+class VintageousShowApiCallStats(sublime_plugin.WindowCommand):
+    """Shows how many API calls keys and commands have made in a scratch view.
+    """
+
+    def run(self, reset=False):
+        view = self.window.new_file()
+        view.set_scratch(True)
+        view.set_name('Vintageous API Call Stats')
+        view.run_command('append', {'characters': api_calls.report()})
+        if reset:
+            api_calls.reset()
+
+
 class VintageousOpenConfigFile(sublime_plugin.WindowCommand):
     """Opens or creates $packages/User/.vintageousrc.
     """